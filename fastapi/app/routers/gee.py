@@ -1,12 +1,190 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from datetime import datetime, timedelta
+import asyncio
+import hmac
+import json
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Optional
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
 from app.services.gee_service import GEEService
+from app.services.executor import ExecutorBusyError, gee_executor
+from app.services.gee_init import EarthEngineInitializer
+from app.services.cache import layer_cache
+from app.services.http_client import get_http_client
+from app.services.jobs import JobManager
+from app.services.metrics import timed
+from app.services.singleflight import SingleFlight, gee_singleflight
+from app.services.study_areas import study_area_registry
+from app.services.timeseries_store import timeseries_store
+from app.services.tile_cache import find_tile_urls, resolve_path, tile_store
+from app.services.warmup import LayerWarmup
 
-router = APIRouter(prefix="/gee", tags=["Google Earth Engine"])
+# Earth Engine itself is initialized in the background from the app lifespan
+gee_service = GEEService(initialize=False)
+gee_init = EarthEngineInitializer.from_env(gee_service)
+
+# Daily precomputation of the default layers; scheduled from the app lifespan
+gee_warmup = LayerWarmup.from_env(gee_service)
+
+# Background runner for long analyses; unfinished jobs resume from the app lifespan
+gee_jobs = JobManager.from_env(gee_service)
+
+# Concurrent requests for the same uncached tile share one upstream fetch
+tile_singleflight = SingleFlight()
+
+# Shared secret of the maintenance endpoints; unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """Allow a maintenance endpoint only with `Authorization: Bearer <ADMIN_TOKEN>`"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Maintenance endpoints are disabled; set ADMIN_TOKEN")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def require_earth_engine():
+    """Answer 503 while Earth Engine is not initialized, after a bounded wait if it is starting"""
+    if not await gee_init.wait_ready():
+        raise HTTPException(
+            status_code=503,
+            detail=f"Earth Engine is not ready ({gee_init.state})",
+            headers={"Retry-After": str(gee_init.retry_after())}
+        )
+
+
+router = APIRouter(
+    prefix="/gee",
+    tags=["Google Earth Engine"],
+    dependencies=[Depends(require_earth_engine)]
+)
+
+# Routes that serve what they can without Earth Engine and check it themselves
+tile_router = APIRouter(prefix="/gee", tags=["Google Earth Engine"])
+
+
+def validate_area(area: str):
+    """Reject unknown study-area codes before any Earth Engine work"""
+    if area not in study_area_registry:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid area code: {area}. Valid codes: {', '.join(study_area_registry.codes())}"
+        )
+
+
+def copy_with(value: Any, additions: Dict[tuple, Dict], path: tuple = ()) -> Any:
+    """Copy of the dicts and lists of ``value`` with ``additions[path]`` merged into the dict at each path"""
+    if isinstance(value, dict):
+        copied = {key: copy_with(item, additions, path + (key,)) for key, item in value.items()}
+        copied.update(additions.get(path, {}))
+        return copied
+    if isinstance(value, list):
+        return [copy_with(item, additions, path + (index,)) for index, item in enumerate(value)]
+    return value
+
+
+def add_proxy_tile_urls(method: str, args: list, result: Any) -> Any:
+    """
+    Copy of a layer result with a `proxy_tile_url` next to every `tile_url`
+
+    The proxy URL is stable across map ID renewals, and its tiles are
+    served from the local tile store once fetched. The result itself is
+    shared through the layer cache and single-flight, so it is not changed.
+    """
+    additions = {}
+    for path, _ in find_tile_urls(result):
+        layer_key = tile_store.layer_key(method, args, path)
+        tile_store.register_layer(layer_key, method, args, path)
+        additions[path] = {"proxy_tile_url": f"/gee/tiles/{layer_key}/{{z}}/{{x}}/{{y}}"}
+    return copy_with(result, additions) if additions else result
+
+
+async def run_gee(fn: Callable, *args) -> Any:
+    """
+    Run a blocking GEEService call on the Earth Engine executor
+
+    Results are cached on the method name and its normalized arguments, so
+    repeated requests for the same layer skip Earth Engine entirely, and
+    identical requests arriving together share a single computation.
+    """
+    key = layer_cache.make_key(fn.__name__, *args)
+    try:
+        result = await gee_singleflight.do(
+            key,
+            lambda: layer_cache.get_or_compute(key, lambda: gee_executor.run(fn, *args))
+        )
+        if tile_store is not None:
+            result = await asyncio.to_thread(add_proxy_tile_urls, fn.__name__, list(args), result)
+        return result
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Earth Engine request timed out after {gee_executor.timeout:.0f}s"
+        )
+
+async def is_cached(fn: Callable, *args) -> bool:
+    return await layer_cache.aexpires_at(layer_cache.make_key(fn.__name__, *args)) is not None
+
+
+async def run_gee_progressive(fn: Callable, *args) -> Any:
+    """
+    Run a layer call with approximate area statistics
+
+    The coarse-scale statistics return in seconds instead of waiting on
+    the full-resolution reduction; an exact layer already in the cache is
+    returned as is. Routes swap in exact statistics once those are cached.
+    """
+    if await is_cached(fn, *args):
+        return await run_gee(fn, *args)
+    return await run_gee(fn, *args, True)
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def statistics_events(fn: Callable, *args, approximate: bool = True) -> StreamingResponse:
+    """
+    Server-Sent Events of a statistics call: `approximate`, then `exact`
+
+    The exact reduction starts right away, alongside the approximate one;
+    the approximate event is skipped when the exact result is cached or
+    arrives first. Failures end the stream with an `error` event.
+    """
+    async def stream():
+        exact = asyncio.ensure_future(run_gee(fn, *args))
+        try:
+            if approximate and not await is_cached(fn, *args):
+                statistics = await run_gee(fn, *args, True)
+                if not exact.done():
+                    yield sse_event("approximate", statistics)
+            yield sse_event("exact", await exact)
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield sse_event("error", {"status_code": 500, "detail": str(e)})
+        finally:
+            # A client that disconnects early leaves the exact pass running so
+            # its result still reaches the cache
+            if not exact.done():
+                exact.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    return event_stream(stream())
 
-# Initialize GEE service
-gee_service = GEEService()
 
 @router.get("/ndmi")
 async def get_ndmi_drought_layer(
@@ -22,10 +200,12 @@ async def get_ndmi_drought_layer(
     - **days**: Number of days for composite (default 30)
     """
     try:
+        validate_area(area)
+
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
-        result = gee_service.get_ndmi_layer(area, end_date, days)
+        result = await run_gee(gee_service.get_ndmi_layer, area, end_date, days)
         return {
             "success": True,
             "data": result,
@@ -34,6 +214,8 @@ async def get_ndmi_drought_layer(
             "end_date": end_date,
             "days_composite": days
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -48,10 +230,12 @@ async def get_ndvi_layer(
     Get NDVI (Normalized Difference Vegetation Index) layer
     """
     try:
+        validate_area(area)
+
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
-        result = gee_service.get_ndvi_layer(area, end_date, days)
+        result = await run_gee(gee_service.get_ndvi_layer, area, end_date, days)
         return {
             "success": True,
             "data": result,
@@ -60,6 +244,8 @@ async def get_ndvi_layer(
             "end_date": end_date,
             "days_composite": days
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -74,10 +260,12 @@ async def get_ndwi_layer(
     Get NDWI (Normalized Difference Water Index) layer
     """
     try:
+        validate_area(area)
+
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
-        result = gee_service.get_ndwi_layer(area, end_date, days)
+        result = await run_gee(gee_service.get_ndwi_layer, area, end_date, days)
         return {
             "success": True,
             "data": result,
@@ -86,6 +274,143 @@ async def get_ndwi_layer(
             "end_date": end_date,
             "days_composite": days
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/indices")
+async def get_indices_layer(
+    area: str = Query(..., description="Study area code"),
+    indices: str = Query("ndvi,ndmi,ndwi", description="Comma-separated indices (ndvi, ndmi, ndwi)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    days: int = Query(30, description="Days for composite", ge=1, le=365),
+    cloud_cover: int = Query(100, description="Max cloud cover %", ge=0, le=100)
+):
+    """
+    Get several Sentinel-2 index layers built from one shared median composite
+
+    - **area**: Study area code
+    - **indices**: Any subset of ndvi, ndmi, ndwi (default all three)
+    - **end_date**: End date for analysis (defaults to today)
+    - **days**: Number of days for composite (default 30)
+    - **cloud_cover**: Maximum scene cloud cover percentage (default 100, no filtering)
+
+    Returns one entry per index under `layers`, each with its tile URL,
+    visualization parameters and min/max stats.
+    """
+    try:
+        validate_area(area)
+
+        requested = [i.strip().lower() for i in indices.split(",") if i.strip()]
+        invalid = [i for i in requested if i not in GEEService.SPECTRAL_INDICES]
+        if not requested or invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid indices: {', '.join(invalid) or indices}. "
+                       f"Valid indices: {', '.join(GEEService.SPECTRAL_INDICES)}"
+            )
+        requested = sorted(set(requested))
+
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        result = await run_gee(gee_service.get_indices_layer, area, end_date, days, requested, cloud_cover)
+        return {
+            "success": True,
+            "data": result,
+            "layer_type": "indices",
+            "area": area,
+            "indices": requested,
+            "end_date": end_date,
+            "days_composite": days,
+            "cloud_cover": cloud_cover
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def update_timeseries(area: str, start: date, end: date, cloud_cover: int) -> list:
+    """Compute and store the days of a series not yet in the time-series store"""
+    missing = await asyncio.to_thread(timeseries_store.missing, area, cloud_cover, start, end)
+    if missing:
+        rows = await gee_executor.run(
+            gee_service.get_index_timeseries,
+            area,
+            [(s.isoformat(), e.isoformat()) for s, e in missing],
+            cloud_cover
+        )
+        await asyncio.to_thread(timeseries_store.add, area, cloud_cover, rows, missing)
+    return missing
+
+
+@router.get("/timeseries")
+async def get_index_timeseries(
+    area: str = Query(..., description="Study area code"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD, default 90 days before end)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD, default today)"),
+    indices: str = Query("ndvi,ndmi,ndwi", description="Comma-separated indices (ndvi, ndmi, ndwi)"),
+    cloud_cover: int = Query(100, description="Max cloud cover %", ge=0, le=100)
+):
+    """
+    Daily mean NDVI/NDMI/NDWI over a study area
+
+    One value per acquisition day, averaged over the area. Computed days
+    are stored, so later requests only go to Earth Engine for dates not
+    computed before (e.g. the days since the last call).
+    """
+    try:
+        validate_area(area)
+
+        requested = sorted({index.strip().lower() for index in indices.split(",") if index.strip()})
+        invalid = [index for index in requested if index not in GEEService.SPECTRAL_INDICES]
+        if invalid or not requested:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid indices: {', '.join(invalid) or indices}. Valid: {', '.join(GEEService.SPECTRAL_INDICES)}"
+            )
+
+        try:
+            end = date.fromisoformat(end_date) if end_date else date.today()
+            start = date.fromisoformat(start_date) if start_date else end - timedelta(days=90)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+        if start > end:
+            raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+        if (end - start).days > 1096:
+            raise HTTPException(status_code=400, detail="Date range is limited to 3 years")
+
+        try:
+            computed = await gee_singleflight.do(
+                f"timeseries:{area}:{cloud_cover}:{start}:{end}",
+                lambda: update_timeseries(area, start, end, cloud_cover)
+            )
+        except ExecutorBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=504,
+                detail=f"Earth Engine request timed out after {gee_executor.timeout:.0f}s"
+            )
+
+        rows = await asyncio.to_thread(timeseries_store.query, area, cloud_cover, start, end)
+        return {
+            "success": True,
+            "data": {
+                "series": [{"date": row["date"], **{index: row[index] for index in requested}} for row in rows],
+                "computed_ranges": [[s.isoformat(), e.isoformat()] for s, e in computed]
+            },
+            "area": area,
+            "indices": requested,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "cloud_cover": cloud_cover
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -95,7 +420,8 @@ async def get_burn_scar_layer(
     area: str = Query(..., description="Study area code"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    cloud_cover: int = Query(30, description="Max cloud cover %", ge=0, le=100)
+    cloud_cover: int = Query(30, description="Max cloud cover %", ge=0, le=100),
+    progressive: bool = Query(False, description="Return approximate area statistics first")
 ):
     """
     Get burn scar detection layer using NBR and NIRBI indices
@@ -104,18 +430,30 @@ async def get_burn_scar_layer(
     - **start_date**: Start date for analysis (defaults to 30 days ago)
     - **end_date**: End date for analysis (defaults to today)
     - **cloud_cover**: Maximum cloud cover percentage (default 30%)
+    - **progressive**: Reduce the statistics at 100 m (with `error_km2`) so the
+      layer returns in seconds; the exact 10 m statistics follow from
+      `statistics_url` or `statistics_events_url`
 
     Returns both NBR layer and detected burn scars
     """
     try:
+        validate_area(area)
+
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
         if not start_date:
             start = datetime.now() - timedelta(days=30)
             start_date = start.strftime('%Y-%m-%d')
 
-        result = gee_service.get_burn_scar_layer(area, start_date, end_date, cloud_cover)
-        return {
+        args = (area, start_date, end_date, cloud_cover)
+        if progressive:
+            result = await run_gee_progressive(gee_service.get_burn_scar_layer, *args)
+            if await is_cached(gee_service.get_burn_scar_statistics, *args):
+                statistics = await run_gee(gee_service.get_burn_scar_statistics, *args)
+                result = {**result, 'burn_scars': {**result['burn_scars'], 'statistics': statistics}}
+        else:
+            result = await run_gee(gee_service.get_burn_scar_layer, *args)
+        response = {
             "success": True,
             "data": result,
             "layer_type": "burn_scar",
@@ -124,15 +462,88 @@ async def get_burn_scar_layer(
             "end_date": end_date,
             "cloud_cover": cloud_cover
         }
+        if result['burn_scars']['statistics'].get('approximate'):
+            query = urlencode({"area": area, "start_date": start_date, "end_date": end_date, "cloud_cover": cloud_cover})
+            response["statistics_url"] = f"/gee/burn-scar/statistics?{query}"
+            response["statistics_events_url"] = f"/gee/burn-scar/statistics/events?{query}&approximate=false"
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/burn-scar/statistics")
+async def get_burn_scar_statistics(
+    area: str = Query(..., description="Study area code"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cloud_cover: int = Query(30, description="Max cloud cover %", ge=0, le=100),
+    approximate: bool = Query(False, description="Coarse 100 m estimate instead of exact 10 m")
+):
+    """
+    Get burn scar area statistics without map tiles
+
+    Same parameters and defaults as `/gee/burn-scar`; the exact statistics
+    are the ones of the full layer.
+    """
+    try:
+        validate_area(area)
+
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if not start_date:
+            start = datetime.now() - timedelta(days=30)
+            start_date = start.strftime('%Y-%m-%d')
+
+        args = (area, start_date, end_date, cloud_cover) + ((True,) if approximate else ())
+        result = await run_gee(gee_service.get_burn_scar_statistics, *args)
+        return {
+            "success": True,
+            "data": result,
+            "area": area,
+            "start_date": start_date,
+            "end_date": end_date,
+            "cloud_cover": cloud_cover
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/burn-scar/statistics/events")
+async def stream_burn_scar_statistics(
+    area: str = Query(..., description="Study area code"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cloud_cover: int = Query(30, description="Max cloud cover %", ge=0, le=100),
+    approximate: bool = Query(True, description="Send the coarse estimate before the exact statistics")
+):
+    """
+    Server-Sent Events of burn scar statistics: `approximate`, then `exact`
+    """
+    validate_area(area)
+
+    if not end_date:
+        end_date = datetime.now().strftime('%Y-%m-%d')
+    if not start_date:
+        start = datetime.now() - timedelta(days=30)
+        start_date = start.strftime('%Y-%m-%d')
+
+    return statistics_events(
+        gee_service.get_burn_scar_statistics, area, start_date, end_date, cloud_cover,
+        approximate=approximate
+    )
+
+
 @router.get("/biomass")
 async def get_biomass_layer(
     area: str = Query(..., description="Study area code"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    days: int = Query(30, description="Days for composite", ge=1, le=365)
+    days: int = Query(30, description="Days for composite", ge=1, le=365),
+    dsr_start_date: Optional[str] = Query(None, description="Solar radiation window start (YYYY-MM-DD)"),
+    dsr_end_date: Optional[str] = Query(None, description="Solar radiation window end (YYYY-MM-DD)")
 ):
     """
     Get 3PGs biomass estimation layers
@@ -140,6 +551,10 @@ async def get_biomass_layer(
     - **area**: Study area code
     - **end_date**: End date for analysis (defaults to today)
     - **days**: Number of days for composite (default 30)
+    - **dsr_start_date**, **dsr_end_date**: Season of the MODIS solar
+      radiation median, both or neither (defaults to the 2023-11-01 to
+      2024-03-30 dry season, see `BIOMASS_DSR_START`/`BIOMASS_DSR_END`); a
+      window without MCD18A1 images yet falls back to that season
 
     Returns:
     - NDVI layer
@@ -147,18 +562,32 @@ async def get_biomass_layer(
     - Biomass Equation layer (Parinwat & Sakda equation)
     """
     try:
+        validate_area(area)
+
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
-        result = gee_service.get_biomass_layer(area, end_date, days)
+        if bool(dsr_start_date) != bool(dsr_end_date):
+            raise HTTPException(status_code=400, detail="Give both dsr_start_date and dsr_end_date, or neither")
+
+        args = (area, end_date, days)
+        if dsr_start_date:
+            args += (dsr_start_date, dsr_end_date)
+        else:
+            dsr_start_date, dsr_end_date = gee_service.DSR_SEASON
+        result = await run_gee(gee_service.get_biomass_layer, *args)
         return {
             "success": True,
             "data": result,
             "layer_type": "biomass",
             "area": area,
             "end_date": end_date,
-            "days_composite": days
+            "days_composite": days,
+            "dsr_start_date": dsr_start_date,
+            "dsr_end_date": dsr_end_date
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -167,7 +596,8 @@ async def get_biomass_layer(
 async def get_flood_layer(
     area: str = Query(..., description="Study area code"),
     before_date: str = Query(..., description="Before flood date (YYYY-MM-DD)"),
-    after_date: str = Query(..., description="After flood date (YYYY-MM-DD)")
+    after_date: str = Query(..., description="After flood date (YYYY-MM-DD)"),
+    progressive: bool = Query(False, description="Return an approximate flooded area first")
 ):
     """
     Get flood detection layer using Sentinel-1 SAR data
@@ -175,6 +605,9 @@ async def get_flood_layer(
     - **area**: Study area code
     - **before_date**: Date before flood event (YYYY-MM-DD)
     - **after_date**: Date after flood event (YYYY-MM-DD)
+    - **progressive**: Reduce the flooded area at 100 m (with
+      `flood_area_error`) so the layer returns in seconds; the exact 10 m
+      area follows from `statistics_url` or `statistics_events_url`
 
     Returns:
     - Flooded area visualization (blue)
@@ -182,8 +615,19 @@ async def get_flood_layer(
     - Detection confidence
     """
     try:
-        result = gee_service.get_flood_layer(area, before_date, after_date)
-        return {
+        validate_area(area)
+
+        if progressive:
+            result = await run_gee_progressive(gee_service.get_flood_layer, area, before_date, after_date)
+            if await is_cached(gee_service.get_flood_statistics, area, before_date, after_date):
+                statistics = await run_gee(gee_service.get_flood_statistics, area, before_date, after_date)
+                result = {
+                    **{k: v for k, v in result.items() if k not in ('flood_area_error', 'scale')},
+                    **statistics
+                }
+        else:
+            result = await run_gee(gee_service.get_flood_layer, area, before_date, after_date)
+        response = {
             "success": True,
             "data": result,
             "layer_type": "flood",
@@ -191,23 +635,299 @@ async def get_flood_layer(
             "before_date": before_date,
             "after_date": after_date
         }
+        if result.get('approximate'):
+            query = urlencode({"area": area, "before_date": before_date, "after_date": after_date})
+            response["statistics_url"] = f"/gee/flood/statistics?{query}"
+            response["statistics_events_url"] = f"/gee/flood/statistics/events?{query}&approximate=false"
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/flood/statistics")
+async def get_flood_statistics(
+    area: str = Query(..., description="Study area code"),
+    before_date: str = Query(..., description="Before flood date (YYYY-MM-DD)"),
+    after_date: str = Query(..., description="After flood date (YYYY-MM-DD)"),
+    approximate: bool = Query(False, description="Coarse 100 m estimate instead of exact 10 m")
+):
+    """
+    Get the flooded area in km² without map tiles
+    """
+    try:
+        validate_area(area)
+
+        args = (area, before_date, after_date) + ((True,) if approximate else ())
+        result = await run_gee(gee_service.get_flood_statistics, *args)
+        return {
+            "success": True,
+            "data": result,
+            "area": area,
+            "before_date": before_date,
+            "after_date": after_date
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/flood/statistics/events")
+async def stream_flood_statistics(
+    area: str = Query(..., description="Study area code"),
+    before_date: str = Query(..., description="Before flood date (YYYY-MM-DD)"),
+    after_date: str = Query(..., description="After flood date (YYYY-MM-DD)"),
+    approximate: bool = Query(True, description="Send the coarse estimate before the exact area")
+):
+    """
+    Server-Sent Events of the flooded area: `approximate`, then `exact`
+    """
+    validate_area(area)
+    return statistics_events(
+        gee_service.get_flood_statistics, area, before_date, after_date,
+        approximate=approximate
+    )
+
+
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any]
+
+
+def job_response(job: Dict) -> Dict:
+    job = {k: v for k, v in job.items() if k not in ("key", "owner")}
+    job["events_url"] = f"/gee/jobs/{job['id']}/events"
+    job["result_url"] = f"/gee/jobs/{job['id']}/result"
+    return job
+
+
+@router.post("/jobs")
+async def submit_job(request: JobRequest):
+    """
+    Submit a long-running analysis
+
+    - **kind**: `flood` (params: area, before_date, after_date) or
+      `burn_scar` (params: area, start_date, end_date, cloud_cover)
+
+    Returns the job at once; follow it at `events_url` (Server-Sent
+    Events) or by polling `/gee/jobs/{id}`, then fetch `result_url`.
+    Submitting the same parameters again returns the existing job.
+    """
+    try:
+        validate_area(str(request.params.get("area")))
+        job = await gee_jobs.submit(request.kind, request.params)
+        return {"success": True, "data": job_response(job)}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/jobs")
+async def list_jobs(limit: int = Query(50, ge=1, le=500)):
+    """
+    Most recent analysis jobs
+    """
+    jobs = await asyncio.to_thread(gee_jobs.store.list, limit)
+    return {"success": True, "data": [job_response(job) for job in jobs]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of an analysis job
+    """
+    job = await asyncio.to_thread(gee_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"success": True, "data": job_response(job)}
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Result of a succeeded analysis job, shaped like the synchronous endpoint's `data`
+    """
+    job = await asyncio.to_thread(gee_jobs.get, job_id, True)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    result = job["result"]
+    if tile_store is not None:
+        method, args = gee_jobs.resolve(job["kind"], job["params"])
+        result = await asyncio.to_thread(add_proxy_tile_urls, method, list(args), result)
+    return {"success": True, "data": result}
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events stream of a job's status until it finishes
+    """
+    if await asyncio.to_thread(gee_jobs.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    async def stream():
+        async for job in gee_jobs.events(job_id):
+            yield sse_event("status", job_response(job))
+
+    return event_stream(stream())
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job
+    """
+    job = await gee_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"success": True, "data": job_response(job)}
+
+
 @router.get("/study-areas")
-async def get_study_areas():
+async def get_study_areas(
+    include_geometry: bool = Query(False, description="Include simplified area geometries")
+):
+    """
+    Get list of available study areas with their names and bounds
+    """
+    return {
+        "success": True,
+        "data": study_area_registry.summary(include_geometry=include_geometry),
+        "refreshed_at": study_area_registry.refreshed_at
+    }
+
+
+async def fetch_tile(layer_key: str, method: str, args: list, path: list, z: int, x: int, y: int):
+    """
+    Fetch a tile from Earth Engine and store it
+
+    An upstream 4xx usually means the map ID behind `tile_url` expired;
+    the cached layer is then dropped, recomputed for a fresh map ID and
+    the tile requested once more.
+    """
+    fn = getattr(gee_service, method)
+    client = get_http_client()
+    for attempt in range(2):
+        result = await run_gee(fn, *args)
+        url = resolve_path(result, path)["tile_url"]
+        with timed("tile"):
+            response = await client.get(
+                url.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y))
+            )
+        if response.status_code == 200:
+            content_type = response.headers.get("content-type", "image/png")
+            await asyncio.to_thread(tile_store.put_tile, layer_key, z, x, y, response.content, content_type)
+            return response.content, content_type
+        if 400 <= response.status_code < 500 and attempt == 0:
+            await asyncio.to_thread(layer_cache.delete, layer_cache.make_key(method, *args))
+            continue
+        raise HTTPException(
+            status_code=502,
+            detail=f"Earth Engine tile request failed with status {response.status_code}"
+        )
+
+
+@tile_router.get("/tiles/{layer_key}/{z}/{x}/{y}")
+async def get_gee_tile(layer_key: str, z: int, x: int, y: int):
     """
-    Get list of available study areas
+    Earth Engine map tile through the local tile cache
+
+    Use the `proxy_tile_url` returned with each layer. Tiles are fetched
+    from Earth Engine once, then served from the local MBTiles store;
+    expired map IDs are re-issued transparently. Stored tiles are served
+    even while Earth Engine is starting or unreachable.
+    """
+    try:
+        if tile_store is None:
+            raise HTTPException(status_code=404, detail="Tile proxy is disabled")
+        if not 0 <= z <= 24 or not 0 <= x < (1 << z) or not 0 <= y < (1 << z):
+            raise HTTPException(status_code=400, detail="Tile coordinates out of range")
+
+        headers = {"Cache-Control": "public, max-age=86400"}
+        cached = await asyncio.to_thread(tile_store.get_tile, layer_key, z, x, y)
+        if cached is not None:
+            return Response(content=cached[0], media_type=cached[1], headers=headers)
+
+        layer = await asyncio.to_thread(tile_store.get_layer, layer_key)
+        if layer is None or not hasattr(gee_service, layer[0]):
+            raise HTTPException(status_code=404, detail=f"Unknown tile layer: {layer_key}")
+        method, args, path = layer
+        await require_earth_engine()
+
+        data, content_type = await tile_singleflight.do(
+            f"{layer_key}/{z}/{x}/{y}",
+            lambda: fetch_tile(layer_key, method, args, path, z, x, y)
+        )
+        return Response(content=data, media_type=content_type, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def get_gee_stats():
+    """
+    Get Earth Engine executor, layer cache and request coalescing statistics
     """
     return {
         "success": True,
         "data": {
-            "ud": {"name": "Pak Thap, Uttaradit", "name_th": "ปากทับ อุตรดิตถ์"},
-            "mt": {"name": "Mae Tha, Chiang Mai", "name_th": "แม่ทาเหนือ เชียงใหม่"},
-            "ky": {"name": "Khun Yuam, Mae Hong Son", "name_th": "ขุนยวม แม่ฮ่องสอน"},
-            "vs": {"name": "Wiang Sa, Nan", "name_th": "เวียงสา น่าน"},
-            "ms": {"name": "Mae Sariang, Mae Hong Son", "name_th": "แม่สะเรียง แม่ฮ่องสอน"},
-            "st": {"name": "Sob Tia, Chiang Mai", "name_th": "สบเตี๊ยะ เชียงใหม่"}
+            "executor": gee_executor.stats(),
+            "cache": await asyncio.to_thread(layer_cache.stats),
+            "singleflight": gee_singleflight.stats(),
+            "tiles": tile_store.stats() if tile_store is not None else None,
+            "jobs": gee_jobs.stats()
         }
     }
+
+
+@router.get("/warmup")
+async def get_warmup_status():
+    """
+    Warm-up schedule and the report of the last run
+    """
+    return {"success": True, "data": gee_warmup.status()}
+
+
+@router.post("/warmup", dependencies=[Depends(require_admin)])
+async def start_warmup(
+    areas: Optional[str] = Query(None, description="Comma-separated study area codes (default: all)"),
+    layers: Optional[str] = Query(None, description="Comma-separated layers: ndmi, ndvi, ndwi, burn_scar, biomass"),
+    force: bool = Query(False, description="Recompute layers that are still cached")
+):
+    """
+    Start a warm-up run in the background (requires the admin token)
+
+    Poll GET /gee/warmup for its report.
+    """
+    area_list = areas.split(",") if areas else None
+    for area in area_list or []:
+        validate_area(area)
+
+    try:
+        gee_warmup.trigger(areas=area_list, layers=layers.split(",") if layers else None, force=force)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"success": True, "data": {"started": True}}
+
+
+@router.delete("/cache", dependencies=[Depends(require_admin)])
+async def clear_gee_cache():
+    """
+    Drop every cached GEE layer response (requires the admin token)
+    """
+    await asyncio.to_thread(layer_cache.clear)
+    return {"success": True}
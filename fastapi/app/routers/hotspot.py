@@ -1,87 +1,345 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
-import os
-import json
-import httpx
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import gzip
+import numpy as np
+from app.services.content_encoding import negotiate
+from app.services.firms_ingest import firms_ingester, firms_store
+from app.services.firms_proxy import FirmsUnavailableError, firms_proxy
+from app.services.firms_store import confidence_to_pct
+from app.services.hexagon_store import hexagon_store
 
 router = APIRouter()
 
-# Base path for geojson data (files are in fastapi root)
-HPPREDICT_PATH = "/app"
-
 @router.get("/hexagon-predictions")
-async def get_hexagon_predictions():
+async def get_hexagon_predictions(
+    request: Request,
+    format: str = Query("geojson", description="geojson or topojson"),
+    precision: Optional[int] = Query(None, ge=0, le=15, description="Coordinate decimals to keep")
+):
     """
     Get hexagon forest predictions GeoJSON data
+
+    Every feature carries one `pred_YYYY_MM` property per prediction month.
+    `format=topojson` returns the grid as a quantized topology (object
+    `hexagons`) with shared edges stored once; `precision` rounds
+    coordinates to that many decimals (topojson defaults to 6).
+    The body is precompressed (brotli/gzip) and tagged with an ETag, so
+    unchanged data is answered with 304 Not Modified.
     """
     try:
-        geojson_path = os.path.join(HPPREDICT_PATH, "hex_forest_pro_4326_predict.geojson")
-
-        if not os.path.exists(geojson_path):
+        if format not in ("geojson", "topojson"):
+            raise HTTPException(status_code=400, detail="format must be geojson or topojson")
+        if not hexagon_store.exists():
             raise HTTPException(status_code=404, detail="Hexagon predictions file not found")
 
-        return FileResponse(
-            geojson_path,
+        payload = await asyncio.to_thread(hexagon_store.get)
+        etag = payload.etag
+        if format != "geojson" or precision is not None:
+            etag = f'"{payload.etag.strip(chr(34))}-{format}-{precision}"'
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+            "Content-Disposition": "inline"
+        }
+
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        encoded = await asyncio.to_thread(payload.variant, format, precision)
+        encoding = payload.negotiate(request.headers.get("accept-encoding", ""))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        return Response(
+            content=encoded[encoding],
             media_type="application/json",
-            headers={"Content-Disposition": "inline"}
+            headers=headers
         )
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/hexagon-predictions/values")
+async def get_hexagon_values(
+    request: Request,
+    months: Optional[str] = Query(None, description="Comma-separated months (YYYY-MM); all months when omitted"),
+    format: str = Query("json", description="json or binary")
+):
+    """
+    Prediction counts only, for one or more months, in columnar form
+
+    Returns hexagon ids plus one value column per month, so clients can
+    keep the geometry from /hexagon-predictions and swap values when the
+    month changes. `format=binary` returns little-endian typed arrays:
+    "HXV1", a uint32 header length, a JSON header padded to 4 bytes,
+    int32 ids, then one float32 column per month (NaN = no value).
+    """
+    try:
+        if format not in ("json", "binary"):
+            raise HTTPException(status_code=400, detail="format must be json or binary")
+        if not hexagon_store.exists():
+            raise HTTPException(status_code=404, detail="Hexagon predictions file not found")
+
+        payload = await asyncio.to_thread(hexagon_store.get)
+        values = await asyncio.to_thread(lambda: payload.values)
+        try:
+            selected = values.resolve(months.split(",") if months else None)
+        except KeyError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No predictions for month {e.args[0]}. Available: {', '.join(values.months)}"
+            )
+
+        etag = f'"{payload.etag.strip(chr(34))}-{format}-{",".join(selected)}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        encoded = await asyncio.to_thread(values.encode, selected, format)
+        encoding = negotiate(request.headers.get("accept-encoding", ""), ("gzip",))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        media_type = "application/octet-stream" if format == "binary" else "application/json"
+        return Response(content=encoded[encoding], media_type=media_type, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/hexagon-predictions/tiles/{z}/{x}/{y}.pbf")
+async def get_hexagon_tile(z: int, x: int, y: int, request: Request):
+    """
+    Hexagon predictions as a Mapbox Vector Tile
+
+    Hexagons are clipped to the tile and simplified for the zoom level.
+    Each feature keeps its scalar attributes, including the `pred_YYYY_MM`
+    columns, in the `hexagons` layer.
+    """
+    try:
+        if not 0 <= z <= 22 or not 0 <= x < (1 << z) or not 0 <= y < (1 << z):
+            raise HTTPException(status_code=400, detail="Tile coordinates out of range")
+        if not hexagon_store.exists():
+            raise HTTPException(status_code=404, detail="Hexagon predictions file not found")
+
+        payload = await asyncio.to_thread(hexagon_store.get)
+        data = await asyncio.to_thread(payload.tiler.tile, z, x, y)
+
+        etag = f'"{payload.etag.strip(chr(34))}-{z}-{x}-{y}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        if data and negotiate(request.headers.get("accept-encoding", ""), ("gzip",)) == "gzip":
+            headers["Content-Encoding"] = "gzip"
+        elif data:
+            data = gzip.decompress(data)
+
+        return Response(content=data, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def parse_bbox(bbox: Optional[str]) -> Optional[List[float]]:
+    """Parse a "minLon,minLat,maxLon,maxLat" bounding box"""
+    if not bbox:
+        return None
+    try:
+        values = [float(v) for v in bbox.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+        raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
+    return values
+
+
+def parse_since(since: Optional[str]) -> datetime:
+    """Parse an ISO date/datetime, defaulting to 24 hours ago"""
+    if not since:
+        return datetime.now(timezone.utc) - timedelta(hours=24)
+    try:
+        parsed = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be an ISO date or datetime")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def live_points(features: List[dict], since: datetime, confidence: Optional[int]) -> List[List[float]]:
+    """
+    Coordinates of live FIRMS detections matching the filters
+
+    Compares acquisition times as "YYYY-MM-DD HHMM" strings instead of
+    building a full row per detection, which keeps large feeds cheap.
+    """
+    since_key = since.astimezone(timezone.utc).strftime("%Y-%m-%d %H%M")
+    points = []
+    for feature in features:
+        properties = feature.get("properties") or {}
+        coordinates = (feature.get("geometry") or {}).get("coordinates") or [None, None]
+        longitude = properties.get("longitude", coordinates[0])
+        latitude = properties.get("latitude", coordinates[1])
+        acq_date = properties.get("acq_date")
+        acq_time = properties.get("acq_time")
+        if longitude is None or latitude is None or not acq_date or acq_time is None:
+            continue
+        acq_time = str(acq_time).split(".")[0].replace(":", "").zfill(4)[-4:]
+        if f"{acq_date} {acq_time}" < since_key:
+            continue
+        if confidence is not None:
+            pct = confidence_to_pct(properties.get("confidence"))
+            if pct is None or pct < confidence:
+                continue
+        points.append([float(longitude), float(latitude)])
+    return points
+
+
 @router.get("/firms-hotspots")
-async def get_firms_hotspots(area: str = "SouthEast_Asia"):
+async def get_firms_hotspots(
+    request: Request,
+    area: str = "SouthEast_Asia",
+    bbox: Optional[str] = Query(None, description="minLon,minLat,maxLon,maxLat"),
+    since: Optional[str] = Query(None, description="Only detections acquired since this ISO date/datetime (default: last 24 hours)"),
+    confidence: Optional[int] = Query(None, description="Minimum confidence (0-100)", ge=0, le=100),
+    limit: int = Query(10000, description="Maximum number of detections", ge=1, le=100000)
+):
     """
-    Proxy endpoint to fetch FIRMS thermal anomalies
+    FIRMS thermal anomalies as GeoJSON
+
+    Served from the local PostGIS store kept up to date by the background
+    FIRMS poller. Falls back to the cached live FIRMS feed when the store is
+    not configured or not yet populated; the same filters, defaults and
+    de-duplication apply either way. Without bbox, since or confidence, the
+    live response is served precompressed from the cache with an ETag.
     """
     try:
-        # FIRMS WFS GeoJSON endpoint for Southeast Asia (24 hours)
-        firms_url = "https://firms.modaps.eosdis.nasa.gov/mapserver/wfs/SouthEast_Asia/7a16aa667fe01b181ffebcf83c022e34/?SERVICE=WFS&REQUEST=GetFeature&VERSION=2.0.0&TYPENAME=ms:fires_modis_24hrs&STARTINDEX=0&COUNT=1000&SRSNAME=urn:ogc:def:crs:EPSG::4326&BBOX=-90,-180,90,180,urn:ogc:def:crs:EPSG::4326&outputformat=geojson"
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(firms_url)
-
-            if response.status_code != 200:
-                # Fallback to MODIS API
-                firms_fallback_url = "https://firms.modaps.eosdis.nasa.gov/api/country/json/7a16aa667fe01b181ffebcf83c022e34/MODIS_NRT/THA/1"
-                fallback_response = await client.get(firms_fallback_url)
-
-                if fallback_response.status_code == 200:
-                    data = fallback_response.json()
-
-                    # Convert to GeoJSON
-                    geojson_data = {
-                        "type": "FeatureCollection",
-                        "features": [
-                            {
-                                "type": "Feature",
-                                "geometry": {
-                                    "type": "Point",
-                                    "coordinates": [float(hotspot["longitude"]), float(hotspot["latitude"])]
-                                },
-                                "properties": {
-                                    "confidence": hotspot.get("confidence"),
-                                    "bright_ti4": hotspot.get("bright_ti4"),
-                                    "bright_ti5": hotspot.get("bright_ti5"),
-                                    "scan": hotspot.get("scan"),
-                                    "track": hotspot.get("track"),
-                                    "acq_date": hotspot.get("acq_date"),
-                                    "acq_time": hotspot.get("acq_time"),
-                                    "satellite": hotspot.get("satellite"),
-                                    "instrument": hotspot.get("instrument"),
-                                    "version": hotspot.get("version")
-                                }
-                            }
-                            for hotspot in data
-                        ]
-                    }
-
-                    return JSONResponse(content=geojson_data)
-                else:
-                    raise HTTPException(status_code=500, detail="Failed to fetch FIRMS data from both sources")
-
-            return JSONResponse(content=response.json())
+        bbox_values = parse_bbox(bbox)
+        since_value = parse_since(since)
+
+        if firms_ingester is not None and firms_ingester.ready:
+            try:
+                content = await asyncio.to_thread(
+                    firms_store.query_geojson, since_value, bbox_values, confidence, limit
+                )
+                return Response(content=content, media_type="application/json")
+            except Exception as e:
+                print(f"✗ FIRMS store query failed, fetching live: {e}")
+
+        try:
+            feed = await firms_proxy.get()
+        except FirmsUnavailableError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+
+        if bbox is None and since is None and confidence is None:
+            encoded, etag = await asyncio.to_thread(feed.default_view, limit)
+            headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers=headers)
+            available = [coding for coding in ("br", "gzip") if coding in encoded]
+            encoding = negotiate(request.headers.get("accept-encoding", ""), available)
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            return Response(content=encoded[encoding], media_type="application/json", headers=headers)
+
+        geojson_data = await asyncio.to_thread(feed.select, since_value, bbox_values, confidence, limit)
+        return JSONResponse(content=geojson_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching FIRMS data: {str(e)}")
+
+
+@router.get("/hex-counts")
+async def get_hex_counts(
+    since: Optional[str] = Query(None, description="Only detections acquired since this ISO date/datetime (default: last 24 hours)"),
+    confidence: Optional[int] = Query(None, description="Minimum confidence (0-100)", ge=0, le=100),
+    include_empty: bool = Query(False, description="Also list hexagons without detections")
+):
+    """
+    Number of FIRMS detections in each hexagon of the forest grid
+
+    Points are projected to UTM 47N and assigned to hexagons by grid
+    arithmetic on `col_index`/`row_index`, in one vectorized pass.
+    """
+    try:
+        since_value = parse_since(since)
+        if not hexagon_store.exists():
+            raise HTTPException(status_code=404, detail="Hexagon predictions file not found")
+
+        points = None
+        source = "store"
+        if firms_ingester is not None and firms_ingester.ready:
+            try:
+                points = await asyncio.to_thread(firms_store.query_points, since_value, None, confidence)
+            except Exception as e:
+                print(f"✗ FIRMS store query failed, fetching live: {e}")
+
+        if points is None:
+            source = "live"
+            try:
+                feed = await firms_proxy.get()
+            except FirmsUnavailableError as e:
+                raise HTTPException(status_code=502, detail=str(e))
+            points = await asyncio.to_thread(live_points, feed.features, since_value, confidence)
+
+        payload = await asyncio.to_thread(hexagon_store.get)
+
+        def count():
+            grid = payload.grid
+            coordinates = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            return grid.bin(coordinates[:, 0], coordinates[:, 1])
+
+        counts, binned = await asyncio.to_thread(count)
+
+        hexagons = []
+        for index in (range(len(counts)) if include_empty else np.flatnonzero(counts)):
+            properties = payload.features[index].get("properties") or {}
+            hexagons.append({
+                "id": properties.get("id", int(index)),
+                "row_index": properties.get("row_index"),
+                "col_index": properties.get("col_index"),
+                "count": int(counts[index])
+            })
+
+        return {
+            "success": True,
+            "data": {
+                "source": source,
+                "since": since_value.isoformat(),
+                "total_points": len(points),
+                "binned_points": binned,
+                "hexagons": hexagons
+            }
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/firms-status")
+async def get_firms_status():
+    """
+    Status of the background FIRMS ingest
+    """
+    return {
+        "success": True,
+        "data": {
+            "enabled": firms_ingester is not None,
+            **(firms_ingester.status() if firms_ingester is not None else {}),
+            "proxy_cache": firms_proxy.stats()
+        }
+    }
@@ -0,0 +1,53 @@
+"""
+One process for background work
+
+Under gunicorn every worker process runs the app lifespan, but the FIRMS
+poller, the warm-up schedule and job recovery should run once per server.
+Workers race for an exclusive lock on a file; the winner holds it for its
+lifetime and the others skip that work. The lock is released when the
+process exits, so the worker that replaces a recycled one takes over.
+"""
+import fcntl
+import os
+from typing import IO, Optional
+
+
+class BackgroundLock:
+    """Non-blocking exclusive ``flock`` held for the life of the process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO] = None
+
+    @classmethod
+    def from_env(cls) -> "BackgroundLock":
+        return cls(os.getenv("BACKGROUND_LOCK_PATH", os.path.join("cache", "background.lock")))
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if no other process holds it; True if this process holds it"""
+        if self._file is not None:
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+background_lock = BackgroundLock.from_env()
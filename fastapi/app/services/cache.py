@@ -0,0 +1,302 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk cache store so computed layers survive restarts
+
+    Reads do not write: the access times used for LRU eviction are kept in
+    memory and written in one batch every ``touch_interval`` seconds or
+    before the next eviction.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, touch_interval: float = 60):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS layer_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_layer_cache_accessed ON layer_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """New connection for a worker process forked after the store was opened"""
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM layer_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM layer_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            if time.monotonic() - self._flushed_at >= self.touch_interval:
+                self._flush_touched()
+        return json.loads(row[0]), row[1]
+
+    def _flush_touched(self):
+        """Write the pending access times (lock held)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE layer_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()]
+            )
+            self._conn.commit()
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def set(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO layer_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, time.time())
+            )
+            # Drop expired rows, then the least recently used beyond the bound
+            self._conn.execute("DELETE FROM layer_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM layer_cache WHERE key IN ("
+                " SELECT key FROM layer_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM layer_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM layer_cache")
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM layer_cache").fetchone()[0]
+
+
+class LayerCache:
+    """
+    TTL + LRU cache for GEE layer responses
+
+    Entries are keyed on the layer method and its normalized parameters.
+    The in-memory store is bounded by ``max_entries``; an optional
+    ``SQLiteCacheBackend`` acts as a second level that survives restarts.
+    Coroutines use ``aget``/``aset``/``aexpires_at``, which reach the disk
+    level from a worker thread instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 4 * 3600,
+        max_entries: int = 256,
+        backend: Optional[SQLiteCacheBackend] = None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "LayerCache":
+        """Build a cache configured from environment variables"""
+        backend = None
+        disk_path = os.getenv('GEE_CACHE_PATH')
+        if disk_path:
+            backend = SQLiteCacheBackend(
+                disk_path,
+                max_entries=int(os.getenv('GEE_CACHE_DISK_MAX_ENTRIES', '5000')),
+                touch_interval=float(os.getenv('GEE_CACHE_DISK_TOUCH_INTERVAL', '60'))
+            )
+        return cls(
+            # Earth Engine map IDs (and so the tile URLs) expire after a few hours
+            ttl=float(os.getenv('GEE_CACHE_TTL', str(4 * 3600))),
+            max_entries=int(os.getenv('GEE_CACHE_MAX_ENTRIES', '256')),
+            backend=backend
+        )
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            value = value.strip().lower()
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+            except ValueError:
+                return value
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sorted(LayerCache._normalize(v) for v in value)
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def make_key(self, name: str, *args) -> str:
+        """Build a cache key from a layer name and its parameters"""
+        return json.dumps([name] + [self._normalize(a) for a in args], separators=(',', ':'))
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+        return None
+
+    def _disk_result(self, key: str, stored: Optional[Tuple[Any, float]]) -> Optional[Any]:
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            value, expires_at = stored
+            self.disk_hits += 1
+            self._store(key, value, expires_at)
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None when missing or expired"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._disk_result(key, self.backend.get(key) if self.backend is not None else None)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """``get`` for coroutines: the disk level is read in a worker thread"""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        stored = await asyncio.to_thread(self.backend.get, key) if self.backend is not None else None
+        return self._disk_result(key, stored)
+
+    def _memory_expires_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[1]
+        return None
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """Expiry timestamp of a live entry without touching the counters"""
+        expires_at = self._memory_expires_at(key)
+        if expires_at is None and self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not None:
+                return stored[1]
+        return expires_at
+
+    async def aexpires_at(self, key: str) -> Optional[float]:
+        """``expires_at`` for coroutines"""
+        expires_at = self._memory_expires_at(key)
+        if expires_at is None and self.backend is not None:
+            return await asyncio.to_thread(self.expires_at, key)
+        return expires_at
+
+    def _store(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value for ``ttl`` seconds (defaults to the cache TTL)"""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.backend is not None:
+            self.backend.set(key, value, expires_at)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """``set`` for coroutines: the disk level is written in a worker thread"""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.backend is not None:
+            await asyncio.to_thread(self.backend.set, key, value, expires_at)
+
+    def delete(self, key: str):
+        """Remove a single entry from both levels"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        """Remove every entry from both levels"""
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key`` or await ``compute()`` and cache it"""
+        value = await self.aget(key)
+        if value is not None:
+            return value
+        value = await compute()
+        await self.aset(key, value)
+        return value
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                'ttl_seconds': self.ttl,
+                'max_entries': self.max_entries,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+        if self.backend is not None:
+            stats['disk_path'] = self.backend.path
+            stats['disk_entries'] = self.backend.size()
+        return stats
+
+
+# Shared cache for GEE layer responses in this process
+layer_cache = LayerCache.from_env()
@@ -0,0 +1,63 @@
+"""
+Closing keep-alive connections before a worker is recycled
+
+Gunicorn replaces a worker after ``max_requests`` requests. The worker
+then closes its idle keep-alive connections, and a client that sends its
+next request on one of them at that moment gets a connection reset. For
+its last ``margin`` requests before the limit, a worker answers with
+``Connection: close``, so clients open fresh connections (to any worker)
+instead of reusing ones about to be dropped.
+"""
+import os
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+
+class ConnectionDrain:
+    """Request count of this worker process against its recycling limit"""
+
+    def __init__(self, margin: int = 100):
+        self.margin = margin
+        self.max_requests: Optional[int] = None
+        self.served = 0
+
+    @classmethod
+    def from_env(cls) -> "ConnectionDrain":
+        return cls(int(os.getenv("GUNICORN_DRAIN_REQUESTS", "100")))
+
+    def configure(self, max_requests: Optional[int]):
+        """Limit of this worker (gunicorn's ``worker.max_requests``, jitter included)"""
+        self.max_requests = max_requests or None
+
+    @property
+    def draining(self) -> bool:
+        return self.max_requests is not None and self.served >= self.max_requests - self.margin
+
+
+connection_drain = ConnectionDrain.from_env()
+
+
+class ConnectionDrainMiddleware:
+    """Add ``Connection: close`` to responses once the worker is close to its recycling limit"""
+
+    def __init__(self, app, drain: ConnectionDrain = connection_drain):
+        self.app = app
+        self.drain = drain
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self.drain.served += 1
+        if not self.drain.draining:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_closing(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["Connection"] = "close"
+            await send(message)
+
+        await self.app(scope, receive, send_closing)
@@ -0,0 +1,52 @@
+"""
+Accept-Encoding negotiation
+
+One parser for every route that serves precompressed bodies. Codings are
+weighed by their ``q`` value (RFC 9110, section 12.5.3): ``q=0`` in any
+spelling (``q=0.0``, ``q=0.000``) refuses a coding, ``*`` stands for every
+coding the header does not name, and identity is always acceptable unless
+the client prefers it outright.
+"""
+from typing import Dict, Iterable
+
+
+def accepted_codings(accept_encoding: str) -> Dict[str, float]:
+    """Weight of each coding named in an Accept-Encoding header (a malformed ``q`` refuses it)"""
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value.strip()), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> str:
+    """
+    Coding to send a body in, or "identity"
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header
+        available: Codings the body exists in, most preferred first; ties
+            in ``q`` go to the earlier one
+    """
+    weights = accepted_codings(accept_encoding)
+    best, best_q = "identity", 0.0
+    for coding in available:
+        if coding == "identity":
+            continue
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    if weights.get("identity", 0.0) > best_q:
+        return "identity"
+    return best
@@ -0,0 +1,181 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.services.metrics import request_timing
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the executor queue is full and cannot accept more work"""
+
+
+class _Slot:
+    """Queue slot of one call; whichever of start and abandon comes first wins"""
+
+    __slots__ = ("started", "abandoned")
+
+    def __init__(self):
+        self.started = False
+        self.abandoned = False
+
+
+class GEEExecutor:
+    """
+    Bounded thread pool for blocking Earth Engine calls
+
+    Every ``getInfo()``/``getMapId()`` round-trip blocks its thread, so the
+    calls run on a dedicated pool instead of the event loop. ``max_workers``
+    caps how many Earth Engine requests run at the same time and
+    ``max_queue`` caps how many may wait for a free worker; anything beyond
+    that is rejected with ``ExecutorBusyError``.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        max_queue: int = 64,
+        timeout: float = 120.0
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="gee-worker"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    @classmethod
+    def from_env(cls) -> "GEEExecutor":
+        """Build an executor configured from environment variables"""
+        return cls(
+            max_workers=int(os.getenv('GEE_MAX_WORKERS', '8')),
+            max_queue=int(os.getenv('GEE_MAX_QUEUE', '64')),
+            timeout=float(os.getenv('GEE_REQUEST_TIMEOUT', '120'))
+        )
+
+    def _execute(
+        self, slot: _Slot, ctx: contextvars.Context, submitted: float, fn: Callable, args: tuple, kwargs: dict
+    ) -> Any:
+        started = time.perf_counter()
+        wait = started - submitted
+        with self._lock:
+            if slot.abandoned:
+                # The caller timed out or was cancelled while this call was
+                # queued and already gave the slot back; skip the work.
+                return None
+            slot.started = True
+            self._queued -= 1
+            self._active += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        timing = ctx.get(request_timing)
+        if timing is not None:
+            timing.add("queue", wait)
+
+        try:
+            result = ctx.run(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            run = time.perf_counter() - started
+            with self._lock:
+                self._active -= 1
+                self._total_run += run
+            if timing is not None:
+                timing.add("gee", run)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking function on the pool and await its result
+
+        Args:
+            fn: Blocking callable (typically a GEEService method)
+            timeout: Seconds to wait before giving up (defaults to the executor timeout)
+
+        Raises:
+            ExecutorBusyError: The queue is already at ``max_queue``
+            asyncio.TimeoutError: The call did not finish within the timeout
+
+        A call abandoned (timed out or cancelled) before a worker picked it up
+        gives its queue slot back and never runs.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusyError(
+                    f"Earth Engine queue is full ({self._queued} requests waiting)"
+                )
+            self._queued += 1
+
+        slot = _Slot()
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        try:
+            future = loop.run_in_executor(
+                self._pool, self._execute, slot, ctx, time.perf_counter(), fn, args, kwargs
+            )
+            return await asyncio.wait_for(future, timeout=self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            # A running worker thread cannot be interrupted; it finishes in
+            # the background and its result is discarded.
+            with self._lock:
+                self._timed_out += 1
+            raise
+        finally:
+            self._abandon(slot)
+
+    def _abandon(self, slot: _Slot):
+        """Give back the queue slot of a call unless a worker already started it"""
+        with self._lock:
+            if not slot.started and not slot.abandoned:
+                slot.abandoned = True
+                self._queued -= 1
+
+    def stats(self) -> Dict:
+        """Snapshot of pool usage, queue depth and wait times"""
+        with self._lock:
+            started = self._completed + self._failed + self._active
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'timeout_seconds': self.timeout,
+                'active': self._active,
+                'queued': self._queued,
+                'completed': self._completed,
+                'failed': self._failed,
+                'timed_out': self._timed_out,
+                'rejected': self._rejected,
+                'avg_wait_seconds': round(self._total_wait / started, 4) if started else 0.0,
+                'max_wait_seconds': round(self._max_wait, 4),
+                'avg_run_seconds': round(self._total_run / (self._completed + self._failed), 4)
+                if (self._completed + self._failed) else 0.0
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release the worker threads"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Shared executor for all Earth Engine work in this process
+gee_executor = GEEExecutor.from_env()
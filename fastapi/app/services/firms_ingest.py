@@ -0,0 +1,184 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.services.firms_store import FirmsStore, firms_store_from_env, hotspot_row
+from app.services.http_client import get_http_client
+
+# FIRMS WFS GeoJSON endpoint for Southeast Asia (24 hours)
+FIRMS_WFS_URL = os.getenv(
+    "FIRMS_WFS_URL",
+    "https://firms.modaps.eosdis.nasa.gov/mapserver/wfs/SouthEast_Asia/7a16aa667fe01b181ffebcf83c022e34/?SERVICE=WFS&REQUEST=GetFeature&VERSION=2.0.0&TYPENAME=ms:fires_modis_24hrs&STARTINDEX=0&COUNT=1000&SRSNAME=urn:ogc:def:crs:EPSG::4326&BBOX=-90,-180,90,180,urn:ogc:def:crs:EPSG::4326&outputformat=geojson"
+)
+
+# FIRMS country API (MODIS NRT, Thailand, last day) used when the WFS fails
+FIRMS_API_URL = os.getenv(
+    "FIRMS_API_URL",
+    "https://firms.modaps.eosdis.nasa.gov/api/country/json/7a16aa667fe01b181ffebcf83c022e34/MODIS_NRT/THA/1"
+)
+
+# Attributes kept from FIRMS API records
+API_PROPERTIES = [
+    "confidence", "bright_ti4", "bright_ti5", "scan", "track",
+    "acq_date", "acq_time", "satellite", "instrument", "version"
+]
+
+
+def rows_from_geojson(data: Dict) -> List[tuple]:
+    """firms_hotspots rows from a FIRMS WFS GeoJSON FeatureCollection"""
+    rows = []
+    for feature in data.get("features") or []:
+        properties = feature.get("properties") or {}
+        longitude = properties.get("longitude")
+        latitude = properties.get("latitude")
+        if longitude is None or latitude is None:
+            coordinates = (feature.get("geometry") or {}).get("coordinates") or [None, None]
+            longitude, latitude = coordinates[0], coordinates[1]
+        row = hotspot_row(properties, longitude, latitude)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def rows_from_api(data: List[Dict]) -> List[tuple]:
+    """firms_hotspots rows from FIRMS country API records"""
+    rows = []
+    for hotspot in data:
+        properties = {key: hotspot.get(key) for key in API_PROPERTIES}
+        row = hotspot_row(properties, hotspot.get("longitude"), hotspot.get("latitude"))
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+class FirmsIngester:
+    """
+    Background poller that copies FIRMS detections into the local store
+
+    Each run fetches the WFS feed (falling back to the country API), inserts
+    new detections and purges ones older than the retention window. Started
+    with ``poll=False`` (in the other worker processes), it only watches the
+    store until the polling process has filled it.
+    """
+
+    def __init__(
+        self,
+        store: FirmsStore,
+        interval: float = 900,
+        retention_days: int = 30
+    ):
+        self.store = store
+        self.interval = interval
+        self.retention_days = retention_days
+        self.last_run: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_inserted = 0
+        self.has_data = False
+        self.polling = False
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, store: FirmsStore) -> "FirmsIngester":
+        return cls(
+            store,
+            interval=float(os.getenv("FIRMS_POLL_INTERVAL", "900")),
+            retention_days=int(os.getenv("FIRMS_RETENTION_DAYS", "30"))
+        )
+
+    @property
+    def ready(self) -> bool:
+        """True once the store holds detections that can be served"""
+        return self.last_success is not None or self.has_data
+
+    async def fetch_rows(self, client: httpx.AsyncClient) -> List[tuple]:
+        response = await client.get(FIRMS_WFS_URL)
+        if response.status_code == 200:
+            return rows_from_geojson(response.json())
+
+        fallback_response = await client.get(FIRMS_API_URL)
+        fallback_response.raise_for_status()
+        return rows_from_api(fallback_response.json())
+
+    async def run_once(self) -> int:
+        """Fetch and store one batch of detections; returns the number of new rows"""
+        self.last_run = datetime.now(timezone.utc)
+        try:
+            rows = await self.fetch_rows(get_http_client())
+            inserted = await asyncio.to_thread(self.store.upsert, rows)
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+            await asyncio.to_thread(self.store.purge_before, cutoff)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"✗ FIRMS ingest failed: {e}")
+            raise
+
+        self.last_success = datetime.now(timezone.utc)
+        self.last_error = None
+        self.last_inserted = inserted
+        print(f"✓ FIRMS ingest stored {inserted} new detections ({len(rows)} fetched)")
+        return inserted
+
+    async def _loop(self):
+        schema_ready = False
+        while True:
+            try:
+                if not schema_ready:
+                    await asyncio.to_thread(self.store.ensure_schema)
+                    self.has_data = await asyncio.to_thread(self.store.has_rows)
+                    schema_ready = True
+                await self.run_once()
+            except Exception as e:
+                if not schema_ready:
+                    self.last_error = str(e)
+                    print(f"✗ FIRMS store unavailable: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _watch(self):
+        while not self.has_data:
+            try:
+                self.has_data = await asyncio.to_thread(self.store.has_rows)
+            except Exception as e:
+                self.last_error = str(e)
+            if not self.has_data:
+                await asyncio.sleep(min(self.interval, 60))
+
+    def start(self, poll: bool = True):
+        """Start polling (or only watching the store) in the background on the running event loop"""
+        if self._task is None:
+            self.polling = poll
+            self._task = asyncio.create_task(self._loop() if poll else self._watch())
+
+    async def stop(self):
+        """Cancel the poller and wait for it to finish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "polling": self.polling,
+            "interval_seconds": self.interval,
+            "retention_days": self.retention_days,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_inserted": self.last_inserted,
+            "last_error": self.last_error
+        }
+
+
+# Shared store and poller; the poller is started from the app lifespan
+firms_store = firms_store_from_env()
+firms_ingester = (
+    FirmsIngester.from_env(firms_store)
+    if firms_store is not None and os.getenv("FIRMS_INGEST_ENABLED", "true").lower() == "true"
+    else None
+)
@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.firms_ingest import API_PROPERTIES, FIRMS_API_URL, FIRMS_WFS_URL
+from app.services.firms_store import hotspot_row
+from app.services.hexagon_store import compress_body
+from app.services.http_client import get_http_client
+
+try:
+    import brotli
+except ImportError:  # httpx only asks for br when brotli is installed
+    brotli = None
+
+
+class FirmsUnavailableError(Exception):
+    """Raised when neither FIRMS source answered and nothing is cached"""
+
+
+def decompressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Incremental (decompress, flush) pair for a Content-Encoding"""
+    if encoding == "identity":
+        return (lambda data: data), (lambda: b"")
+    if encoding in ("gzip", "deflate"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+        return decoder.decompress, decoder.flush
+    if encoding == "br" and brotli is not None:
+        decoder = brotli.Decompressor()
+        return decoder.process, (lambda: b"")
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def api_feature(hotspot: Dict) -> Dict:
+    """GeoJSON feature of a FIRMS API record"""
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [float(hotspot["longitude"]), float(hotspot["latitude"])]
+        },
+        "properties": {key: hotspot.get(key) for key in API_PROPERTIES}
+    }
+
+
+def default_since(now: Optional[float] = None) -> datetime:
+    """
+    Start of the default 24-hour window, rounded up to the minute
+
+    Acquisition times have minute resolution, so rounding up selects the
+    same detections as the exact instant while letting one serialized
+    default view serve a whole minute of requests.
+    """
+    since = datetime.fromtimestamp(now if now is not None else time.time(), timezone.utc) - timedelta(hours=24)
+    minutes = math.ceil(since.timestamp() / 60)
+    return datetime.fromtimestamp(minutes * 60, timezone.utc)
+
+
+class FirmsFeed:
+    """
+    One fetched FIRMS feed, parsed once
+
+    Filtered requests select from the rows extracted here on first use
+    instead of parsing the body again. The unfiltered view (the default
+    24-hour window and a limit) is serialized and compressed once and then
+    served as is, with an ETag, until the window moves on a minute.
+    """
+
+    def __init__(self, features: List[Dict], version: str):
+        self.features = features
+        self.version = version
+        self._rows: Optional[List[Tuple[tuple, Dict]]] = None
+        self._views: Dict[Tuple[datetime, int], Tuple[Dict[str, bytes], str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def rows(self) -> List[Tuple[tuple, Dict]]:
+        """(firms_hotspots row, feature) of every identifiable detection"""
+        with self._lock:
+            if self._rows is None:
+                rows = []
+                for feature in self.features:
+                    properties = feature.get("properties") or {}
+                    coordinates = (feature.get("geometry") or {}).get("coordinates") or [None, None]
+                    row = hotspot_row(
+                        properties, properties.get("longitude", coordinates[0]), properties.get("latitude", coordinates[1])
+                    )
+                    if row is not None:
+                        rows.append((row[:8], feature))
+                self._rows = rows
+            return self._rows
+
+    def select(self, since: datetime, bbox: Optional[List[float]], confidence: Optional[int], limit: int) -> Dict:
+        """
+        Detections matching the store's filters, as a FeatureCollection
+
+        Like the store, keeps one feature per (latitude, longitude, acq_date,
+        acq_time, satellite) and returns the ``limit`` most recent detections.
+        """
+        matches = {}
+        for row, feature in self.rows:
+            if row[5] < since:
+                continue
+            if bbox and not (bbox[0] <= row[1] <= bbox[2] and bbox[1] <= row[0] <= bbox[3]):
+                continue
+            if confidence is not None and (row[7] is None or row[7] < confidence):
+                continue
+            matches.setdefault(row[:5], (row[5], feature))
+        newest = sorted(matches.values(), key=lambda match: match[0], reverse=True)[:limit]
+        return {"type": "FeatureCollection", "features": [feature for _, feature in newest]}
+
+    def default_view(self, limit: int) -> Tuple[Dict[str, bytes], str]:
+        """Unfiltered response body in every encoding we serve, and its ETag"""
+        key = (default_since(), limit)
+        with self._lock:
+            if key in self._views:
+                return self._views[key]
+        body = json.dumps(self.select(key[0], None, None, limit), separators=(",", ":")).encode()
+        view = compress_body(body), f'"firms-{self.version}-{int(key[0].timestamp())}-{limit}"'
+        with self._lock:
+            # Earlier minutes are not asked for again
+            self._views = {k: v for k, v in self._views.items() if k[0] == key[0]}
+            self._views[key] = view
+        return view
+
+
+class FirmsProxy:
+    """
+    Stale-while-revalidate cache in front of the live FIRMS feed
+
+    A response younger than ``fresh_ttl`` is served as is. An older one,
+    up to ``max_stale``, is still served immediately while a single
+    background refresh revalidates it with ``If-None-Match`` /
+    ``If-Modified-Since``. The caller only waits on FIRMS when nothing
+    usable is cached.
+
+    The WFS body is decompressed as it arrives and parsed once per fetch
+    into a ``FirmsFeed``; the body itself is not kept. Concurrent misses
+    share one download.
+    """
+
+    def __init__(self, fresh_ttl: float = 300, max_stale: float = 3600):
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.feed: Optional[FirmsFeed] = None
+        self.encoding = "identity"
+        self.source: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0
+        self.refreshes = 0
+        self.not_modified = 0
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "FirmsProxy":
+        return cls(
+            fresh_ttl=float(os.getenv("FIRMS_CACHE_TTL", "300")),
+            max_stale=float(os.getenv("FIRMS_CACHE_MAX_STALE", "3600"))
+        )
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def _store(self, feed: FirmsFeed, encoding: str, source: str, etag: Optional[str], last_modified: Optional[str]):
+        self.feed = feed
+        self.encoding = encoding
+        self.source = source
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time()
+
+    async def _fetch(self):
+        client = get_http_client()
+        headers = {}
+        if self.source == "wfs":
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        async with client.stream("GET", FIRMS_WFS_URL, headers=headers) as response:
+            self.refreshes += 1
+
+            if response.status_code == 304:
+                self.not_modified += 1
+                self.fetched_at = time.time()
+                return
+
+            if response.status_code == 200:
+                encoding = response.headers.get("content-encoding", "identity").strip().lower()
+                decompress, flush = decompressor(encoding)
+                parts = []
+                async for chunk in response.aiter_raw():
+                    data = decompress(chunk)
+                    if data:
+                        parts.append(data)
+                parts.append(flush())
+                body = b"".join(parts)
+                del parts
+                feed = await asyncio.to_thread(self._parse, body)
+                self._store(feed, encoding, "wfs", response.headers.get("etag"), response.headers.get("last-modified"))
+                return
+
+        # Fallback to MODIS API
+        fallback_response = await client.get(FIRMS_API_URL)
+        if fallback_response.status_code != 200:
+            raise FirmsUnavailableError("Failed to fetch FIRMS data from both sources")
+
+        # Records become features directly; no GeoJSON body is written
+        records = fallback_response.json()
+        version = hashlib.sha1(fallback_response.content).hexdigest()[:16]
+        self._store(FirmsFeed([api_feature(hotspot) for hotspot in records], version), "identity", "api", None, None)
+
+    @staticmethod
+    def _parse(body: bytes) -> FirmsFeed:
+        return FirmsFeed(json.loads(body).get("features") or [], hashlib.sha1(body).hexdigest()[:16])
+
+    def refresh(self) -> asyncio.Task:
+        """Start a refresh, or join the one already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._fetch())
+            self._refresh_task.add_done_callback(self._log_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"✗ FIRMS refresh failed: {task.exception()}")
+
+    def _usable(self) -> bool:
+        """True if the cached copy can be served, starting a revalidation when stale"""
+        if self.feed is not None and self.age < self.fresh_ttl:
+            self.fresh_hits += 1
+            return True
+
+        if self.feed is not None and self.age < self.max_stale:
+            self.stale_hits += 1
+            self.refresh()
+            return True
+        return False
+
+    async def get(self) -> FirmsFeed:
+        """Current FIRMS feed, refreshing it as needed"""
+        if self._usable():
+            return self.feed
+
+        try:
+            await asyncio.shield(self.refresh())
+        except Exception as e:
+            # Serve an expired copy rather than nothing when FIRMS is down
+            if self.feed is None:
+                raise FirmsUnavailableError(str(e)) from e
+        return self.feed
+
+    def stats(self) -> Dict:
+        return {
+            "cached": self.feed is not None,
+            "source": self.source,
+            "encoding": self.encoding,
+            "age_seconds": round(self.age, 1) if self.feed is not None else None,
+            "fresh_ttl_seconds": self.fresh_ttl,
+            "max_stale_seconds": self.max_stale,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "refreshes": self.refreshes,
+            "not_modified": self.not_modified
+        }
+
+
+# Shared proxy cache for the live FIRMS feed
+firms_proxy = FirmsProxy.from_env()
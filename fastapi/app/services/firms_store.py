@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+# Same schema as postgis/init/02-firms-hotspots.sql, applied on startup so
+# databases created before that script existed are upgraded too
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS firms_hotspots (
+    id BIGSERIAL PRIMARY KEY,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    acq_date DATE NOT NULL,
+    acq_time VARCHAR(4) NOT NULL,
+    satellite VARCHAR(32) NOT NULL,
+    acquired_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    confidence VARCHAR(16),
+    confidence_pct SMALLINT,
+    properties JSONB NOT NULL DEFAULT '{}'::jsonb,
+    geom GEOMETRY(Point, 4326) NOT NULL,
+    ingested_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_firms_hotspots_detection UNIQUE (latitude, longitude, acq_date, acq_time, satellite)
+);
+CREATE INDEX IF NOT EXISTS idx_firms_hotspots_geom ON firms_hotspots USING GIST (geom);
+CREATE INDEX IF NOT EXISTS idx_firms_hotspots_acquired_at ON firms_hotspots (acquired_at);
+"""
+
+# VIIRS reports confidence as low/nominal/high instead of a percentage; map it
+# onto the MODIS 0-100 scale so one numeric filter works for both sensors
+CONFIDENCE_LEVELS = {
+    "l": 30, "low": 30,
+    "n": 60, "nominal": 60,
+    "h": 90, "high": 90
+}
+
+
+def confidence_to_pct(confidence) -> Optional[int]:
+    """Numeric confidence (0-100) from a MODIS number or a VIIRS class letter"""
+    if confidence is None:
+        return None
+    try:
+        return int(float(confidence))
+    except (TypeError, ValueError):
+        return CONFIDENCE_LEVELS.get(str(confidence).strip().lower())
+
+
+def hotspot_row(properties: Dict, longitude: float, latitude: float) -> Optional[tuple]:
+    """
+    Build a firms_hotspots row from FIRMS attributes
+
+    Returns None when the detection lacks the fields that identify it.
+    """
+    acq_date = properties.get("acq_date")
+    acq_time = properties.get("acq_time")
+    if longitude is None or latitude is None or not acq_date or acq_time is None:
+        return None
+
+    acq_time = str(acq_time).split(".")[0].replace(":", "").zfill(4)[-4:]
+    acquired_at = datetime.strptime(f"{acq_date} {acq_time}", "%Y-%m-%d %H%M").replace(tzinfo=timezone.utc)
+    confidence = properties.get("confidence")
+
+    return (
+        round(float(latitude), 5),
+        round(float(longitude), 5),
+        acq_date,
+        acq_time,
+        str(properties.get("satellite") or ""),
+        acquired_at,
+        None if confidence is None else str(confidence),
+        confidence_to_pct(confidence),
+        json.dumps(properties)
+    )
+
+
+class FirmsStore:
+    """PostGIS-backed store of FIRMS detections"""
+
+    def __init__(self, database_url: str, min_connections: int = 1, max_connections: int = 5):
+        self.database_url = database_url
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(
+                    self.min_connections, self.max_connections, self.database_url
+                )
+            return self._pool
+
+    @contextmanager
+    def connection(self):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def ensure_schema(self):
+        """Create the hotspot table and its indexes if missing"""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+
+    def upsert(self, rows: Sequence[tuple]) -> int:
+        """
+        Insert detections, skipping ones already stored
+
+        Detections are de-duplicated on (latitude, longitude, acq_date,
+        acq_time, satellite). Returns the number of new rows.
+        """
+        if not rows:
+            return 0
+        with self.connection() as conn, conn.cursor() as cur:
+            inserted = execute_values(
+                cur,
+                """
+                INSERT INTO firms_hotspots (
+                    latitude, longitude, acq_date, acq_time, satellite,
+                    acquired_at, confidence, confidence_pct, properties, geom
+                )
+                SELECT v.latitude, v.longitude, v.acq_date::date, v.acq_time, v.satellite,
+                       v.acquired_at::timestamptz, v.confidence, v.confidence_pct::smallint,
+                       v.properties::jsonb, ST_SetSRID(ST_MakePoint(v.longitude, v.latitude), 4326)
+                FROM (VALUES %s) AS v (
+                    latitude, longitude, acq_date, acq_time, satellite,
+                    acquired_at, confidence, confidence_pct, properties
+                )
+                ON CONFLICT ON CONSTRAINT uq_firms_hotspots_detection DO NOTHING
+                RETURNING id
+                """,
+                rows,
+                fetch=True
+            )
+            return len(inserted)
+
+    def has_rows(self) -> bool:
+        """True if any detection is stored"""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM firms_hotspots)")
+            return cur.fetchone()[0]
+
+    def purge_before(self, cutoff: datetime) -> int:
+        """Delete detections acquired before ``cutoff``"""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM firms_hotspots WHERE acquired_at < %s", (cutoff,))
+            return cur.rowcount
+
+    def query_geojson(
+        self,
+        since: datetime,
+        bbox: Optional[List[float]] = None,
+        min_confidence: Optional[int] = None,
+        limit: int = 10000
+    ) -> str:
+        """
+        Detections as a GeoJSON FeatureCollection string
+
+        The FeatureCollection is assembled inside PostGIS so the rows never
+        round-trip through Python objects.
+        """
+        conditions = ["acquired_at >= %s"]
+        params: List = [since]
+        if bbox is not None:
+            conditions.append("geom && ST_MakeEnvelope(%s, %s, %s, %s, 4326)")
+            params.extend(bbox)
+        if min_confidence is not None:
+            conditions.append("confidence_pct >= %s")
+            params.append(min_confidence)
+        params.append(limit)
+
+        sql = f"""
+            SELECT json_build_object(
+                'type', 'FeatureCollection',
+                'features', COALESCE(json_agg(json_build_object(
+                    'type', 'Feature',
+                    'geometry', ST_AsGeoJSON(h.geom)::json,
+                    'properties', h.properties
+                )), '[]'::json)
+            )::text
+            FROM (
+                SELECT geom, properties FROM firms_hotspots
+                WHERE {' AND '.join(conditions)}
+                ORDER BY acquired_at DESC
+                LIMIT %s
+            ) AS h
+        """
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()[0]
+
+    def query_points(
+        self,
+        since: datetime,
+        bbox: Optional[List[float]] = None,
+        min_confidence: Optional[int] = None
+    ) -> List[Tuple[float, float]]:
+        """(longitude, latitude) of every matching detection"""
+        conditions = ["acquired_at >= %s"]
+        params: List = [since]
+        if bbox is not None:
+            conditions.append("geom && ST_MakeEnvelope(%s, %s, %s, %s, 4326)")
+            params.extend(bbox)
+        if min_confidence is not None:
+            conditions.append("confidence_pct >= %s")
+            params.append(min_confidence)
+
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"SELECT longitude, latitude FROM firms_hotspots WHERE {' AND '.join(conditions)}",
+                params
+            )
+            return cur.fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
+def firms_store_from_env() -> Optional[FirmsStore]:
+    """FirmsStore for DATABASE_URL, or None when no database is configured"""
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        return None
+    return FirmsStore(database_url, max_connections=int(os.getenv("DATABASE_POOL_SIZE", "5")))
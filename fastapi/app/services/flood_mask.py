@@ -0,0 +1,130 @@
+"""
+Static flood mask per study area
+
+The flood pipeline drops permanent water (JRC occurrence > 80%) and slopes
+of 5° or more (SRTM). Both depend only on the study area, so the combined
+mask is exported once per area as an Earth Engine asset and its ID kept in
+the study-area snapshot (``flood_mask``); areas without one build the mask
+inline on every request. Rebuild after adding an area or changing the
+mask with:
+
+    python -m app.services.flood_mask export [--area ud]
+
+Each export writes a new, dated asset and only then switches the snapshot
+to it, so running API workers keep a valid mask; restart them to pick up
+the new one, then delete the replaced asset.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.services.study_areas import study_area_registry
+
+FINISHED_STATES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+def mask_asset_id(gee_service, area_code: str, asset_root: Optional[str] = None) -> str:
+    """
+    Dated asset ID for a new flood mask
+
+    Defaults to the folder holding the study-area asset, unless
+    ``asset_root`` or FLOOD_MASK_ASSET_ROOT is set.
+    """
+    root = asset_root or os.getenv("FLOOD_MASK_ASSET_ROOT") or gee_service.STUDY_AREAS[area_code].rsplit("/", 1)[0]
+    return f"{root}/flood_mask_{area_code}_{datetime.now().strftime('%Y%m%d%H%M')}"
+
+
+def export_flood_masks(
+    gee_service,
+    area_codes: List[str],
+    asset_root: Optional[str] = None,
+    scale: int = 30,
+    poll_interval: float = 30
+) -> Dict[str, Dict]:
+    """
+    Export the static flood mask of each area and wait for the tasks
+
+    The masks come from 30 m inputs, so exporting at ``scale`` 30 m keeps
+    them exact. A binary mask is pyramided by mode rather than mean.
+
+    Returns:
+        Per area code: asset ID, final task state and error message
+    """
+    import ee
+
+    pending = {}
+    for code in area_codes:
+        area = gee_service.get_study_area(code)
+        asset_id = mask_asset_id(gee_service, code, asset_root)
+        task = ee.batch.Export.image.toAsset(
+            image=gee_service.build_flood_mask(area),
+            description=f"flood_mask_{code}",
+            assetId=asset_id,
+            region=area.geometry(),
+            scale=scale,
+            pyramidingPolicy={'.default': 'mode'},
+            maxPixels=1e10
+        )
+        task.start()
+        pending[code] = (asset_id, task)
+        print(f"  … {code}: exporting {asset_id}")
+
+    results = {}
+    while pending:
+        for code, (asset_id, task) in list(pending.items()):
+            status = task.status()
+            if status.get("state") in FINISHED_STATES:
+                results[code] = {
+                    "asset": asset_id,
+                    "state": status["state"],
+                    "error": status.get("error_message")
+                }
+                del pending[code]
+        if pending:
+            time.sleep(poll_interval)
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage the static flood masks of the study areas")
+    parser.add_argument("command", choices=["export", "show", "clear"])
+    parser.add_argument("--area", action="append", help="Only these area codes (default: all)")
+    parser.add_argument("--asset-root", help="Earth Engine folder for the mask assets")
+    parser.add_argument("--scale", type=int, default=30, help="Export scale in metres")
+    args = parser.parse_args(argv)
+
+    codes = args.area or study_area_registry.codes()
+
+    if args.command == "show":
+        for code in codes:
+            print(f"{code}: {study_area_registry.flood_mask(code) or '(built per request)'}")
+        return
+
+    if args.command == "clear":
+        for code in codes:
+            study_area_registry.set_flood_mask(code, None)
+        study_area_registry.save()
+        print(f"✓ Flood masks cleared for {', '.join(codes)}; restart the API to build them per request")
+        return
+
+    from app.services.gee_service import GEEService
+
+    results = export_flood_masks(GEEService(), codes, asset_root=args.asset_root, scale=args.scale)
+    failed = False
+    for code, result in results.items():
+        if result["state"] != "COMPLETED":
+            failed = True
+            print(f"✗ {code}: {result['state']} {result['error'] or ''}".rstrip())
+            continue
+        previous = study_area_registry.flood_mask(code)
+        study_area_registry.set_flood_mask(code, result["asset"])
+        study_area_registry.save()
+        print(f"✓ {code}: {result['asset']}" + (f" (replaces {previous})" if previous else ""))
+    print(f"✓ Snapshot written to {study_area_registry.path}; restart the API to use the new masks")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
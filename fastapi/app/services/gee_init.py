@@ -0,0 +1,121 @@
+"""
+Background Earth Engine initialization
+
+``ee.Initialize`` loads credentials and contacts Earth Engine, which takes
+seconds and fails outright when the service is unreachable. The API runs it
+from its lifespan in a worker thread, retrying with exponential backoff, so
+workers boot at once and the routes that do not need Earth Engine serve
+immediately, and ``/ready`` reports its state. A /gee request that arrives
+while the first attempt is still running, as on every worker gunicorn
+recycles, waits up to ``wait`` seconds for it instead of failing; once an
+attempt has failed, /gee routes answer 503 at once until a retry succeeds.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+PENDING = "pending"
+INITIALIZING = "initializing"
+READY = "ready"
+FAILED = "failed"
+
+
+class EarthEngineInitializer:
+    """Initializes a GEEService in the background and tracks its readiness"""
+
+    def __init__(self, gee_service, retry_initial: float = 5.0, retry_max: float = 300.0, wait: float = 15.0):
+        self.gee_service = gee_service
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self.wait = wait
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.ready_at: Optional[str] = None
+        self.retry_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready_event: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_env(cls, gee_service) -> "EarthEngineInitializer":
+        return cls(
+            gee_service,
+            retry_initial=float(os.getenv("GEE_INIT_RETRY_INITIAL", "5")),
+            retry_max=float(os.getenv("GEE_INIT_RETRY_MAX", "300")),
+            wait=float(os.getenv("GEE_INIT_WAIT", "15"))
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def retry_after(self) -> int:
+        """Seconds a client should wait before trying a /gee route again"""
+        if self.state == FAILED and self.retry_at is not None:
+            return max(int(self.retry_at - time.time()) + 1, 1)
+        return 5
+
+    async def wait_ready(self) -> bool:
+        """
+        Wait up to ``wait`` seconds for an attempt in progress; True if ready
+
+        Returns at once when ready, when the last attempt failed, or when
+        initialization was never started.
+        """
+        if self.ready or self.state == FAILED or self._ready_event is None:
+            return self.ready
+        try:
+            await asyncio.wait_for(self._ready_event.wait(), self.wait)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    async def _initialize(self, on_ready: Optional[Callable[[], None]]):
+        delay = self.retry_initial
+        while True:
+            self.state = INITIALIZING
+            self.attempts += 1
+            try:
+                await asyncio.to_thread(self.gee_service.initialize)
+                break
+            except Exception as e:
+                self.state = FAILED
+                self.error = str(e) or type(e).__name__
+                self.retry_at = time.time() + delay
+                print(f"✗ {self.error}; retrying in {delay:g}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+
+        self.state = READY
+        self.error = None
+        self.retry_at = None
+        self.ready_at = datetime.now().isoformat()
+        self._ready_event.set()
+        if on_ready is not None:
+            on_ready()
+
+    def start(self, on_ready: Optional[Callable[[], None]] = None):
+        """Initialize on the running event loop; ``on_ready`` runs once it succeeds"""
+        if self._task is None:
+            self._ready_event = asyncio.Event()
+            self._task = asyncio.create_task(self._initialize(on_ready))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "ready_at": self.ready_at,
+            "retry_in_seconds": self.retry_after() if self.state == FAILED else None
+        }
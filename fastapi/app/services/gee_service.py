@@ -1,9 +1,11 @@
 import ee
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 import os
 from google.oauth2 import service_account
+from app.services.metrics import timed
+from app.services.study_areas import study_area_registry
 
 class GEEService:
     """Google Earth Engine service for processing satellite imagery"""
@@ -30,7 +32,36 @@ class GEEService:
         "flood": ['0000ff']  # Blue for flooded areas
     }
 
-    def __init__(self):
+    # Sentinel-2 normalized-difference indices: (bands, default vis min, default vis max)
+    SPECTRAL_INDICES = {
+        "ndvi": (['B8', 'B4'], 0, 1),
+        "ndmi": (['B8', 'B11'], -0.5, 0.5),
+        "ndwi": (['B3', 'B8'], -0.5, 0.5)
+    }
+
+    # Reduction scales (m) of approximate area statistics: the estimate and
+    # the coarser pass its error is judged against
+    APPROXIMATE_SCALES = (100, 200)
+
+    # Sentinel-1 VH decrease (dB) that marks a pixel as flooded (from flood.js)
+    FLOOD_THRESHOLD = -5.5
+
+    # Default MODIS solar radiation season of the 3PGs biomass model (dry season)
+    DSR_SEASON = (
+        os.getenv('BIOMASS_DSR_START', '2023-11-01'),
+        os.getenv('BIOMASS_DSR_END', '2024-03-30')
+    )
+
+    def __init__(self, initialize: bool = True):
+        """
+        Args:
+            initialize: Initialize Earth Engine now; the API passes False and
+                calls ``initialize()`` from its lifespan instead
+        """
+        if initialize:
+            self.initialize()
+
+    def initialize(self):
         """Initialize Earth Engine with service account"""
         try:
             # Get service account file path from environment variable
@@ -54,10 +85,45 @@ class GEEService:
 
     def get_study_area(self, area_code: str) -> ee.FeatureCollection:
         """Get study area feature collection"""
-        if area_code not in self.STUDY_AREAS:
+        if area_code not in self.STUDY_AREAS or area_code not in study_area_registry:
             raise ValueError(f"Invalid area code: {area_code}")
         return ee.FeatureCollection(self.STUDY_AREAS[area_code])
 
+    def get_bounds(self, area: ee.FeatureCollection) -> ee.List:
+        """Server-side bounding box ring of a study area"""
+        return area.geometry().bounds().coordinates().get(0)
+
+    def evaluate(self, values: Dict) -> Dict:
+        """
+        Evaluate several server-side values in a single Earth Engine request
+
+        Every ``getInfo()`` is a full network round-trip, so layer methods
+        gather their scalar outputs (stats, areas, bounds) into one
+        ``ee.Dictionary`` and fetch them together.
+        """
+        with timed("getInfo"):
+            return ee.Dictionary(values).getInfo()
+
+    def get_map_id(self, image: ee.Image, vis_params: Dict) -> Dict:
+        """``getMapId()`` round-trip, timed like ``evaluate``"""
+        with timed("getMapId"):
+            return image.getMapId(vis_params)
+
+    def evaluate_layer(self, area_code: str, area: ee.FeatureCollection, values: Dict) -> Dict:
+        """
+        Evaluate a layer's scalar outputs and attach the study-area bounds
+
+        Bounds come from the local study-area registry; they are only added
+        to the Earth Engine request when the snapshot has not been refreshed.
+        """
+        bounds = study_area_registry.bounds(area_code)
+        if bounds is None:
+            values = dict(values, bounds=self.get_bounds(area))
+        results = self.evaluate(values)
+        if bounds is not None:
+            results['bounds'] = bounds
+        return results
+
     def compute_ndvi(self, image: ee.Image, area: ee.FeatureCollection) -> ee.Image:
         """Compute NDVI from Sentinel-2 image"""
         ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI').clip(area)
@@ -105,13 +171,16 @@ class GEEService:
         ndmi_collection = dataset.map(lambda img: self.compute_ndmi(img, area))
         ndmi_median = ndmi_collection.select('NDMI').median()
 
-        # Calculate statistics for visualization
-        stats = ndmi_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
+        # Calculate statistics for visualization and bounds in one request
+        results = self.evaluate_layer(area_code, area, {
+            'stats': ndmi_median.reduceRegion(
+                reducer=ee.Reducer.minMax(),
+                geometry=area,
+                scale=500,
+                bestEffort=True
+            )
+        })
+        stats = results['stats']
 
         vis_params = {
             'min': stats.get('NDMI_min', -0.5),
@@ -120,39 +189,29 @@ class GEEService:
         }
 
         # Get map ID
-        map_id = ndmi_median.getMapId(vis_params)
-
-        # Get bounds
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        map_id = self.get_map_id(ndmi_median, vis_params)
 
         return {
             'tile_url': map_id['tile_fetcher'].url_format,
             'vis_params': vis_params,
-            'bounds': bounds,
+            'bounds': results['bounds'],
             'stats': stats
         }
 
-    def get_burn_scar_layer(
+    def get_burn_scar_images(
         self,
-        area_code: str,
+        area: ee.FeatureCollection,
         start_date: str,
         end_date: str,
         cloud_cover: int = 30
-    ) -> Dict:
+    ) -> Tuple[ee.Image, ee.Image, ee.Image]:
         """
-        Get burn scar detection layer
-
-        Args:
-            area_code: Study area code
-            start_date: Start date in YYYY-MM-DD format
-            end_date: End date in YYYY-MM-DD format
-            cloud_cover: Maximum cloud cover percentage
+        Build the burn scar images of a study area
 
         Returns:
-            Dictionary with tile URLs for NBR and burn scars
+            NBR image, burn scar mask and severity class image (1=low,
+            2=moderate, 3=high, masked where unburned)
         """
-        area = self.get_study_area(area_code)
-
         # Get Sentinel-2 data
         s2_collection = ee.ImageCollection('COPERNICUS/S2_SR') \
             .filterDate(start_date, end_date) \
@@ -189,40 +248,37 @@ class GEEService:
         moderate_severity = nirbi.lt(0.5).And(nirbi.gte(0.2))
         high_severity = nirbi.lt(0.2)
 
-        # Calculate pixel counts and area statistics
-        # Pixel size for Sentinel-2 is 10m x 10m = 100 m²
-        pixel_area = 100  # m²
-        pixel_area_km2 = pixel_area / 1_000_000  # Convert to km²
-
-        # Get pixel counts using reduceRegion
-        scale = 10  # Sentinel-2 resolution
-
-        # Calculate statistics for each severity class
-        low_stats = low_severity.multiply(ee.Image.pixelArea()).reduceRegion(
-            reducer=ee.Reducer.sum(),
+        # Label each burned pixel with its severity class (1=low, 2=moderate, 3=high)
+        # so a single grouped reducer returns the area of every class
+        severity = ee.Image(0) \
+            .where(low_severity, 1) \
+            .where(moderate_severity, 2) \
+            .where(high_severity, 3) \
+            .rename('severity')
+        severity = severity.updateMask(severity.gt(0))
+
+        return nbr, burn_scars, severity
+
+    def severity_class_areas(self, area: ee.FeatureCollection, severity: ee.Image, scale: int) -> ee.Dictionary:
+        """Server-side area (m²) of every burn severity class at ``scale`` metres"""
+        return ee.Image.pixelArea().addBands(severity).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName='severity'),
             geometry=area.geometry(),
             scale=scale,
             maxPixels=1e9
-        ).getInfo()
-
-        moderate_stats = moderate_severity.multiply(ee.Image.pixelArea()).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=area.geometry(),
-            scale=scale,
-            maxPixels=1e9
-        ).getInfo()
-
-        high_stats = high_severity.multiply(ee.Image.pixelArea()).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=area.geometry(),
-            scale=scale,
-            maxPixels=1e9
-        ).getInfo()
+        )
 
+    @staticmethod
+    def burn_scar_statistics(class_areas: Dict) -> Dict:
+        """Burn scar statistics from an evaluated ``severity_class_areas``"""
         # Extract areas in m² and convert to km²
-        low_area_m2 = low_stats.get('NIRBI', 0)
-        moderate_area_m2 = moderate_stats.get('NIRBI', 0)
-        high_area_m2 = high_stats.get('NIRBI', 0)
+        area_by_class = {
+            int(group['severity']): group['sum']
+            for group in class_areas.get('groups', [])
+        }
+        low_area_m2 = area_by_class.get(1, 0)
+        moderate_area_m2 = area_by_class.get(2, 0)
+        high_area_m2 = area_by_class.get(3, 0)
 
         low_area_km2 = low_area_m2 / 1_000_000
         moderate_area_km2 = moderate_area_m2 / 1_000_000
@@ -230,11 +286,87 @@ class GEEService:
         total_area_km2 = low_area_km2 + moderate_area_km2 + high_area_km2
 
         # Calculate pixel counts
+        # Pixel size for Sentinel-2 is 10m x 10m = 100 m²
+        pixel_area = 100  # m²
         low_pixels = int(low_area_m2 / pixel_area)
         moderate_pixels = int(moderate_area_m2 / pixel_area)
         high_pixels = int(high_area_m2 / pixel_area)
         total_pixels = low_pixels + moderate_pixels + high_pixels
 
+        return {
+            'total_area_km2': round(total_area_km2, 2),
+            'low_area_km2': round(low_area_km2, 2),
+            'moderate_area_km2': round(moderate_area_km2, 2),
+            'high_area_km2': round(high_area_km2, 2),
+            'total_pixels': total_pixels,
+            'low_severity_pixels': low_pixels,
+            'moderate_severity_pixels': moderate_pixels,
+            'high_severity_pixels': high_pixels
+        }
+
+    def evaluate_burn_scar_statistics(
+        self,
+        area_code: str,
+        area: ee.FeatureCollection,
+        severity: ee.Image,
+        approximate: bool = False
+    ) -> Tuple[Dict, List]:
+        """
+        Evaluate burn scar statistics, exactly at 10 m or approximately
+
+        The approximate statistics are reduced at the first of
+        ``APPROXIMATE_SCALES``; their ``error_km2`` is the difference of the
+        total area to the coarser second scale.
+
+        Returns:
+            Statistics and study-area bounds
+        """
+        if not approximate:
+            results = self.evaluate_layer(area_code, area, {
+                'class_areas': self.severity_class_areas(area, severity, 10)  # Sentinel-2 resolution
+            })
+            return self.burn_scar_statistics(results['class_areas']), results['bounds']
+
+        scale, coarse_scale = self.APPROXIMATE_SCALES
+        results = self.evaluate_layer(area_code, area, {
+            'class_areas': self.severity_class_areas(area, severity, scale),
+            'coarse_class_areas': self.severity_class_areas(area, severity, coarse_scale)
+        })
+        statistics = self.burn_scar_statistics(results['class_areas'])
+        coarse = self.burn_scar_statistics(results['coarse_class_areas'])
+        statistics.update(
+            approximate=True,
+            scale=scale,
+            error_km2=round(abs(statistics['total_area_km2'] - coarse['total_area_km2']), 2)
+        )
+        return statistics, results['bounds']
+
+    def get_burn_scar_layer(
+        self,
+        area_code: str,
+        start_date: str,
+        end_date: str,
+        cloud_cover: int = 30,
+        approximate: bool = False
+    ) -> Dict:
+        """
+        Get burn scar detection layer
+
+        Args:
+            area_code: Study area code
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            cloud_cover: Maximum cloud cover percentage
+            approximate: Reduce the area statistics at a coarse scale, with
+                an error estimate, instead of at 10 m
+
+        Returns:
+            Dictionary with tile URLs for NBR and burn scars
+        """
+        area = self.get_study_area(area_code)
+        nbr, burn_scars, severity = self.get_burn_scar_images(area, start_date, end_date, cloud_cover)
+        statistics, bounds = self.evaluate_burn_scar_statistics(area_code, area, severity, approximate)
+
         # Visualization parameters
         nbr_vis = {
             'min': -0.3,
@@ -249,11 +381,8 @@ class GEEService:
         }
 
         # Get map IDs
-        nbr_map_id = nbr.getMapId(nbr_vis)
-        burn_scar_map_id = burn_scars.getMapId(burn_scar_vis)
-
-        # Get bounds
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        nbr_map_id = self.get_map_id(nbr, nbr_vis)
+        burn_scar_map_id = self.get_map_id(burn_scars, burn_scar_vis)
 
         return {
             'nbr': {
@@ -263,123 +392,160 @@ class GEEService:
             'burn_scars': {
                 'tile_url': burn_scar_map_id['tile_fetcher'].url_format,
                 'vis_params': burn_scar_vis,
-                'statistics': {
-                    'total_area_km2': round(total_area_km2, 2),
-                    'low_area_km2': round(low_area_km2, 2),
-                    'moderate_area_km2': round(moderate_area_km2, 2),
-                    'high_area_km2': round(high_area_km2, 2),
-                    'total_pixels': total_pixels,
-                    'low_severity_pixels': low_pixels,
-                    'moderate_severity_pixels': moderate_pixels,
-                    'high_severity_pixels': high_pixels
-                }
+                'statistics': statistics
             },
             'bounds': bounds
         }
 
-    def get_biomass_layer(
+    def get_burn_scar_statistics(
         self,
         area_code: str,
+        start_date: str,
         end_date: str,
-        days_composite: int = 30
+        cloud_cover: int = 30,
+        approximate: bool = False
     ) -> Dict:
         """
-        Get 3PGs biomass estimation layer
+        Get only the burn scar area statistics, without map tiles
 
         Args:
             area_code: Study area code
+            start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
-            days_composite: Number of days for composite
+            cloud_cover: Maximum cloud cover percentage
+            approximate: Reduce at a coarse scale with an error estimate
 
         Returns:
-            Dictionary with tile URLs for NDVI and biomass layers
+            Dictionary with the statistics of ``get_burn_scar_layer``
         """
         area = self.get_study_area(area_code)
+        _, _, severity = self.get_burn_scar_images(area, start_date, end_date, cloud_cover)
+        statistics, _ = self.evaluate_burn_scar_statistics(area_code, area, severity, approximate)
+        return {**statistics, 'approximate': approximate}
 
-        # Calculate dates
-        end = ee.Date(end_date)
-        start = end.advance(-days_composite, 'day')
+    def compute_3pgs_biomass(self, ndvi: ee.Image, solar_rad: ee.Image) -> ee.Image:
+        """
+        3PGs biomass (kg/m²) from an NDVI image and a MODIS DSR composite
 
-        # MODIS data processing functions
-        def reproject_image(img):
-            return img.reproject(crs="EPSG:32647", scale=500)
+        Every step is linear in NDVI, so applying it to a median NDVI gives
+        the median of the per-image biomass.
+        """
+        # FPAR calculation
+        fpar = ndvi.multiply(1.5).add(0.1).rename('FPAR')
 
-        def compute_ndvi_modis(img):
-            ndvi = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('NDVI')
-            return img.addBands(ndvi)
+        # DSR 24hr
+        dsr24hr = solar_rad.select('GMT_0900_DSR') \
+            .multiply(18000).divide(1000000).rename('DSR24hr')
 
-        def compute_biomass(img):
-            # Get solar radiation data
-            solar_rad = ee.ImageCollection('MODIS/062/MCD18A1') \
-                .filterDate('2023-11-01', '2024-03-30') \
-                .filterBounds(area) \
-                .select('GMT_0900_DSR') \
-                .median()
+        # PAR (45% of DSR)
+        par = dsr24hr.multiply(0.45).rename('PAR')
+
+        # APAR
+        apar = fpar.multiply(par).rename('APAR')
+
+        # GPP
+        gpp = apar.multiply(1.8).rename('GPP')
+
+        # NPP (45% of GPP)
+        npp = gpp.multiply(0.45).rename('NPP')
+
+        # Biomass (carbon to biomass factor = 2.5)
+        return npp.multiply(2.5).rename('BM')
 
-            # FPAR calculation
-            fpar = img.select('NDVI').multiply(1.5).add(0.1).rename('FPAR')
+    def get_dsr_composite(
+        self,
+        area: ee.Geometry,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> ee.Image:
+        """
+        Median MODIS downward shortwave radiation (GMT_0900_DSR) over a window
 
-            # DSR 24hr
-            dsr24hr = solar_rad.select('GMT_0900_DSR') \
-                .multiply(18000).divide(1000000).rename('DSR24hr')
+        Without both dates the ``DSR_SEASON`` dry season is used. MCD18A1 is
+        published with a delay, so a recent window may hold no images yet;
+        the default season's median is used then too.
+        """
+        collection = ee.ImageCollection('MODIS/062/MCD18A1') \
+            .filterBounds(area) \
+            .select('GMT_0900_DSR')
+        season = collection.filterDate(*self.DSR_SEASON).median()
+        if not (start_date and end_date):
+            return season
 
-            # PAR (45% of DSR)
-            par = dsr24hr.multiply(0.45).rename('PAR')
+        requested = collection.filterDate(start_date, end_date)
+        return ee.Image(ee.Algorithms.If(requested.size().gt(0), requested.median(), season))
 
-            # APAR
-            apar = fpar.multiply(par).rename('APAR')
+    def get_biomass_layer(
+        self,
+        area_code: str,
+        end_date: str,
+        days_composite: int = 30,
+        dsr_start_date: Optional[str] = None,
+        dsr_end_date: Optional[str] = None
+    ) -> Dict:
+        """
+        Get 3PGs biomass estimation layer
 
-            # GPP
-            gpp = apar.multiply(1.8).rename('GPP')
+        Args:
+            area_code: Study area code
+            end_date: End date in YYYY-MM-DD format
+            days_composite: Number of days for composite
+            dsr_start_date: Start of the solar radiation window
+            dsr_end_date: End of the solar radiation window; without both,
+                the ``DSR_SEASON`` dry season is used
 
-            # NPP (45% of GPP)
-            npp = gpp.multiply(0.45).rename('NPP')
+        Returns:
+            Dictionary with tile URLs for NDVI and biomass layers
+        """
+        area = self.get_study_area(area_code)
 
-            # Biomass (carbon to biomass factor = 2.5)
-            bm = npp.multiply(2.5).rename('BM')
+        # Calculate dates
+        end = ee.Date(end_date)
+        start = end.advance(-days_composite, 'day')
 
-            # Biomass TUM equation
-            bmt = img.expression(
+        # MODIS data processing functions
+        def compute_indices(img):
+            ndvi = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('NDVI')
+
+            # Biomass TUM equation; not monotonic in NDVI, so it is evaluated
+            # per image rather than on the median
+            bmt = ndvi.expression(
                 '7.25923 * pow(NDVI, 3) - 13.419 * pow(NDVI, 2) + 6.4542 * NDVI - 0.2305',
-                {'NDVI': img.select('NDVI')}
+                {'NDVI': ndvi}
             ).rename('BMT')
 
-            return img.addBands([fpar, dsr24hr, par, apar, gpp, npp, bm, bmt])
+            return ndvi.addBands(bmt)
 
-        # Get MODIS data
-        modis_data = ee.ImageCollection('MODIS/061/MOD09GA') \
+        # Median NDVI and BMT composite, reprojected once to UTM 47N
+        composite = ee.ImageCollection('MODIS/061/MOD09GA') \
             .filterDate(start, end) \
             .filterBounds(area) \
-            .map(reproject_image) \
-            .map(compute_ndvi_modis) \
-            .map(compute_biomass)
-
-        # Get median values
-        ndvi_median = modis_data.select('NDVI').median().clip(area)
-        bm_median = modis_data.select('BM').median().clip(area)
-        bmt_median = modis_data.select('BMT').median().clip(area)
+            .map(compute_indices) \
+            .median() \
+            .reproject(crs="EPSG:32647", scale=500) \
+            .clip(area)
 
-        # Calculate statistics
-        ndvi_stats = ndvi_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
+        # Solar radiation composite, built once
+        solar_rad = self.get_dsr_composite(area, dsr_start_date, dsr_end_date)
 
-        bm_stats = bm_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
-
-        bmt_stats = bmt_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
+        # Get median values
+        ndvi_median = composite.select('NDVI')
+        bm_median = self.compute_3pgs_biomass(ndvi_median, solar_rad)
+        bmt_median = composite.select('BMT')
+
+        # Calculate statistics of all three bands and bounds in one request
+        results = self.evaluate_layer(area_code, area, {
+            'stats': ndvi_median.addBands([bm_median, bmt_median]).reduceRegion(
+                reducer=ee.Reducer.minMax(),
+                geometry=area,
+                scale=500,
+                bestEffort=True
+            )
+        })
+        stats = results['stats']
+        ndvi_stats = {k: v for k, v in stats.items() if k.startswith('NDVI_')}
+        bm_stats = {k: v for k, v in stats.items() if k.startswith('BM_')}
+        bmt_stats = {k: v for k, v in stats.items() if k.startswith('BMT_')}
 
         # Visualization parameters
         ndvi_vis = {
@@ -401,12 +567,9 @@ class GEEService:
         }
 
         # Get map IDs
-        ndvi_map_id = ndvi_median.getMapId(ndvi_vis)
-        bm_map_id = bm_median.getMapId(bm_vis)
-        bmt_map_id = bmt_median.getMapId(bmt_vis)
-
-        # Get bounds
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        ndvi_map_id = self.get_map_id(ndvi_median, ndvi_vis)
+        bm_map_id = self.get_map_id(bm_median, bm_vis)
+        bmt_map_id = self.get_map_id(bmt_median, bmt_vis)
 
         return {
             'ndvi': {
@@ -424,7 +587,7 @@ class GEEService:
                 'vis_params': bmt_vis,
                 'stats': bmt_stats
             },
-            'bounds': bounds
+            'bounds': results['bounds']
         }
 
     def get_ndvi_layer(
@@ -446,12 +609,15 @@ class GEEService:
         ndvi_collection = dataset.map(lambda img: self.compute_ndvi(img, area))
         ndvi_median = ndvi_collection.select('NDVI').median()
 
-        stats = ndvi_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
+        results = self.evaluate_layer(area_code, area, {
+            'stats': ndvi_median.reduceRegion(
+                reducer=ee.Reducer.minMax(),
+                geometry=area,
+                scale=500,
+                bestEffort=True
+            )
+        })
+        stats = results['stats']
 
         vis_params = {
             'min': stats.get('NDVI_min', 0),
@@ -459,13 +625,12 @@ class GEEService:
             'palette': self.PALETTES['ndvi']
         }
 
-        map_id = ndvi_median.getMapId(vis_params)
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        map_id = self.get_map_id(ndvi_median, vis_params)
 
         return {
             'tile_url': map_id['tile_fetcher'].url_format,
             'vis_params': vis_params,
-            'bounds': bounds,
+            'bounds': results['bounds'],
             'stats': stats
         }
 
@@ -488,12 +653,15 @@ class GEEService:
         ndwi_collection = dataset.map(lambda img: self.compute_ndwi(img, area))
         ndwi_median = ndwi_collection.select('NDWI').median()
 
-        stats = ndwi_median.reduceRegion(
-            reducer=ee.Reducer.minMax(),
-            geometry=area,
-            scale=500,
-            bestEffort=True
-        ).getInfo()
+        results = self.evaluate_layer(area_code, area, {
+            'stats': ndwi_median.reduceRegion(
+                reducer=ee.Reducer.minMax(),
+                geometry=area,
+                scale=500,
+                bestEffort=True
+            )
+        })
+        stats = results['stats']
 
         vis_params = {
             'min': stats.get('NDWI_min', -0.5),
@@ -501,35 +669,196 @@ class GEEService:
             'palette': self.PALETTES['ndwi']
         }
 
-        map_id = ndwi_median.getMapId(vis_params)
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        map_id = self.get_map_id(ndwi_median, vis_params)
 
         return {
             'tile_url': map_id['tile_fetcher'].url_format,
             'vis_params': vis_params,
-            'bounds': bounds,
+            'bounds': results['bounds'],
             'stats': stats
         }
 
-    def get_flood_layer(
+    def get_indices_layer(
         self,
         area_code: str,
-        before_date: str,
-        after_date: str
+        end_date: str,
+        days_composite: int = 30,
+        indices: Optional[List[str]] = None,
+        cloud_cover: int = 100
     ) -> Dict:
         """
-        Get flood detection layer using Sentinel-1 SAR data
+        Get several Sentinel-2 index layers from one shared composite
+
+        The collection is filtered once and every requested index is
+        computed per image in a single map, so NDVI, NDMI and NDWI share
+        one median composite and one statistics evaluation.
 
         Args:
             area_code: Study area code
-            before_date: Date before flood event (YYYY-MM-DD)
-            after_date: Date after flood event (YYYY-MM-DD)
+            end_date: End date in YYYY-MM-DD format
+            days_composite: Number of days for composite
+            indices: Subset of ndvi, ndmi, ndwi (defaults to all three)
+            cloud_cover: Maximum cloud cover percentage of the scenes used
 
         Returns:
-            Dictionary with tile URL for flooded areas
+            Dictionary with tile URL, visualization parameters and stats per index
         """
+        indices = indices or list(self.SPECTRAL_INDICES)
+        for index in indices:
+            if index not in self.SPECTRAL_INDICES:
+                raise ValueError(f"Invalid index: {index}")
+
         area = self.get_study_area(area_code)
 
+        end = ee.Date(end_date)
+        start = end.advance(-days_composite, 'day')
+
+        dataset = ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED') \
+            .filterDate(start, end) \
+            .filterBounds(area) \
+            .filter(ee.Filter.lte('CLOUDY_PIXEL_PERCENTAGE', cloud_cover))
+
+        band_names = [index.upper() for index in indices]
+
+        def compute_indices(img):
+            return ee.Image([
+                img.normalizedDifference(self.SPECTRAL_INDICES[index][0]).rename(index.upper())
+                for index in indices
+            ])
+
+        composite = dataset.map(compute_indices).median().clip(area)
+
+        results = self.evaluate_layer(area_code, area, {
+            'stats': composite.reduceRegion(
+                reducer=ee.Reducer.minMax(),
+                geometry=area,
+                scale=500,
+                bestEffort=True
+            )
+        })
+        stats = results['stats']
+
+        layers = {}
+        for index, band in zip(indices, band_names):
+            _, default_min, default_max = self.SPECTRAL_INDICES[index]
+            index_stats = {k: v for k, v in stats.items() if k.startswith(f'{band}_')}
+            vis_params = {
+                'min': index_stats.get(f'{band}_min', default_min),
+                'max': index_stats.get(f'{band}_max', default_max),
+                'palette': self.PALETTES[index]
+            }
+            map_id = self.get_map_id(composite.select(band), vis_params)
+            layers[index] = {
+                'tile_url': map_id['tile_fetcher'].url_format,
+                'vis_params': vis_params,
+                'stats': index_stats
+            }
+
+        return {
+            'layers': layers,
+            'bounds': results['bounds']
+        }
+
+    def get_index_timeseries(
+        self,
+        area_code: str,
+        ranges: List[Tuple[str, str]],
+        cloud_cover: int = 100,
+        scale: int = 100
+    ) -> List[Dict]:
+        """
+        Daily mean NDVI, NDMI and NDWI over a study area
+
+        Images acquired on the same day are averaged, then reduced to one
+        mean per index over the area, like the "Daily Charts" panel of
+        gee/ndmi.js. Every date range is built server-side and all of them
+        are fetched in a single evaluation.
+
+        Args:
+            area_code: Study area code
+            ranges: Inclusive (start, end) date pairs in YYYY-MM-DD format
+            cloud_cover: Maximum cloud cover percentage of the scenes used
+            scale: Reduction scale in metres
+
+        Returns:
+            Rows of {'date', 'ndvi', 'ndmi', 'ndwi'} sorted by date
+        """
+        area = self.get_study_area(area_code)
+        geometry = area.geometry()
+        bands = [index.upper() for index in self.SPECTRAL_INDICES]
+
+        def compute_indices(img):
+            return ee.Image([
+                img.normalizedDifference(self.SPECTRAL_INDICES[index][0]).rename(index.upper())
+                for index in self.SPECTRAL_INDICES
+            ]).set('date', ee.Date(img.get('system:time_start')).format('YYYY-MM-dd'))
+
+        def daily_means(start_date: str, end_date: str) -> ee.List:
+            collection = ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED') \
+                .filterDate(ee.Date(start_date), ee.Date(end_date).advance(1, 'day')) \
+                .filterBounds(area) \
+                .filter(ee.Filter.lte('CLOUDY_PIXEL_PERCENTAGE', cloud_cover)) \
+                .map(compute_indices)
+
+            def reduce_day(date):
+                means = collection.filter(ee.Filter.eq('date', date)).mean().reduceRegion(
+                    reducer=ee.Reducer.mean(),
+                    geometry=geometry,
+                    scale=scale,
+                    bestEffort=True
+                )
+                return ee.Dictionary(means).set('date', date)
+
+            return collection.aggregate_array('date').distinct().sort().map(reduce_day)
+
+        results = self.evaluate({
+            f'range_{i}': daily_means(start_date, end_date)
+            for i, (start_date, end_date) in enumerate(ranges)
+        })
+
+        rows = []
+        for i in range(len(ranges)):
+            for day in results.get(f'range_{i}') or []:
+                rows.append({
+                    'date': day['date'],
+                    **{band.lower(): day.get(band) for band in bands}
+                })
+        return sorted(rows, key=lambda row: row['date'])
+
+    def build_flood_mask(self, area: ee.FeatureCollection) -> ee.Image:
+        """
+        Static mask of where floods are mapped: 1 off permanent water on gentle slopes
+
+        Depends only on the study area, so it is exported once per area
+        (``python -m app.services.flood_mask export``) and read back as an
+        asset by ``get_flood_mask``.
+        """
+        # Mask permanent water bodies using JRC Global Surface Water; pixels
+        # never observed as water have no occurrence and count as land
+        gsw = ee.Image('JRC/GSW1_4/GlobalSurfaceWater')
+        not_permanent_water = gsw.select('occurrence').gt(80).unmask(0).Not()
+
+        # Mask steep slopes (< 5 degrees from flood.js)
+        srtm = ee.Image('USGS/SRTMGL1_003')
+        gentle_slope = ee.Terrain.slope(srtm).lt(5)
+
+        return not_permanent_water.And(gentle_slope).rename('flood_mask').toByte().clip(area)
+
+    def get_flood_mask(self, area_code: str, area: ee.FeatureCollection) -> ee.Image:
+        """Exported static flood mask of a study area, or the same mask built inline"""
+        asset_id = study_area_registry.flood_mask(area_code)
+        if asset_id:
+            return ee.Image(asset_id)
+        return self.build_flood_mask(area)
+
+    def get_flood_image(
+        self,
+        area_code: str,
+        area: ee.FeatureCollection,
+        before_date: str,
+        after_date: str
+    ) -> ee.Image:
+        """Flooded-pixel image of a study area from the Sentinel-1 VH change"""
         # Sentinel-1 GRD collection
         s1_collection = ee.ImageCollection('COPERNICUS/S1_GRD') \
             .filter(ee.Filter.listContains('transmitterReceiverPolarisation', 'VH')) \
@@ -553,18 +882,80 @@ class GEEService:
         difference = after_image.subtract(before_image)
 
         # Threshold for flood detection (-5.5 dB from flood.js)
-        flood_threshold = -5.5
-        flooded = difference.lt(flood_threshold)
+        flooded = difference.lt(self.FLOOD_THRESHOLD)
 
-        # Mask permanent water bodies using JRC Global Surface Water
-        gsw = ee.Image('JRC/GSW1_4/GlobalSurfaceWater')
-        permanent_water = gsw.select('occurrence').gt(80)
-        flooded_masked = flooded.where(permanent_water, 0)
+        # Drop permanent water and steep slopes
+        return flooded.multiply(self.get_flood_mask(area_code, area))
 
-        # Mask steep slopes (< 5 degrees from flood.js)
-        srtm = ee.Image('USGS/SRTMGL1_003')
-        slope = ee.Terrain.slope(srtm)
-        flooded_final = flooded_masked.updateMask(slope.lt(5))
+    def flooded_area(self, area: ee.FeatureCollection, flooded: ee.Image, scale: int) -> ee.Dictionary:
+        """Server-side flooded area (m²) at ``scale`` metres"""
+        return flooded.multiply(ee.Image.pixelArea()).reduceRegion(
+            reducer=ee.Reducer.sum(),
+            geometry=area,
+            scale=scale,
+            maxPixels=1e13,
+            bestEffort=True
+        )
+
+    def evaluate_flood_statistics(
+        self,
+        area_code: str,
+        area: ee.FeatureCollection,
+        flooded: ee.Image,
+        approximate: bool = False
+    ) -> Tuple[Dict, List]:
+        """
+        Evaluate the flooded area in km², exactly at 10 m or approximately
+
+        The approximate area is reduced at the first of
+        ``APPROXIMATE_SCALES``; its ``flood_area_error`` is the difference
+        to the coarser second scale.
+
+        Returns:
+            Statistics and study-area bounds
+        """
+        if not approximate:
+            results = self.evaluate_layer(area_code, area, {
+                'stats': self.flooded_area(area, flooded, 10)
+            })
+            return {'flood_area': (results['stats'].get('VH') or 0) / 1000000}, results['bounds']
+
+        scale, coarse_scale = self.APPROXIMATE_SCALES
+        results = self.evaluate_layer(area_code, area, {
+            'stats': self.flooded_area(area, flooded, scale),
+            'coarse_stats': self.flooded_area(area, flooded, coarse_scale)
+        })
+        flooded_area_km2 = (results['stats'].get('VH') or 0) / 1000000
+        coarse_area_km2 = (results['coarse_stats'].get('VH') or 0) / 1000000
+        return {
+            'flood_area': flooded_area_km2,
+            'flood_area_error': round(abs(flooded_area_km2 - coarse_area_km2), 2),
+            'approximate': True,
+            'scale': scale
+        }, results['bounds']
+
+    def get_flood_layer(
+        self,
+        area_code: str,
+        before_date: str,
+        after_date: str,
+        approximate: bool = False
+    ) -> Dict:
+        """
+        Get flood detection layer using Sentinel-1 SAR data
+
+        Args:
+            area_code: Study area code
+            before_date: Date before flood event (YYYY-MM-DD)
+            after_date: Date after flood event (YYYY-MM-DD)
+            approximate: Reduce the flooded area at a coarse scale, with an
+                error estimate, instead of at 10 m
+
+        Returns:
+            Dictionary with tile URL for flooded areas
+        """
+        area = self.get_study_area(area_code)
+        flooded_final = self.get_flood_image(area_code, area, before_date, after_date)
 
         # Visualization parameters - blue for flooded areas
         vis_params = {
@@ -574,29 +965,40 @@ class GEEService:
         }
 
         # Calculate flooded area in km²
-        area_image = flooded_final.multiply(ee.Image.pixelArea())
-        stats = area_image.reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=area,
-            scale=10,
-            maxPixels=1e13,
-            bestEffort=True
-        ).getInfo()
-
-        flooded_area_m2 = stats.get('VH', 0)
-        flooded_area_km2 = flooded_area_m2 / 1000000
+        statistics, bounds = self.evaluate_flood_statistics(area_code, area, flooded_final, approximate)
 
         # Get map ID
-        map_id = flooded_final.selfMask().getMapId(vis_params)
-
-        # Get bounds
-        bounds = area.geometry().bounds().getInfo()['coordinates'][0]
+        map_id = self.get_map_id(flooded_final.selfMask(), vis_params)
 
         return {
             'tile_url': map_id['tile_fetcher'].url_format,
             'vis_params': vis_params,
             'bounds': bounds,
-            'flood_area': flooded_area_km2,
-            'difference': flood_threshold,
+            **statistics,
+            'difference': self.FLOOD_THRESHOLD,
             'confidence': 85  # High confidence for SAR-based detection
         }
+
+    def get_flood_statistics(
+        self,
+        area_code: str,
+        before_date: str,
+        after_date: str,
+        approximate: bool = False
+    ) -> Dict:
+        """
+        Get only the flooded area in km², without map tiles
+
+        Args:
+            area_code: Study area code
+            before_date: Date before flood event (YYYY-MM-DD)
+            after_date: Date after flood event (YYYY-MM-DD)
+            approximate: Reduce at a coarse scale with an error estimate
+
+        Returns:
+            Dictionary with the ``flood_area`` of ``get_flood_layer``
+        """
+        area = self.get_study_area(area_code)
+        flooded = self.get_flood_image(area_code, area, before_date, after_date)
+        statistics, _ = self.evaluate_flood_statistics(area_code, area, flooded, approximate)
+        return {**statistics, 'approximate': approximate}
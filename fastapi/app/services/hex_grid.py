@@ -0,0 +1,151 @@
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# WGS84 ellipsoid and UTM constants
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+UTM_K0 = 0.9996
+
+# The hexagon grid's left/top/right/bottom are in UTM zone 47N (EPSG:32647)
+DEFAULT_UTM_ZONE = 47
+
+
+def to_utm(lon: np.ndarray, lat: np.ndarray, zone: int = DEFAULT_UTM_ZONE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized WGS84 -> UTM (northern hemisphere) projection
+
+    Transverse Mercator series from Snyder, "Map Projections: A Working
+    Manual" (1987); sub-metre within the zone.
+    """
+    e2 = WGS84_F * (2 - WGS84_F)
+    ep2 = e2 / (1 - e2)
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    lam0 = math.radians(zone * 6 - 183)
+
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    n = WGS84_A / np.sqrt(1 - e2 * sin_phi ** 2)
+    t = np.tan(phi) ** 2
+    c = ep2 * cos_phi ** 2
+    a = cos_phi * (lam - lam0)
+    m = WGS84_A * (
+        (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256) * phi
+        - (3 * e2 / 8 + 3 * e2 ** 2 / 32 + 45 * e2 ** 3 / 1024) * np.sin(2 * phi)
+        + (15 * e2 ** 2 / 256 + 45 * e2 ** 3 / 1024) * np.sin(4 * phi)
+        - (35 * e2 ** 3 / 3072) * np.sin(6 * phi)
+    )
+
+    x = UTM_K0 * n * (
+        a + (1 - t + c) * a ** 3 / 6
+        + (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * a ** 5 / 120
+    ) + 500000.0
+    y = UTM_K0 * (m + n * np.tan(phi) * (
+        a ** 2 / 2 + (5 - t + 9 * c + 4 * c ** 2) * a ** 4 / 24
+        + (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * a ** 6 / 720
+    ))
+    return x, y
+
+
+class HexGrid:
+    """
+    Point-to-hexagon lookup by grid arithmetic
+
+    The grid is flat-topped hexagons addressed by ``col_index`` and
+    ``row_index``, with every other column shifted by half a row. The
+    spacing and origin are recovered from the features' projected
+    ``left``/``top``/``right``/``bottom`` extents. A point is assigned to
+    the nearer of the two candidate column centres, which for a regular
+    hexagon tiling is exactly the hexagon containing it.
+
+    Hexagons cut by a province boundary appear once per province with the
+    same cell; points are counted per cell and reported for each of them.
+    """
+
+    def __init__(self, features: List[Dict], utm_zone: int = DEFAULT_UTM_ZONE):
+        self.utm_zone = utm_zone
+        rows = []
+        for index, feature in enumerate(features):
+            properties = feature.get("properties") or {}
+            try:
+                rows.append((
+                    index,
+                    float(properties["left"]), float(properties["top"]),
+                    float(properties["right"]), float(properties["bottom"]),
+                    int(properties["row_index"]), int(properties["col_index"])
+                ))
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not rows:
+            raise ValueError("Hexagon features have no left/top/right/bottom/row_index/col_index")
+
+        table = np.array(rows, dtype=np.float64)
+        feature_index = table[:, 0].astype(np.int64)
+        left, top, right, bottom = table[:, 1], table[:, 2], table[:, 3], table[:, 4]
+        row, col = table[:, 5].astype(np.int64), table[:, 6].astype(np.int64)
+
+        self.count = len(features)
+        self.radius = float(np.median(right - left)) / 2
+        self.col_spacing = 1.5 * self.radius
+        self.row_spacing = float(np.median(top - bottom))
+
+        centre_x = (left + right) / 2
+        centre_y = (top + bottom) / 2
+        self.origin_x = float(np.median(centre_x - col * self.col_spacing))
+        # Centre y of row 0, for even and odd columns
+        origin_y = []
+        for parity in (0, 1):
+            selected = col % 2 == parity
+            if selected.any():
+                origin_y.append(float(np.median(centre_y[selected] + row[selected] * self.row_spacing)))
+            else:
+                origin_y.append(None)
+        if origin_y[0] is None:
+            origin_y[0] = origin_y[1] + self.row_spacing / 2
+        if origin_y[1] is None:
+            origin_y[1] = origin_y[0] - self.row_spacing / 2
+        self.origin_y = np.array(origin_y)
+
+        self.row_min, self.col_min = int(row.min()), int(col.min())
+        self.shape = (int(row.max()) - self.row_min + 1, int(col.max()) - self.col_min + 1)
+        cells = (row - self.row_min) * self.shape[1] + (col - self.col_min)
+        self.occupied = np.zeros(self.shape[0] * self.shape[1], dtype=bool)
+        self.occupied[cells] = True
+        self.feature_cells = np.full(self.count, -1, dtype=np.int64)
+        self.feature_cells[feature_index] = cells
+
+    def locate(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Grid cell of the hexagon containing each point (-1 outside the grid)"""
+        x, y = to_utm(lon, lat, self.utm_zone)
+
+        best_col = best_row = best_dist = None
+        base = np.floor((x - self.origin_x) / self.col_spacing).astype(np.int64)
+        for offset in (0, 1):
+            col = base + offset
+            origin_y = self.origin_y[col % 2]
+            row = np.rint((origin_y - y) / self.row_spacing).astype(np.int64)
+            dist = (x - (self.origin_x + col * self.col_spacing)) ** 2 + (y - (origin_y - row * self.row_spacing)) ** 2
+            if best_dist is None:
+                best_col, best_row, best_dist = col, row, dist
+            else:
+                closer = dist < best_dist
+                best_col = np.where(closer, col, best_col)
+                best_row = np.where(closer, row, best_row)
+                best_dist = np.where(closer, dist, best_dist)
+
+        r = best_row - self.row_min
+        c = best_col - self.col_min
+        inside = (r >= 0) & (r < self.shape[0]) & (c >= 0) & (c < self.shape[1])
+        cells = np.where(inside, r * self.shape[1] + c, -1)
+        cells[inside] = np.where(self.occupied[cells[inside]], cells[inside], -1)
+        return cells
+
+    def bin(self, lon: np.ndarray, lat: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Number of points in each feature's hexagon, and the number inside the grid"""
+        cells = self.locate(lon, lat)
+        cells = cells[cells >= 0]
+        cell_counts = np.bincount(cells, minlength=len(self.occupied))
+        counts = np.where(self.feature_cells >= 0, cell_counts[self.feature_cells], 0)
+        return counts, len(cells)
@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.services.content_encoding import negotiate
+from app.services.hex_grid import HexGrid
+from app.services.hexagon_tiles import HexagonTiler
+from app.services.hexagon_values import HexagonValues
+from app.services.topojson import encode_topology, round_geojson
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Base path for geojson data (files are in fastapi root)
+HPPREDICT_PATH = "/app"
+
+DEFAULT_PREDICTIONS_PATH = os.path.join(HPPREDICT_PATH, "hex_forest_pro_4326_predict.geojson")
+
+
+def compress_body(body: bytes) -> Dict[str, bytes]:
+    """A body in every content encoding we can serve"""
+    encoded = {
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9)
+    }
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return encoded
+
+
+def month_key(date: str) -> str:
+    """Property name of a prediction month, e.g. 2025-01 -> pred_2025_01"""
+    return f"pred_{date.replace('-', '_')}"
+
+
+def parse_predictions(value) -> List[Dict]:
+    """Prediction list of a feature, whether stored as a JSON string or a list"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+class HexagonPayload:
+    """One loaded version of the hexagon predictions file"""
+
+    def __init__(self, geojson: Dict, mtime: float, size: int):
+        self.geojson = geojson
+        self.features: List[Dict] = geojson.get("features") or []
+        self.mtime = mtime
+        self.size = size
+        self.body = json.dumps(geojson, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.encoded = compress_body(self.body)
+        self._variants: Dict[Tuple[str, Optional[int]], Dict[str, bytes]] = {}
+        self._tiler: Optional[HexagonTiler] = None
+        self._values: Optional[HexagonValues] = None
+        self._grid: Optional[HexGrid] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tiler(self) -> HexagonTiler:
+        """Vector tiler for this version, built on first use"""
+        with self._lock:
+            if self._tiler is None:
+                self._tiler = HexagonTiler(self.features)
+            return self._tiler
+
+    @property
+    def values(self) -> HexagonValues:
+        """Columnar prediction table for this version, built on first use"""
+        with self._lock:
+            if self._values is None:
+                self._values = HexagonValues(self.features)
+            return self._values
+
+    @property
+    def grid(self) -> HexGrid:
+        """Point-to-hexagon lookup for this version, built on first use"""
+        with self._lock:
+            if self._grid is None:
+                self._grid = HexGrid(self.features)
+            return self._grid
+
+    def variant(self, format: str = "geojson", precision: Optional[int] = None) -> Dict[str, bytes]:
+        """
+        Encoded bodies of this version in another format or precision
+
+        ``format`` is "geojson" or "topojson"; ``precision`` is the number
+        of coordinate decimals kept (topojson defaults to 6). Each variant
+        is built and compressed once per file version.
+        """
+        if format == "geojson" and precision is None:
+            return self.encoded
+        if format == "topojson" and precision is None:
+            precision = 6
+
+        key = (format, precision)
+        with self._lock:
+            if key not in self._variants:
+                if format == "topojson":
+                    data = encode_topology(self.geojson, precision, object_name="hexagons")
+                else:
+                    data = round_geojson(self.geojson, precision)
+                body = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+                self._variants[key] = compress_body(body)
+            return self._variants[key]
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Best available encoding for an Accept-Encoding header"""
+        return negotiate(accept_encoding, [encoding for encoding in ("br", "gzip") if encoding in self.encoded])
+
+
+class HexagonStore:
+    """
+    Hexagon predictions flattened once per file version
+
+    Each feature's ``predictions`` list is expanded into ``pred_YYYY_MM``
+    properties on load, so clients no longer parse and expand it
+    themselves. The flattened file is serialized and compressed once and
+    reloaded only when the file on disk changes.
+    """
+
+    def __init__(self, path: str = DEFAULT_PREDICTIONS_PATH):
+        self.path = path
+        self._payload: Optional[HexagonPayload] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def flatten(geojson: Dict) -> Dict:
+        """Add one pred_YYYY_MM property per prediction month to every feature"""
+        for feature in geojson.get("features") or []:
+            properties = feature.setdefault("properties", {}) or {}
+            for prediction in parse_predictions(properties.get("predictions")):
+                date = prediction.get("date")
+                if date:
+                    properties[month_key(str(date))] = prediction.get("predicted_hotspot_count")
+        geojson["flattened"] = True
+        return geojson
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def get(self) -> HexagonPayload:
+        """Current payload, reloading it if the file changed since the last load"""
+        stat = os.stat(self.path)
+        payload = self._payload
+        if payload is not None and payload.mtime == stat.st_mtime and payload.size == stat.st_size:
+            return payload
+
+        with self._lock:
+            payload = self._payload
+            if payload is None or payload.mtime != stat.st_mtime or payload.size != stat.st_size:
+                with open(self.path, encoding="utf-8") as f:
+                    geojson = json.load(f)
+                payload = HexagonPayload(self.flatten(geojson), stat.st_mtime, stat.st_size)
+                self._payload = payload
+            return payload
+
+
+# Shared store for the hexagon predictions file
+hexagon_store = HexagonStore(os.getenv("HEXAGON_PREDICTIONS_PATH", DEFAULT_PREDICTIONS_PATH))
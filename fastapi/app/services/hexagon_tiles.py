@@ -0,0 +1,159 @@
+import gzip
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.mvt import clip_ring, encode_layer, encode_polygon_geometry, encode_tile, quantize_ring
+
+EARTH_RADIUS = 6378137.0
+ORIGIN_SHIFT = math.pi * EARTH_RADIUS
+
+# Properties kept out of the tiles; the per-month pred_* columns carry the same data
+EXCLUDED_PROPERTIES = {"predictions"}
+
+
+def to_mercator(lon: float, lat: float) -> Tuple[float, float]:
+    """EPSG:4326 -> EPSG:3857 metres"""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = math.radians(lon) * EARTH_RADIUS
+    y = math.log(math.tan(math.pi / 4 + math.radians(lat) / 2)) * EARTH_RADIUS
+    return x, y
+
+
+def polygons_of(geometry: Dict) -> List[List[List]]:
+    """Polygon list (each a list of rings) of a Polygon or MultiPolygon"""
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return [geometry.get("coordinates") or []]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry.get("coordinates") or []
+    return []
+
+
+def tile_attributes(properties: Dict) -> Dict:
+    """Scalar properties that can be stored as MVT attributes"""
+    attributes = {}
+    for key, value in properties.items():
+        if key in EXCLUDED_PROPERTIES or value is None:
+            continue
+        if isinstance(value, float) and value.is_integer() and abs(value) < 2 ** 53:
+            value = int(value)
+        if isinstance(value, (bool, int, float, str)):
+            attributes[key] = value
+    return attributes
+
+
+class HexagonTiler:
+    """
+    Vector tiles cut from the hexagon grid
+
+    Geometries are projected to Web Mercator once; each tile then selects
+    features by bounding box, clips them to the tile (plus a buffer) and
+    quantizes to the tile grid, which simplifies them for the zoom level.
+    Encoded tiles are gzip-compressed and kept in an LRU cache.
+    """
+
+    def __init__(
+        self,
+        features: List[Dict],
+        layer_name: str = "hexagons",
+        extent: int = 4096,
+        buffer: int = 64,
+        cache_size: int = 4096
+    ):
+        self.layer_name = layer_name
+        self.extent = extent
+        self.buffer = buffer
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._ids: List[Optional[int]] = []
+        self._polygons: List[List[List[List[Tuple[float, float]]]]] = []
+        self._attributes: List[Dict] = []
+        bboxes = []
+        for index, feature in enumerate(features):
+            polygons = [
+                [[to_mercator(lon, lat) for lon, lat, *_ in ring] for ring in polygon]
+                for polygon in polygons_of(feature.get("geometry"))
+            ]
+            points = [point for polygon in polygons for ring in polygon for point in ring]
+            if not points:
+                continue
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            bboxes.append((min(xs), min(ys), max(xs), max(ys)))
+
+            properties = feature.get("properties") or {}
+            feature_id = properties.get("id", index)
+            self._ids.append(int(feature_id) if isinstance(feature_id, (int, float)) and feature_id >= 0 else index)
+            self._polygons.append(polygons)
+            self._attributes.append(tile_attributes(properties))
+
+        self._bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+
+    @staticmethod
+    def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+        """Web Mercator bounds (minx, miny, maxx, maxy) of a tile"""
+        size = 2 * ORIGIN_SHIFT / (1 << z)
+        minx = -ORIGIN_SHIFT + x * size
+        maxy = ORIGIN_SHIFT - y * size
+        return minx, maxy - size, minx + size, maxy
+
+    def _render(self, z: int, x: int, y: int) -> bytes:
+        minx, miny, maxx, maxy = self.tile_bounds(z, x, y)
+        scale = self.extent / (maxx - minx)
+        margin = self.buffer / scale
+
+        if len(self._bboxes):
+            hits = np.nonzero(
+                (self._bboxes[:, 0] <= maxx + margin) & (self._bboxes[:, 2] >= minx - margin) &
+                (self._bboxes[:, 1] <= maxy + margin) & (self._bboxes[:, 3] >= miny - margin)
+            )[0]
+        else:
+            hits = []
+
+        features = []
+        for i in hits:
+            polygons = []
+            for polygon in self._polygons[i]:
+                rings = []
+                for ring_index, ring in enumerate(polygon):
+                    pixels = [((px - minx) * scale, (maxy - py) * scale) for px, py in ring[:-1]]
+                    clipped = clip_ring(pixels, -self.buffer, self.extent + self.buffer)
+                    quantized = quantize_ring(clipped)
+                    if len(quantized) >= 3:
+                        rings.append(quantized)
+                    elif ring_index == 0:
+                        break
+                if rings:
+                    polygons.append(rings)
+            if polygons:
+                features.append((self._ids[i], encode_polygon_geometry(polygons), self._attributes[i]))
+
+        if not features:
+            return b""
+        return encode_tile([encode_layer(self.layer_name, features, self.extent)])
+
+    def tile(self, z: int, x: int, y: int) -> bytes:
+        """Gzip-compressed MVT for a tile (empty bytes when nothing intersects it)"""
+        key = (z, x, y)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        data = self._render(z, x, y)
+        data = gzip.compress(data, compresslevel=6) if data else b""
+
+        with self._lock:
+            self._cache[key] = data
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
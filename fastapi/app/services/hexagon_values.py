@@ -0,0 +1,126 @@
+import gzip
+import json
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Magic bytes at the start of the binary values payload
+BINARY_MAGIC = b"HXV1"
+
+
+class HexagonValues:
+    """
+    Prediction counts of the hexagon grid as a columnar table
+
+    Built once per file version: one int32 array of hexagon ids and one
+    float32 column per prediction month (NaN where a hexagon has no
+    value). Month slices are served straight from these arrays, so the
+    geometry never has to be re-sent when only the month changes.
+
+    Binary layout (little-endian)::
+
+        "HXV1" | uint32 header length | JSON header | padding to 4 bytes
+        int32 ids[count] | float32 values[count] per requested month
+    """
+
+    def __init__(self, features: List[Dict], cache_size: int = 64):
+        months = set()
+        rows: List[Dict[str, float]] = []
+        ids = []
+        for index, feature in enumerate(features):
+            properties = feature.get("properties") or {}
+            feature_id = properties.get("id", index)
+            ids.append(int(feature_id) if isinstance(feature_id, (int, float)) else index)
+
+            row = {}
+            for key, value in properties.items():
+                if key.startswith("pred_") and isinstance(value, (int, float)):
+                    month = key[len("pred_"):].replace("_", "-")
+                    row[month] = value
+                    months.add(month)
+            rows.append(row)
+
+        self.ids = np.asarray(ids, dtype="<i4")
+        self.months: List[str] = sorted(months)
+        self._month_index = {month: i for i, month in enumerate(self.months)}
+        self.values = np.full((len(self.months), len(ids)), np.nan, dtype="<f4")
+        for column, row in enumerate(rows):
+            for month, value in row.items():
+                self.values[self._month_index[month], column] = value
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple[str, tuple[str, ...]], Dict[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    def resolve(self, months: Optional[Sequence[str]]) -> List[str]:
+        """
+        Normalize requested months (YYYY-MM or YYYY-MM-DD) to known ones
+
+        Raises:
+            KeyError: If a month has no predictions
+        """
+        if not months:
+            return list(self.months)
+        resolved = []
+        for month in months:
+            month = month.strip()[:7]
+            if month not in self._month_index:
+                raise KeyError(month)
+            if month not in resolved:
+                resolved.append(month)
+        return resolved
+
+    def column(self, month: str) -> np.ndarray:
+        return self.values[self._month_index[month]]
+
+    def to_json(self, months: List[str]) -> bytes:
+        """Columnar JSON: ids plus one value list per month (null = no value)"""
+        def as_list(column: np.ndarray) -> List[Optional[float]]:
+            return [None if np.isnan(v) else round(float(v), 3) for v in column]
+
+        return json.dumps({
+            "count": self.count,
+            "months": months,
+            "ids": self.ids.tolist(),
+            "values": {month: as_list(self.column(month)) for month in months}
+        }, separators=(",", ":")).encode("utf-8")
+
+    def to_binary(self, months: List[str]) -> bytes:
+        """Typed-array payload, see the class docstring for the layout"""
+        header = json.dumps({
+            "count": self.count,
+            "months": months,
+            "ids": "int32",
+            "values": "float32",
+            "missing": "NaN"
+        }, separators=(",", ":")).encode("utf-8")
+        header += b" " * (-(len(BINARY_MAGIC) + 4 + len(header)) % 4)
+
+        parts = [BINARY_MAGIC, struct.pack("<I", len(header)), header, self.ids.tobytes()]
+        parts += [self.column(month).tobytes() for month in months]
+        return b"".join(parts)
+
+    def encode(self, months: List[str], format: str = "json") -> Dict[str, bytes]:
+        """Encoded month slice by content encoding, cached per (format, months)"""
+        key = (format, tuple(months))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        body = self.to_binary(months) if format == "binary" else self.to_json(months)
+        data = {"identity": body, "gzip": gzip.compress(body, compresslevel=6)}
+
+        with self._lock:
+            self._cache[key] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
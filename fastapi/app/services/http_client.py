@@ -0,0 +1,35 @@
+import os
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    App-lifetime HTTP client for upstream services
+
+    One client is shared by every request so TLS sessions and keep-alive
+    connections are reused instead of being set up per call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv("HTTP_TIMEOUT", "30")), connect=10.0),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+            ),
+            follow_redirects=True
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,495 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.services.cache import layer_cache
+from app.services.executor import gee_executor
+from app.services.metrics import RequestTiming, request_timing
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Identifies one server run; gunicorn.conf.py sets it in the master so all
+# its workers share it
+BOOT_ID = os.getenv("APP_BOOT_ID") or uuid.uuid4().hex
+
+
+def process_owner() -> str:
+    """Owner tag of jobs run by this process"""
+    return f"{BOOT_ID}:{os.getpid()}"
+
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """True if ``owner`` is another worker of this server run that is still running"""
+    boot, _, pid = (owner or "").partition(":")
+    if boot != BOOT_ID or not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def flood_args(params: Dict) -> Tuple[str, Tuple]:
+    return "get_flood_layer", (params["area"], params["before_date"], params["after_date"])
+
+
+def burn_scar_args(params: Dict) -> Tuple[str, Tuple]:
+    return "get_burn_scar_layer", (
+        params["area"], params["start_date"], params["end_date"], int(params.get("cloud_cover", 30))
+    )
+
+
+# Job kind -> builds (GEEService method, arguments) from the submitted parameters
+JOB_KINDS: Dict[str, Callable[[Dict], Tuple[str, Tuple]]] = {
+    "flood": flood_args,
+    "burn_scar": burn_scar_args
+}
+
+
+class JobCancelled(Exception):
+    """Raised in the running process when the stored job was cancelled elsewhere"""
+
+
+class JobStore:
+    """
+    SQLite persistence for analysis jobs and their results
+
+    Several worker processes share the file. A unique index allows one
+    pending (queued or running) job per key, and status changes can be
+    made conditional on the job not being finished, so a job cancelled by
+    one process is not overwritten by the process running it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (key, created_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        # Stores from before the unique index may hold duplicate pending jobs;
+        # keep the newest of each
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, error = 'Duplicate of a newer job', finished_at = ?"
+            " WHERE status IN (?, ?) AND EXISTS (SELECT 1 FROM jobs AS newer WHERE newer.key = jobs.key"
+            " AND newer.status IN (?, ?) AND (newer.created_at, newer.id) > (jobs.created_at, jobs.id))",
+            (CANCELLED, time.time(), QUEUED, RUNNING, QUEUED, RUNNING)
+        )
+        self._conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_pending_key ON jobs (key)"
+            f" WHERE status IN ('{QUEUED}', '{RUNNING}')"
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """New connection for a worker process forked after the store was opened"""
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+
+    def insert(self, job: Dict) -> bool:
+        """Add a job; False if another pending job already has its key"""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, params, key, status, result, created_at, started_at, finished_at, owner)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        job["id"], job["kind"], json.dumps(job["params"]), job["key"], job["status"],
+                        json.dumps(job["result"]) if job.get("result") is not None else None,
+                        job["created_at"], job.get("started_at"), job.get("finished_at"), job.get("owner")
+                    )
+                )
+            except sqlite3.IntegrityError:
+                self._conn.rollback()
+                return False
+            self._conn.commit()
+            return True
+
+    def update(self, job_id: str, unfinished_only: bool = False, **fields) -> bool:
+        """
+        Set fields of a job; True if it was updated
+
+        With ``unfinished_only`` a job that already succeeded, failed or was
+        cancelled is left as it is.
+        """
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        condition = "id = ?"
+        params = [*fields.values(), job_id]
+        if unfinished_only:
+            condition += " AND status NOT IN (?, ?, ?)"
+            params += FINISHED
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE jobs SET {assignments} WHERE {condition}", params)
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool) -> Dict:
+        job = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "params": json.loads(row["params"]),
+            "key": row["key"],
+            "status": row["status"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+        if include_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row, include_result) if row else None
+
+    def find_reusable(self, key: str) -> Optional[Dict]:
+        """Newest job for ``key`` that is pending or succeeded"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?, ?)"
+                " ORDER BY created_at DESC LIMIT 1",
+                (key, QUEUED, RUNNING, SUCCEEDED)
+            ).fetchone()
+        return self._to_dict(row, False) if row else None
+
+    def requeue(self, job_id: str, owner: str) -> bool:
+        """Queue again an unfinished job ``owner`` was running; True if it was"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, finished_at = NULL"
+                " WHERE id = ? AND owner = ? AND status IN (?, ?)",
+                (QUEUED, job_id, owner, QUEUED, RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def unfinished(self) -> List[Dict]:
+        """Queued and running jobs, with the ``owner`` process that runs them"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [{**self._to_dict(row, False), "owner": row["owner"]} for row in rows]
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._to_dict(row, False) for row in rows]
+
+    def purge_before(self, cutoff: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+
+class JobManager:
+    """
+    Background runner for long Earth Engine analyses
+
+    Jobs run at most ``max_concurrent`` at a time on the Earth Engine
+    executor with their own, longer timeout, and are persisted so they
+    survive restarts (unfinished jobs are queued again on start). With
+    several worker processes, only the one running ``start()`` recovers
+    jobs: those of stopped processes, every ``recover_interval`` seconds,
+    leaving alone the jobs that live workers are running. A job cancelled
+    from another process is noticed within ``status_poll`` seconds. A job
+    with the same parameters as a pending or succeeded one (within
+    ``reuse_ttl``) returns that job instead of starting another, and a
+    result also lands in the layer cache, so the synchronous endpoint
+    benefits from it too.
+    """
+
+    def __init__(
+        self,
+        gee_service,
+        store: JobStore,
+        max_concurrent: int = 2,
+        timeout: float = 1800,
+        reuse_ttl: float = 24 * 3600,
+        recover_interval: float = 60,
+        status_poll: float = 5
+    ):
+        self.gee_service = gee_service
+        self.store = store
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.reuse_ttl = reuse_ttl
+        self.recover_interval = recover_interval
+        self.status_poll = status_poll
+        self._recovery: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._shutting_down = False
+
+    @classmethod
+    def from_env(cls, gee_service) -> "JobManager":
+        return cls(
+            gee_service,
+            JobStore(os.getenv("JOBS_PATH", os.path.join("cache", "jobs.sqlite"))),
+            max_concurrent=int(os.getenv("JOBS_MAX_CONCURRENT", "2")),
+            timeout=float(os.getenv("JOBS_TIMEOUT", "1800")),
+            reuse_ttl=float(os.getenv("JOBS_REUSE_TTL", str(24 * 3600))),
+            recover_interval=float(os.getenv("JOBS_RECOVER_INTERVAL", "60")),
+            status_poll=float(os.getenv("JOBS_STATUS_POLL", "5"))
+        )
+
+    @staticmethod
+    def resolve(kind: str, params: Dict) -> Tuple[str, Tuple]:
+        """
+        GEEService method and arguments of a job
+
+        Raises:
+            ValueError: If the kind is unknown or a parameter is missing
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}. Valid: {', '.join(JOB_KINDS)}")
+        try:
+            return JOB_KINDS[kind](params)
+        except KeyError as e:
+            raise ValueError(f"Missing parameter for {kind} job: {e.args[0]}")
+
+    def _notify(self, job_id: str):
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _update(self, job_id: str, **fields) -> bool:
+        updated = self.store.update(job_id, **fields)
+        self._notify(job_id)
+        return updated
+
+    async def _set(self, job_id: str, **fields) -> bool:
+        updated = await asyncio.to_thread(self.store.update, job_id, **fields)
+        self._notify(job_id)
+        return updated
+
+    async def _call(self, job_id: str, method: str, args: Tuple) -> Any:
+        """
+        Run the job's Earth Engine call, checking every ``status_poll``
+        seconds whether another process cancelled the job meanwhile
+
+        Raises:
+            JobCancelled: The stored job was cancelled or removed
+        """
+        call = asyncio.ensure_future(
+            gee_executor.run(getattr(self.gee_service, method), *args, timeout=self.timeout)
+        )
+        try:
+            while not (await asyncio.wait({call}, timeout=self.status_poll))[0]:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is None or job["status"] in FINISHED:
+                    raise JobCancelled(job_id)
+            return call.result()
+        finally:
+            call.cancel()
+
+    async def _run(self, job_id: str, method: str, args: Tuple, key: str):
+        request_timing.set(RequestTiming(f"job:{method}", args[0]))
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        try:
+            async with self._semaphore:
+                # Every write is conditional: a job cancelled by another
+                # process keeps its cancelled status
+                if not await self._set(job_id, unfinished_only=True, status=RUNNING, started_at=time.time()):
+                    return
+                result = await self._call(job_id, method, args)
+                await layer_cache.aset(key, result)
+                await self._set(
+                    job_id, unfinished_only=True, status=SUCCEEDED, result=result, finished_at=time.time()
+                )
+        except JobCancelled:
+            self._notify(job_id)
+        except asyncio.CancelledError:
+            # Stopped by shutdown(), not by a user: the job stays unfinished
+            if not self._shutting_down:
+                self._update(job_id, unfinished_only=True, status=CANCELLED, finished_at=time.time())
+            raise
+        except asyncio.TimeoutError:
+            await self._set(
+                job_id, unfinished_only=True, status=FAILED,
+                error=f"Timed out after {self.timeout:.0f}s", finished_at=time.time()
+            )
+        except Exception as e:
+            await self._set(
+                job_id, unfinished_only=True, status=FAILED,
+                error=str(e) or type(e).__name__, finished_at=time.time()
+            )
+        finally:
+            self._tasks.pop(job_id, None)
+
+    def _start(self, job: Dict):
+        method, args = self.resolve(job["kind"], job["params"])
+        self._tasks[job["id"]] = asyncio.create_task(self._run(job["id"], method, args, job["key"]))
+
+    async def submit(self, kind: str, params: Dict) -> Dict:
+        """Queue a job, or return the matching pending/succeeded one"""
+        method, args = self.resolve(kind, params)
+        key = layer_cache.make_key(method, *args)
+
+        while True:
+            existing = await asyncio.to_thread(self.store.find_reusable, key)
+            if existing is not None and (
+                existing["status"] != SUCCEEDED or time.time() - existing["finished_at"] < self.reuse_ttl
+            ):
+                return {**existing, "reused": True}
+
+            now = time.time()
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": params,
+                "key": key,
+                "status": QUEUED,
+                "created_at": now,
+                "owner": process_owner()
+            }
+            cached = await layer_cache.aget(key)
+            if cached is not None:
+                job.update(status=SUCCEEDED, result=cached, started_at=now, finished_at=now)
+            # Another process may have queued the same job since the lookup;
+            # the unique index on pending keys refuses the second one
+            if await asyncio.to_thread(self.store.insert, job):
+                break
+
+        if cached is None:
+            self._start(job)
+        return {**await asyncio.to_thread(self.store.get, job["id"]), "reused": False}
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        return self.store.get(job_id, include_result)
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a queued or running job
+
+        A running Earth Engine call cannot be interrupted; its result is
+        discarded when it completes. Works from any worker process.
+        """
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Another process running the job notices within status_poll seconds
+        await self._set(job_id, unfinished_only=True, status=CANCELLED, finished_at=time.time())
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def events(self, job_id: str, poll_interval: float = 15) -> AsyncIterator[Dict]:
+        """Yield the job's state now and after every change until it finishes"""
+        last = None
+        while True:
+            event = self._events.setdefault(job_id, asyncio.Event())
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None:
+                return
+            state = (job["status"], job["started_at"], job["finished_at"])
+            if state != last:
+                last = state
+                yield job
+            if job["status"] in FINISHED:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def recover(self):
+        """Queue again the unfinished jobs of processes that have stopped"""
+        for job in self.store.unfinished():
+            if job["id"] in self._tasks or owner_alive(job["owner"]):
+                continue
+            if self.store.update(
+                job["id"], unfinished_only=True, status=QUEUED, started_at=None, owner=process_owner()
+            ):
+                self._start(job)
+        purged = self.store.purge_before(time.time() - 30 * 86400)
+        if purged:
+            print(f"✓ Purged {purged} old analysis jobs")
+
+    async def _recover_loop(self):
+        while True:
+            try:
+                self.recover()
+            except Exception as e:
+                print(f"✗ Job recovery failed: {e}")
+            await asyncio.sleep(self.recover_interval)
+
+    def start(self):
+        """Recover unfinished jobs now and then periodically, on the running event loop"""
+        if self._recovery is None:
+            self._recovery = asyncio.create_task(self._recover_loop())
+
+    async def shutdown(self):
+        """Stop running jobs; they stay queued in the store and resume on restart"""
+        self._shutting_down = True
+        if self._recovery is not None:
+            self._recovery.cancel()
+            self._recovery = None
+        tasks = list(self._tasks.items())
+        self._tasks.clear()
+        for _, task in tasks:
+            task.cancel()
+        for job_id, task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.store.requeue(job_id, process_owner())
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self._tasks),
+            "max_concurrent": self.max_concurrent,
+            "timeout_seconds": self.timeout
+        }
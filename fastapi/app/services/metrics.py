@@ -0,0 +1,399 @@
+"""
+Request and Earth Engine call metrics
+
+Remote Earth Engine calls (``getInfo``, ``getMapId``, tile fetches) are
+timed with ``timed(op)`` and attributed to the endpoint and study area of
+the request that made them through a context variable, which the GEE
+executor carries into its worker threads. The results are exposed in the
+Prometheus text format at ``/metrics`` and per request in a
+``Server-Timing`` header, visible in the browser devtools.
+
+Under gunicorn each worker process counts its own requests, and a scrape
+reaches only one of them. With ``METRICS_MULTIPROC_DIR`` set (gunicorn.conf.py
+does), every worker writes its metrics to that directory every
+``METRICS_FLUSH_INTERVAL`` seconds and on shutdown, ``/metrics`` adds up
+those of all workers, and the master folds the files of exited workers into
+one archive so the totals survive worker recycling.
+"""
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+
+from app.services.study_areas import study_area_registry
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+# Ops that are a network round-trip to Earth Engine
+REMOTE_OPS = ("getInfo", "getMapId", "tile")
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def values(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(values: Dict[Tuple, float], entries: List):
+        """Add snapshot entries (``[labels, value]``) to ``values``"""
+        for labels, value in entries:
+            labels = tuple(labels)
+            values[labels] = values.get(labels, 0) + value
+
+    @staticmethod
+    def entries(values: Dict[Tuple, float]) -> List:
+        return [[list(labels), value] for labels, value in values.items()]
+
+    def render(self, snapshots: Sequence[Dict] = ()) -> List[str]:
+        """Exposition lines, adding the values of other processes' ``snapshots``"""
+        values = self.values()
+        for snapshot in snapshots:
+            self.merge(values, snapshot.get(self.name, []))
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts with a final +Inf slot, sum)
+        self._values: Dict[Tuple, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float):
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def values(self) -> Dict[Tuple, Tuple[List[int], float]]:
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+
+    def merge(self, values: Dict[Tuple, Tuple[List[int], float]], entries: List):
+        """Add snapshot entries (``[labels, counts, sum]``) to ``values``"""
+        for labels, counts, total in entries:
+            if len(counts) != len(self.buckets) + 1:
+                # Written with other buckets (an older version of the app)
+                continue
+            labels = tuple(labels)
+            current, current_total = values.get(labels) or ([0] * len(counts), 0.0)
+            values[labels] = ([a + b for a, b in zip(current, counts)], current_total + total)
+
+    @staticmethod
+    def entries(values: Dict[Tuple, Tuple[List[int], float]]) -> List:
+        return [[list(labels), counts, total] for labels, (counts, total) in values.items()]
+
+    def render(self, snapshots: Sequence[Dict] = ()) -> List[str]:
+        """Exposition lines, adding the values of other processes' ``snapshots``"""
+        values = self.values()
+        for snapshot in snapshots:
+            self.merge(values, snapshot.get(self.name, []))
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{format_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+gee_call_duration = Histogram(
+    "gee_call_duration_seconds", "Duration of remote Earth Engine calls", ("op", "endpoint", "area")
+)
+gee_call_errors = Counter(
+    "gee_call_errors_total", "Remote Earth Engine calls that raised", ("op", "endpoint", "area")
+)
+gee_calls_per_request = Histogram(
+    "gee_calls_per_request", "Remote Earth Engine calls made by one request", ("endpoint",), COUNT_BUCKETS
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to the start of the response", ("endpoint", "method", "status")
+)
+
+METRICS = (gee_call_duration, gee_call_errors, gee_calls_per_request, http_request_duration)
+
+
+class MultiprocessMetrics:
+    """
+    Metrics of all worker processes through a shared directory
+
+    Each worker writes a snapshot of its own metrics to ``<pid>.json``;
+    ``archive.json`` holds those of exited workers. Readers take a shared
+    ``flock`` and the archiving master an exclusive one, so a scrape never
+    counts a worker twice or misses it while it is being archived.
+    """
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory: Optional[str], interval: float = 5.0):
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "MultiprocessMetrics":
+        return cls(
+            os.getenv("METRICS_MULTIPROC_DIR") or None,
+            interval=float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write(self, name: str, snapshot: Dict):
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _read(self, path: str) -> Dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def snapshot() -> Dict:
+        """This process' metrics as JSON-serializable entries"""
+        return {metric.name: metric.entries(metric.values()) for metric in METRICS}
+
+    def write(self):
+        """Publish this process' metrics"""
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(f"{os.getpid()}.json", self.snapshot())
+
+    def collect(self) -> List[Dict]:
+        """Snapshots of the other processes, live and exited"""
+        if not self.enabled:
+            return []
+        own = os.path.join(self.directory, f"{os.getpid()}.json")
+        with self._locked(exclusive=False):
+            return [self._read(path) for path in glob.glob(os.path.join(self.directory, "*.json")) if path != own]
+
+    def archive(self, pid: int):
+        """Fold the snapshot of an exited worker into the archive (gunicorn ``child_exit``)"""
+        if not self.enabled:
+            return
+        path = os.path.join(self.directory, f"{pid}.json")
+        with self._locked(exclusive=True):
+            if not os.path.exists(path):
+                return
+            snapshots = [self._read(os.path.join(self.directory, self.ARCHIVE)), self._read(path)]
+            merged = {}
+            for metric in METRICS:
+                values = {}
+                for snapshot in snapshots:
+                    metric.merge(values, snapshot.get(metric.name, []))
+                merged[metric.name] = metric.entries(values)
+            self._write(self.ARCHIVE, merged)
+            os.remove(path)
+
+    def clear(self):
+        """Drop the snapshots of a previous server run (gunicorn ``on_starting``)"""
+        if self.enabled:
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                os.remove(path)
+
+    async def _flush(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError as e:
+                print(f"✗ Metrics snapshot failed: {e}")
+
+    def start(self):
+        """Write this worker's snapshot every ``interval`` seconds"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._flush())
+
+    async def stop(self):
+        """Stop flushing and write the final snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.enabled:
+            await asyncio.to_thread(self.write)
+
+
+multiprocess_metrics = MultiprocessMetrics.from_env()
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format, summed over worker processes"""
+    snapshots = multiprocess_metrics.collect()
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render(snapshots))
+    return "\n".join(lines) + "\n"
+
+
+class RequestTiming:
+    """Remote call timings of one request (or background run), filled from any thread"""
+
+    def __init__(self, endpoint: str, area: str = ""):
+        self.endpoint = endpoint
+        self.area = area
+        self.started = time.perf_counter()
+        self._totals: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, op: str, seconds: float):
+        with self._lock:
+            total = self._totals.setdefault(op, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+
+    def remote_calls(self) -> int:
+        with self._lock:
+            return sum(int(count) for op, (count, _) in self._totals.items() if op in REMOTE_OPS)
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: one entry per op plus the total"""
+        with self._lock:
+            totals = dict(self._totals)
+        entries = [
+            f'{op};desc="{int(count)} call{"s" if count != 1 else ""}";dur={seconds * 1000:.1f}'
+            for op, (count, seconds) in totals.items()
+        ]
+        if "gee" in totals:
+            # Worker time not spent waiting on Earth Engine: building the graph
+            remote = sum(totals[op][1] for op in ("getInfo", "getMapId") if op in totals)
+            entries.append(f"graph;dur={max(totals['gee'][1] - remote, 0) * 1000:.1f}")
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# Timing of the request (or background job) the current code runs for
+request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def timed(op: str) -> Iterator[None]:
+    """Time a remote Earth Engine call and attribute it to the current request"""
+    timing = request_timing.get()
+    labels = (op, timing.endpoint, timing.area) if timing is not None else (op, "background", "")
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        gee_call_errors.inc(labels)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        gee_call_duration.observe(labels, seconds)
+        if timing is not None:
+            timing.add(op, seconds)
+
+
+def request_area(query_string: bytes) -> str:
+    """Study-area code of a request, or "" (unknown codes would blow up label cardinality)"""
+    area = parse_qs(query_string.decode("latin-1")).get("area", [""])[0]
+    return area if area in study_area_registry else ""
+
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request and add its ``Server-Timing`` header
+
+    Requests are labelled with their route template (``/gee/tiles/{layer_key}/...``)
+    rather than the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def route_path(scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match != Match.NONE:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(self.route_path(scope), request_area(scope.get("query_string", b"")))
+        token = request_timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", timing.server_timing())
+                http_request_duration.observe(
+                    (timing.endpoint, scope["method"], str(status)), time.perf_counter() - timing.started
+                )
+                if timing.endpoint.startswith("/gee/"):
+                    gee_calls_per_request.observe((timing.endpoint,), timing.remote_calls())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.reset(token)
@@ -0,0 +1,194 @@
+"""
+Minimal Mapbox Vector Tile (v2) encoder for polygon layers
+
+Only what the hexagon tiles need: polygon/multipolygon geometries in tile
+pixel coordinates and scalar attributes. Encodes the protobuf by hand so
+no extra dependency is required.
+"""
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Ring = List[Tuple[int, int]]
+
+GEOM_POLYGON = 3
+
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+CMD_CLOSE_PATH = 7
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed(number: int, values: Sequence[int]) -> bytes:
+    return _bytes_field(number, b"".join(_varint(v) for v in values))
+
+
+def _encode_value(value) -> bytes:
+    if isinstance(value, bool):
+        return _field(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _field(5, 0) + _varint(value)
+        return _field(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _field(3, 1) + struct.pack("<d", value)
+    return _bytes_field(1, str(value).encode("utf-8"))
+
+
+def ring_area(ring: Ring) -> float:
+    """Signed area in tile coordinates (positive = clockwise on screen)"""
+    area = 0
+    for i in range(len(ring)):
+        x1, y1 = ring[i]
+        x2, y2 = ring[(i + 1) % len(ring)]
+        area += x1 * y2 - x2 * y1
+    return area / 2
+
+
+def clip_ring(ring: Sequence[Tuple[float, float]], min_xy: float, max_xy: float) -> List[Tuple[float, float]]:
+    """Sutherland-Hodgman clip of a ring (without closing point) to a square"""
+    def clip(points, inside, intersect):
+        result = []
+        if not points:
+            return result
+        prev = points[-1]
+        for point in points:
+            if inside(point):
+                if not inside(prev):
+                    result.append(intersect(prev, point))
+                result.append(point)
+            elif inside(prev):
+                result.append(intersect(prev, point))
+            prev = point
+        return result
+
+    def at_x(x):
+        return lambda a, b: (x, a[1] + (b[1] - a[1]) * (x - a[0]) / (b[0] - a[0]))
+
+    def at_y(y):
+        return lambda a, b: (a[0] + (b[0] - a[0]) * (y - a[1]) / (b[1] - a[1]), y)
+
+    points = list(ring)
+    points = clip(points, lambda p: p[0] >= min_xy, at_x(min_xy))
+    points = clip(points, lambda p: p[0] <= max_xy, at_x(max_xy))
+    points = clip(points, lambda p: p[1] >= min_xy, at_y(min_xy))
+    points = clip(points, lambda p: p[1] <= max_xy, at_y(max_xy))
+    return points
+
+
+def quantize_ring(points: Sequence[Tuple[float, float]]) -> Ring:
+    """Round to integer tile coordinates and drop repeated/collinear points"""
+    ring: Ring = []
+    for x, y in points:
+        point = (int(round(x)), int(round(y)))
+        if not ring or ring[-1] != point:
+            ring.append(point)
+    while len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+
+    simplified: Ring = []
+    count = len(ring)
+    for i in range(count):
+        (x0, y0), (x1, y1), (x2, y2) = ring[i - 1], ring[i], ring[(i + 1) % count]
+        if (x1 - x0) * (y2 - y1) != (y1 - y0) * (x2 - x1):
+            simplified.append(ring[i])
+    return simplified
+
+
+def encode_polygon_geometry(polygons: List[List[Ring]]) -> List[int]:
+    """
+    Geometry command stream for a (multi)polygon
+
+    ``polygons`` is a list of polygons, each a list of rings with the
+    exterior first. Winding is fixed here: exterior rings clockwise,
+    holes counter-clockwise in screen coordinates.
+    """
+    commands: List[int] = []
+    cursor_x = cursor_y = 0
+    for polygon in polygons:
+        for index, ring in enumerate(polygon):
+            area = ring_area(ring)
+            if (index == 0 and area < 0) or (index > 0 and area > 0):
+                ring = ring[::-1]
+
+            x, y = ring[0]
+            commands += [(1 << 3) | CMD_MOVE_TO, _zigzag(x - cursor_x), _zigzag(y - cursor_y)]
+            cursor_x, cursor_y = x, y
+
+            commands.append(((len(ring) - 1) << 3) | CMD_LINE_TO)
+            for x, y in ring[1:]:
+                commands += [_zigzag(x - cursor_x), _zigzag(y - cursor_y)]
+                cursor_x, cursor_y = x, y
+
+            commands.append((1 << 3) | CMD_CLOSE_PATH)
+    return commands
+
+
+def encode_layer(
+    name: str,
+    features: List[Tuple[Optional[int], List[int], Dict]],
+    extent: int = 4096
+) -> bytes:
+    """
+    Encode one MVT layer
+
+    ``features`` holds (id, geometry commands, properties) tuples; None
+    values in properties are left out.
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, object], int] = {}
+    body = bytearray()
+    body += _field(15, 0) + _varint(2)
+    body += _bytes_field(1, name.encode("utf-8"))
+
+    for feature_id, geometry, properties in features:
+        tags: List[int] = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            key_index = keys.setdefault(key, len(keys))
+            value_index = values.setdefault((type(value), value), len(values))
+            tags += [key_index, value_index]
+
+        feature = bytearray()
+        if feature_id is not None:
+            feature += _field(1, 0) + _varint(feature_id)
+        if tags:
+            feature += _packed(2, tags)
+        feature += _field(3, 0) + _varint(GEOM_POLYGON)
+        feature += _packed(4, geometry)
+        body += _bytes_field(2, bytes(feature))
+
+    for key in keys:
+        body += _bytes_field(3, key.encode("utf-8"))
+    for (_, value) in values:
+        body += _bytes_field(4, _encode_value(value))
+    body += _field(5, 0) + _varint(extent)
+    return bytes(body)
+
+
+def encode_tile(layers: List[bytes]) -> bytes:
+    """Wrap encoded layers into a tile"""
+    return b"".join(_bytes_field(3, layer) for layer in layers)
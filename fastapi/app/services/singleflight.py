@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one
+
+    The first caller for a key starts the work as a task; every caller that
+    arrives while it is still running awaits that same task instead of
+    starting its own. The task is shielded, so a disconnecting client does
+    not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once per key at a time and share its result"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """In-flight keys and how many calls were coalesced"""
+        return {
+            'in_flight': len(self._inflight),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced
+        }
+
+
+# Shared coalescer for GEE layer requests in this process
+gee_singleflight = SingleFlight()
@@ -0,0 +1,141 @@
+"""
+Local registry of study-area metadata, bounds and geometries
+
+The study areas are Earth Engine FeatureCollection assets that never change,
+so their bounds are looked up once and kept in a JSON snapshot
+(``study_areas.json``) that is loaded at startup. Refresh the snapshot after
+adding or editing an area with:
+
+    python -m app.services.study_areas refresh
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "study_areas.json"
+)
+
+
+class StudyAreaRegistry:
+    """Study-area codes, names and precomputed bounds read from a snapshot file"""
+
+    def __init__(self, areas: Dict[str, Dict], path: Optional[str] = None, refreshed_at: Optional[str] = None):
+        self.path = path
+        self.refreshed_at = refreshed_at
+        self._areas = areas
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SNAPSHOT_PATH) -> "StudyAreaRegistry":
+        """Load the registry from a snapshot file"""
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        return cls(snapshot.get("areas", {}), path=path, refreshed_at=snapshot.get("refreshed_at"))
+
+    def codes(self) -> List[str]:
+        """All registered area codes"""
+        return list(self._areas)
+
+    def __contains__(self, area_code: str) -> bool:
+        return area_code in self._areas
+
+    def get(self, area_code: str) -> Dict:
+        """Metadata for one area"""
+        if area_code not in self._areas:
+            raise ValueError(f"Invalid area code: {area_code}")
+        return self._areas[area_code]
+
+    def bounds(self, area_code: str) -> Optional[List]:
+        """Precomputed bounding box ring, or None if the snapshot has not been refreshed"""
+        return self.get(area_code).get("bounds")
+
+    def flood_mask(self, area_code: str) -> Optional[str]:
+        """Asset ID of the exported static flood mask, or None if it has not been exported"""
+        return self.get(area_code).get("flood_mask")
+
+    def set_flood_mask(self, area_code: str, asset_id: Optional[str]):
+        with self._lock:
+            self.get(area_code)["flood_mask"] = asset_id
+
+    def summary(self, include_geometry: bool = False) -> Dict[str, Dict]:
+        """Public metadata of every area, keyed by code"""
+        fields = ["name", "name_th", "bounds", "bbox", "area_km2"]
+        if include_geometry:
+            fields.append("geometry")
+        return {
+            code: {field: area.get(field) for field in fields}
+            for code, area in self._areas.items()
+        }
+
+    def refresh(self, gee_service, area_codes: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Recompute bounds and geometry from the Earth Engine assets
+
+        Every area is evaluated in a single request. Areas missing from the
+        snapshot but listed in ``GEEService.STUDY_AREAS`` are added.
+        """
+        import ee
+
+        codes = area_codes or list(gee_service.STUDY_AREAS)
+        values = {}
+        for code in codes:
+            area = gee_service.get_study_area(code)
+            geometry = area.geometry()
+            values[code] = ee.Dictionary({
+                "bounds": gee_service.get_bounds(area),
+                "area_km2": geometry.area(maxError=10).divide(1_000_000),
+                "geometry": geometry.simplify(maxError=30)
+            })
+        results = gee_service.evaluate(values)
+
+        with self._lock:
+            for code in codes:
+                bounds = results[code]["bounds"]
+                lons = [point[0] for point in bounds]
+                lats = [point[1] for point in bounds]
+                area = self._areas.setdefault(code, {"name": code, "name_th": code})
+                area.update({
+                    "asset": gee_service.STUDY_AREAS[code],
+                    "bounds": bounds,
+                    "bbox": [min(lons), min(lats), max(lons), max(lats)],
+                    "area_km2": round(results[code]["area_km2"], 3),
+                    "geometry": results[code]["geometry"]
+                })
+            self.refreshed_at = datetime.now(timezone.utc).isoformat()
+        return {code: self._areas[code] for code in codes}
+
+    def save(self, path: Optional[str] = None):
+        """Write the registry back to its snapshot file"""
+        path = path or self.path
+        with self._lock:
+            snapshot = {"refreshed_at": self.refreshed_at, "areas": self._areas}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+
+
+# Registry loaded once at startup
+study_area_registry = StudyAreaRegistry.load(os.getenv("STUDY_AREAS_PATH", DEFAULT_SNAPSHOT_PATH))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the study-area registry snapshot")
+    parser.add_argument("command", choices=["refresh", "show"])
+    parser.add_argument("--area", action="append", help="Only refresh these area codes")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        from app.services.gee_service import GEEService
+
+        refreshed = study_area_registry.refresh(GEEService(), args.area)
+        study_area_registry.save()
+        for code, area in refreshed.items():
+            print(f"✓ {code}: bbox={area['bbox']} area={area['area_km2']} km²")
+        print(f"✓ Snapshot written to {study_area_registry.path}")
+    else:
+        print(json.dumps(study_area_registry.summary(), ensure_ascii=False, indent=2))
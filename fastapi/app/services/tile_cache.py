@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TileStore:
+    """
+    MBTiles-style SQLite store for proxied Earth Engine map tiles
+
+    Tiles are keyed by layer and stored with TMS row numbering as in
+    MBTiles. The ``layers`` table records how each layer key was produced
+    (GEEService method, arguments and the path of its ``tile_url`` in the
+    result), so an expired map ID can be re-issued after a restart.
+    Tiles older than ``max_age`` are deleted every ``purge_interval``
+    seconds once ``start()`` runs (in one worker process).
+    """
+
+    def __init__(self, path: str, max_age: float = 7 * 86400, purge_interval: float = 3600):
+        self.path = path
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._purge_task: Optional[asyncio.Task] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._known_layers = set()
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS layers (
+                layer_key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                args TEXT NOT NULL,
+                path TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS tiles (
+                layer_key TEXT NOT NULL,
+                zoom_level INTEGER NOT NULL,
+                tile_column INTEGER NOT NULL,
+                tile_row INTEGER NOT NULL,
+                tile_data BLOB NOT NULL,
+                content_type TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (layer_key, zoom_level, tile_column, tile_row)
+            );
+            INSERT OR IGNORE INTO metadata (name, value) VALUES ('name', 'gee-tiles');
+            INSERT OR IGNORE INTO metadata (name, value) VALUES ('format', 'png');
+            """
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """New connection for a worker process forked after the store was opened"""
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    @classmethod
+    def from_env(cls) -> Optional["TileStore"]:
+        path = os.getenv("GEE_TILE_CACHE_PATH", os.path.join("cache", "gee_tiles.mbtiles"))
+        if not path:
+            return None
+        return cls(
+            path,
+            max_age=float(os.getenv("GEE_TILE_CACHE_MAX_AGE", str(7 * 86400))),
+            purge_interval=float(os.getenv("GEE_TILE_CACHE_PURGE_INTERVAL", "3600"))
+        )
+
+    @staticmethod
+    def layer_key(method: str, args: List[Any], path: Tuple) -> str:
+        """Stable key for one tile layer of one GEEService result"""
+        raw = json.dumps([method, args, list(path)], separators=(",", ":"), default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+    def register_layer(self, layer_key: str, method: str, args: List[Any], path: Tuple):
+        if layer_key in self._known_layers:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO layers (layer_key, method, args, path, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (layer_key, method, json.dumps(args, default=str), json.dumps(list(path)), time.time())
+            )
+            self._conn.commit()
+            self._known_layers.add(layer_key)
+
+    def get_layer(self, layer_key: str) -> Optional[Tuple[str, List[Any], List]]:
+        """(method, args, path) of a registered layer"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT method, args, path FROM layers WHERE layer_key = ?", (layer_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), json.loads(row[2])
+
+    def get_tile(self, layer_key: str, z: int, x: int, y: int) -> Optional[Tuple[bytes, str]]:
+        """(data, content type) of a stored tile younger than ``max_age``"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tile_data, content_type, fetched_at FROM tiles"
+                " WHERE layer_key = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (layer_key, z, x, (1 << z) - 1 - y)
+            ).fetchone()
+        if row is None or time.time() - row[2] > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def put_tile(self, layer_key: str, z: int, x: int, y: int, data: bytes, content_type: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles"
+                " (layer_key, zoom_level, tile_column, tile_row, tile_data, content_type, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (layer_key, z, x, (1 << z) - 1 - y, sqlite3.Binary(data), content_type, time.time())
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete tiles older than ``max_age``; returns the number deleted"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM tiles WHERE fetched_at < ?", (time.time() - self.max_age,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                purged = await asyncio.to_thread(self.purge_expired)
+                if purged:
+                    print(f"✓ Purged {purged} expired map tiles")
+            except Exception as e:
+                print(f"✗ Tile purge failed: {e}")
+            await asyncio.sleep(self.purge_interval)
+
+    def start(self):
+        """Purge expired tiles now and then periodically, on the running event loop"""
+        if self._purge_task is None:
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def stop(self):
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            tiles, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(tile_data)), 0) FROM tiles"
+            ).fetchone()
+            layers = self._conn.execute("SELECT COUNT(*) FROM layers").fetchone()[0]
+        return {
+            "path": self.path,
+            "layers": layers,
+            "tiles": tiles,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def find_tile_urls(value: Any, path: Tuple = ()) -> List[Tuple[Tuple, Dict]]:
+    """(path, dict) of every dict holding a ``tile_url`` in a layer result"""
+    found = []
+    if isinstance(value, dict):
+        if "tile_url" in value:
+            found.append((path, value))
+        for key, item in value.items():
+            found += find_tile_urls(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            found += find_tile_urls(item, path + (index,))
+    return found
+
+
+def resolve_path(value: Any, path: List) -> Any:
+    for part in path:
+        value = value[part]
+    return value
+
+
+# Shared tile store (GEE_TILE_CACHE_PATH="" disables the tile proxy)
+tile_store = TileStore.from_env()
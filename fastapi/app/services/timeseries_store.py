@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+DateRange = Tuple[date, date]
+
+
+def subtract_ranges(start: date, end: date, covered: List[DateRange]) -> List[DateRange]:
+    """Parts of the inclusive range [start, end] not inside any covered range"""
+    missing = []
+    cursor = start
+    for covered_start, covered_end in sorted(covered):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Union of inclusive date ranges, merging overlapping and adjacent ones"""
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class TimeseriesStore:
+    """
+    SQLite store of daily index means per study area
+
+    Alongside the values it records which date ranges have been computed
+    for each (area, cloud cover) series, so a request only computes the
+    dates it has not seen before. Days with no usable scene are covered
+    but have no row. The last ``settle_days`` days are never marked as
+    covered, since Earth Engine may still ingest scenes for them.
+    """
+
+    def __init__(self, path: str, settle_days: int = 3):
+        self.path = path
+        self.settle_days = settle_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS index_timeseries (
+                area TEXT NOT NULL,
+                cloud_cover INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                ndvi REAL,
+                ndmi REAL,
+                ndwi REAL,
+                PRIMARY KEY (area, cloud_cover, date)
+            );
+            CREATE TABLE IF NOT EXISTS index_timeseries_coverage (
+                area TEXT NOT NULL,
+                cloud_cover INTEGER NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        """New connection for a worker process forked after the store was opened"""
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def coverage(self, area: str, cloud_cover: int) -> List[DateRange]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_date, end_date FROM index_timeseries_coverage"
+                " WHERE area = ? AND cloud_cover = ? ORDER BY start_date",
+                (area, cloud_cover)
+            ).fetchall()
+        return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in rows]
+
+    def missing(self, area: str, cloud_cover: int, start: date, end: date) -> List[DateRange]:
+        """Date ranges within [start, end] that still have to be computed"""
+        return subtract_ranges(start, end, self.coverage(area, cloud_cover))
+
+    def add(self, area: str, cloud_cover: int, rows: List[Dict], computed: List[DateRange]):
+        """Store computed days and mark the settled part of ``computed`` as covered"""
+        settled = date.today() - timedelta(days=self.settle_days)
+        covered = [(start, min(end, settled)) for start, end in computed if start <= settled]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO index_timeseries (area, cloud_cover, date, ndvi, ndmi, ndwi)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (area, cloud_cover, row['date'], row.get('ndvi'), row.get('ndmi'), row.get('ndwi'))
+                    for row in rows
+                ]
+            )
+            if covered:
+                existing = self._conn.execute(
+                    "SELECT start_date, end_date FROM index_timeseries_coverage"
+                    " WHERE area = ? AND cloud_cover = ?",
+                    (area, cloud_cover)
+                ).fetchall()
+                merged = merge_ranges(
+                    [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in existing] + covered
+                )
+                self._conn.execute(
+                    "DELETE FROM index_timeseries_coverage WHERE area = ? AND cloud_cover = ?",
+                    (area, cloud_cover)
+                )
+                self._conn.executemany(
+                    "INSERT INTO index_timeseries_coverage (area, cloud_cover, start_date, end_date)"
+                    " VALUES (?, ?, ?, ?)",
+                    [(area, cloud_cover, s.isoformat(), e.isoformat()) for s, e in merged]
+                )
+            self._conn.commit()
+
+    def query(self, area: str, cloud_cover: int, start: date, end: date) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, ndvi, ndmi, ndwi FROM index_timeseries"
+                " WHERE area = ? AND cloud_cover = ? AND date BETWEEN ? AND ?"
+                " ORDER BY date",
+                (area, cloud_cover, start.isoformat(), end.isoformat())
+            ).fetchall()
+        return [{'date': d, 'ndvi': ndvi, 'ndmi': ndmi, 'ndwi': ndwi} for d, ndvi, ndmi, ndwi in rows]
+
+    def clear(self, area: Optional[str] = None):
+        with self._lock:
+            if area is None:
+                self._conn.execute("DELETE FROM index_timeseries")
+                self._conn.execute("DELETE FROM index_timeseries_coverage")
+            else:
+                self._conn.execute("DELETE FROM index_timeseries WHERE area = ?", (area,))
+                self._conn.execute("DELETE FROM index_timeseries_coverage WHERE area = ?", (area,))
+            self._conn.commit()
+
+
+# Shared store for /gee/timeseries
+timeseries_store = TimeseriesStore(
+    os.getenv("TIMESERIES_PATH", os.path.join("cache", "timeseries.sqlite")),
+    settle_days=int(os.getenv("TIMESERIES_SETTLE_DAYS", "3"))
+)
@@ -0,0 +1,167 @@
+"""
+TopoJSON encoder for polygon feature collections
+
+Coordinates are quantized to a fixed decimal precision and rings are cut
+at junctions (points shared by more than two edges), so an edge shared
+by two neighbouring polygons is stored once as an arc and referenced from
+both sides. Arcs are delta-encoded as in the TopoJSON specification.
+"""
+from typing import Dict, List, Optional, Tuple
+
+Point = Tuple[int, int]
+
+
+def round_coordinates(coordinates, precision: int):
+    """Round a (nested) GeoJSON coordinate array to ``precision`` decimals"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, precision) for value in coordinates]
+    return [round_coordinates(part, precision) for part in coordinates]
+
+
+def round_geojson(geojson: Dict, precision: int) -> Dict:
+    """Copy of a FeatureCollection with coordinates rounded to ``precision`` decimals"""
+    features = []
+    for feature in geojson.get("features") or []:
+        geometry = feature.get("geometry")
+        if geometry and geometry.get("coordinates") is not None:
+            geometry = {**geometry, "coordinates": round_coordinates(geometry["coordinates"], precision)}
+        features.append({**feature, "geometry": geometry})
+    return {**geojson, "features": features}
+
+
+def _polygons_of(geometry: Optional[Dict]) -> List[List[List]]:
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return [geometry.get("coordinates") or []]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry.get("coordinates") or []
+    return []
+
+
+def _quantize_ring(ring: List, x0: float, y0: float, step: float) -> List[Point]:
+    points: List[Point] = []
+    for x, y, *_ in ring:
+        point = (int(round((x - x0) / step)), int(round((y - y0) / step)))
+        if not points or points[-1] != point:
+            points.append(point)
+    if points and points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+
+def encode_topology(geojson: Dict, precision: int = 6, object_name: str = "collection") -> Dict:
+    """
+    Convert a FeatureCollection of (multi)polygons to a quantized Topology
+
+    Args:
+        geojson: FeatureCollection; non-polygon geometries become null
+        precision: Decimal places kept, i.e. the quantization step is 10^-precision
+        object_name: Name of the GeometryCollection in ``objects``
+
+    Returns:
+        TopoJSON Topology dictionary
+    """
+    features = geojson.get("features") or []
+    step = 10 ** -precision
+
+    xs, ys = [], []
+    for feature in features:
+        for polygon in _polygons_of(feature.get("geometry")):
+            for ring in polygon:
+                for x, y, *_ in ring:
+                    xs.append(x)
+                    ys.append(y)
+    x0, y0 = (min(xs), min(ys)) if xs else (0.0, 0.0)
+
+    # Quantize every ring, dropping rings that collapse at this precision
+    shapes: List[List[List[List[Point]]]] = []
+    for feature in features:
+        polygons = []
+        for polygon in _polygons_of(feature.get("geometry")):
+            rings = []
+            for index, ring in enumerate(polygon):
+                points = _quantize_ring(ring, x0, y0, step)
+                if len(points) >= 4:
+                    rings.append(points)
+                elif index == 0:
+                    break
+            if rings:
+                polygons.append(rings)
+        shapes.append(polygons)
+
+    # A junction is a point with more than two distinct neighbours
+    neighbours: Dict[Point, set] = {}
+    for polygons in shapes:
+        for rings in polygons:
+            for ring in rings:
+                for i in range(len(ring) - 1):
+                    a, b = ring[i], ring[i + 1]
+                    neighbours.setdefault(a, set()).add(b)
+                    neighbours.setdefault(b, set()).add(a)
+    junctions = {point for point, adjacent in neighbours.items() if len(adjacent) > 2}
+
+    arcs: List[List[Point]] = []
+    arc_index: Dict[Tuple[Point, ...], int] = {}
+
+    def index_of(arc: List[Point]) -> int:
+        key = tuple(arc)
+        if key in arc_index:
+            return arc_index[key]
+        reverse = key[::-1]
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[key] = len(arcs)
+        arcs.append(arc)
+        return arc_index[key]
+
+    def ring_arcs(ring: List[Point]) -> List[int]:
+        points = ring[:-1]
+        starts = [i for i, point in enumerate(points) if point in junctions]
+        if not starts:
+            # No junction: start at the smallest point so the same ring
+            # seen from another polygon maps to the same arc
+            start = points.index(min(points))
+            rotated = points[start:] + points[:start]
+            return [index_of(rotated + [rotated[0]])]
+
+        start = starts[0]
+        rotated = points[start:] + points[:start] + [points[start]]
+        result = []
+        arc = [rotated[0]]
+        for point in rotated[1:]:
+            arc.append(point)
+            if point in junctions:
+                result.append(index_of(arc))
+                arc = [point]
+        return result
+
+    geometries = []
+    for feature, polygons in zip(features, shapes):
+        geometry: Dict = {"type": None}
+        encoded = [[ring_arcs(ring) for ring in rings] for rings in polygons]
+        if len(encoded) == 1 and (feature.get("geometry") or {}).get("type") == "Polygon":
+            geometry = {"type": "Polygon", "arcs": encoded[0]}
+        elif encoded:
+            geometry = {"type": "MultiPolygon", "arcs": encoded}
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        geometry["properties"] = feature.get("properties") or {}
+        geometries.append(geometry)
+
+    delta_arcs = []
+    for arc in arcs:
+        encoded_arc = [list(arc[0])]
+        for (px, py), (x, y) in zip(arc, arc[1:]):
+            encoded_arc.append([x - px, y - py])
+        delta_arcs.append(encoded_arc)
+
+    topology = {
+        "type": "Topology",
+        "transform": {"scale": [step, step], "translate": [x0, y0]},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": delta_arcs
+    }
+    if xs:
+        topology["bbox"] = [x0, y0, max(xs), max(ys)]
+    return topology
@@ -0,0 +1,257 @@
+"""
+Warm-up precomputation of the default GEE layers
+
+Computes the products the map pages request by default (today's end
+date, default windows) for every study area, and stores them in the
+layer cache the /gee routes read from. Runs on a daily schedule inside
+the API, or once from the command line:
+
+    python -m app.services.warmup [--areas ud,mt] [--layers ndvi,biomass] [--force]
+
+A separate CLI process only helps the API when both share the on-disk
+cache, i.e. GEE_CACHE_PATH is set.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.cache import layer_cache
+from app.services.executor import gee_executor
+from app.services.metrics import RequestTiming, request_timing
+from app.services.singleflight import gee_singleflight
+
+# Layer name -> GEEService method
+WARMUP_LAYERS = {
+    "ndmi": "get_ndmi_layer",
+    "ndvi": "get_ndvi_layer",
+    "ndwi": "get_ndwi_layer",
+    "burn_scar": "get_burn_scar_layer",
+    "biomass": "get_biomass_layer"
+}
+
+
+def default_args(layer: str, area: str, now: Optional[datetime] = None) -> Tuple:
+    """Arguments the /gee route passes for a layer when no dates are given"""
+    now = now or datetime.now()
+    end_date = now.strftime('%Y-%m-%d')
+    if layer == "burn_scar":
+        start_date = (now - timedelta(days=30)).strftime('%Y-%m-%d')
+        return area, start_date, end_date, 30
+    return area, end_date, 30
+
+
+def check_layers(layers: Sequence[str]):
+    unknown = [layer for layer in layers if layer not in WARMUP_LAYERS]
+    if unknown:
+        raise ValueError(f"Unknown warm-up layers: {', '.join(unknown)}. Valid: {', '.join(WARMUP_LAYERS)}")
+
+
+class LayerWarmup:
+    """
+    Precompute default layers so the first visitor of the day hits the cache
+
+    Jobs run with at most ``concurrency`` Earth Engine calls at a time,
+    leaving the rest of the executor to live requests. A layer whose cache
+    entry still has more than ``min_remaining`` seconds to live is skipped
+    unless the run is forced.
+    """
+
+    def __init__(
+        self,
+        gee_service,
+        areas: Optional[Sequence[str]] = None,
+        layers: Optional[Sequence[str]] = None,
+        concurrency: int = 2,
+        min_remaining: float = 3600,
+        run_at: Optional[str] = None
+    ):
+        self.gee_service = gee_service
+        self.areas = list(areas or gee_service.STUDY_AREAS.keys())
+        self.layers = list(layers or WARMUP_LAYERS.keys())
+        self.concurrency = concurrency
+        self.min_remaining = min_remaining
+        self.run_at = run_at
+        self.last_report: Optional[Dict] = None
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, gee_service) -> "LayerWarmup":
+        areas = os.getenv("WARMUP_AREAS")
+        layers = os.getenv("WARMUP_LAYERS")
+        return cls(
+            gee_service,
+            areas=areas.split(",") if areas else None,
+            layers=layers.split(",") if layers else None,
+            concurrency=int(os.getenv("WARMUP_CONCURRENCY", "2")),
+            min_remaining=float(os.getenv("WARMUP_MIN_REMAINING", "3600")),
+            run_at=os.getenv("WARMUP_AT") or None
+        )
+
+    async def _warm(self, semaphore: asyncio.Semaphore, layer: str, area: str, force: bool) -> Dict:
+        method = WARMUP_LAYERS[layer]
+        args = default_args(layer, area)
+        request_timing.set(RequestTiming(f"warmup:{method}", area))
+        key = layer_cache.make_key(method, *args)
+        entry = {"layer": layer, "area": area, "args": list(args[1:])}
+
+        expires_at = await layer_cache.aexpires_at(key)
+        if not force and expires_at is not None and expires_at - time.time() > self.min_remaining:
+            return {**entry, "status": "fresh", "seconds": 0.0}
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                fn = getattr(self.gee_service, method)
+
+                async def compute():
+                    value = await gee_executor.run(fn, *args)
+                    await layer_cache.aset(key, value)
+                    return value
+
+                await gee_singleflight.do(key, compute)
+            except Exception as e:
+                return {
+                    **entry,
+                    "status": "failed",
+                    "seconds": round(time.perf_counter() - started, 2),
+                    "error": str(e) or type(e).__name__
+                }
+            return {**entry, "status": "computed", "seconds": round(time.perf_counter() - started, 2)}
+
+    async def run(
+        self,
+        areas: Optional[Sequence[str]] = None,
+        layers: Optional[Sequence[str]] = None,
+        force: bool = False
+    ) -> Dict:
+        """Warm every (layer, area) pair once and return the run report"""
+        areas = list(areas or self.areas)
+        layers = list(layers or self.layers)
+        check_layers(layers)
+
+        self.running = True
+        started_at = datetime.now()
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            results = await asyncio.gather(*[
+                self._warm(semaphore, layer, area, force)
+                for area in areas
+                for layer in layers
+            ])
+        finally:
+            self.running = False
+
+        counts = {status: sum(1 for r in results if r["status"] == status) for status in ("computed", "fresh", "failed")}
+        report = {
+            "started_at": started_at.isoformat(),
+            "seconds": round(time.perf_counter() - started, 2),
+            **counts,
+            "results": results
+        }
+        self.last_report = report
+
+        mark = "✗" if counts["failed"] else "✓"
+        print(
+            f"{mark} GEE warm-up: {counts['computed']} computed, {counts['fresh']} fresh, "
+            f"{counts['failed']} failed in {report['seconds']}s"
+        )
+        for result in results:
+            if result["status"] == "failed":
+                print(f"  ✗ {result['layer']}/{result['area']}: {result['error']}")
+        return report
+
+    def trigger(
+        self,
+        areas: Optional[Sequence[str]] = None,
+        layers: Optional[Sequence[str]] = None,
+        force: bool = False
+    ) -> asyncio.Task:
+        """
+        Start a run in the background
+
+        Raises:
+            RuntimeError: If a run is already in progress
+            ValueError: If a layer name is unknown
+        """
+        if self.running:
+            raise RuntimeError("A warm-up run is already in progress")
+        check_layers(layers or self.layers)
+        self.running = True
+        return asyncio.create_task(self.run(areas=areas, layers=layers, force=force))
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        """Seconds until the next ``run_at`` (HH:MM, server local time)"""
+        now = now or datetime.now()
+        hour, minute = (int(part) for part in self.run_at.split(":"))
+        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run())
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"✗ GEE warm-up failed: {e}")
+
+    def start(self):
+        """Start the daily schedule on the running event loop (no-op without WARMUP_AT)"""
+        if self.run_at and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict:
+        return {
+            "scheduled_at": self.run_at,
+            "next_run_in_seconds": round(self.seconds_until_next_run()) if self.run_at else None,
+            "running": self.running,
+            "areas": self.areas,
+            "layers": self.layers,
+            "concurrency": self.concurrency,
+            "min_remaining_seconds": self.min_remaining,
+            "last_report": self.last_report
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Precompute default GEE layers into the layer cache")
+    parser.add_argument("--areas", help="Comma-separated study area codes (default: all)")
+    parser.add_argument("--layers", help=f"Comma-separated layers (default: {','.join(WARMUP_LAYERS)})")
+    parser.add_argument("--concurrency", type=int, help="Concurrent Earth Engine jobs")
+    parser.add_argument("--force", action="store_true", help="Recompute layers that are still fresh")
+    args = parser.parse_args(argv)
+
+    if layer_cache.backend is None:
+        print("✗ GEE_CACHE_PATH is not set; results will not be visible to the API process")
+
+    from app.services.gee_service import GEEService
+
+    warmup = LayerWarmup.from_env(GEEService())
+    if args.concurrency:
+        warmup.concurrency = args.concurrency
+    report = asyncio.run(warmup.run(
+        areas=args.areas.split(",") if args.areas else None,
+        layers=args.layers.split(",") if args.layers else None,
+        force=args.force
+    ))
+    gee_executor.shutdown()
+    raise SystemExit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
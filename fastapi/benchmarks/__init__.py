@@ -0,0 +1,7 @@
+"""
+Offline benchmark suite
+
+Simulated Earth Engine (``fake_ee``), local FIRMS and tile server stand-ins
+(``upstream``), synthetic hexagon grids (``hexagons``) and a closed-loop
+load driver (``load``). Run with ``python -m benchmarks`` from ``fastapi/``.
+"""
@@ -0,0 +1,136 @@
+"""
+Offline API benchmarks
+
+Runs the FastAPI app in-process with Earth Engine replaced by a fake that
+sleeps ``--latency`` seconds per round-trip and FIRMS / Earth Engine tile
+servers replaced by a local stub, then drives the /gee and /hotspot
+endpoints at each ``--concurrency`` level and reports throughput and
+p50/p95/p99 latency. The hexagon endpoints are measured against
+synthetic grids of ``--hexagon-scales`` times today's size.
+
+    cd fastapi
+    python -m benchmarks
+    python -m benchmarks --suites hexagons --hexagon-scales 1,10,100 --requests 50
+    python -m benchmarks --latency 1.5 --concurrency 1,16,64 --json results.json
+
+"cold" scenarios miss the layer cache on every request, "warm" ones repeat
+one request (see ``benchmarks.scenarios``). Generated grids are kept in
+``cache/benchmarks``. ``python -m benchmarks.servers`` compares server
+setups over real sockets.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks import fake_ee
+from benchmarks.environment import GRID_DIRECTORY, configure_environment
+from benchmarks.hexagons import ensure_grid, source_bbox
+from benchmarks.load import drive
+from benchmarks.scenarios import Scenario, gee_scenarios, hexagon_scenarios, hotspot_scenarios
+from benchmarks.upstream import UpstreamStub
+
+
+def print_row(suite: str, name: str, result: Dict):
+    print(
+        f"{suite:<12} {name:<36} {result['concurrency']:>5} {result['throughput_rps']:>9.1f} "
+        f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>6}",
+        flush=True
+    )
+
+
+async def run_scenarios(client, suite: str, scenarios: List[Scenario], args, results: List[Dict]):
+    for name, make_url, headers in scenarios:
+        # Prime caches and lazy builds so warm scenarios measure the steady state
+        await client.get(make_url(0), headers=headers)
+        for concurrency in args.concurrency:
+            result = await drive(client, make_url, args.requests, concurrency, headers)
+            print_row(suite, name, result)
+            results.append({"suite": suite, "scenario": name, **result})
+
+
+async def run(args, upstream_url: str, grid_paths: Dict[int, str], bbox: List[float]) -> List[Dict]:
+    import httpx
+    import main
+    from app.services.hexagon_store import hexagon_store
+
+    results: List[Dict] = []
+    print(
+        f"{'suite':<12} {'scenario':<36} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}"
+    )
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+
+            if "gee" in args.suites:
+                layer = (await client.get("/gee/ndvi?area=ud&end_date=2024-12-31")).json()["data"]
+                await run_scenarios(client, "gee", gee_scenarios(layer["proxy_tile_url"]), args, results)
+
+            if "hotspot" in args.suites:
+                await run_scenarios(client, "hotspot", hotspot_scenarios(bbox), args, results)
+
+            if "hexagons" in args.suites:
+                for scale, path in grid_paths.items():
+                    hexagon_store.path = path
+                    started = time.perf_counter()
+                    await asyncio.to_thread(hexagon_store.get)
+                    load_seconds = time.perf_counter() - started
+                    size_mb = os.path.getsize(path) / 1e6
+                    print(f"# hexagons x{scale}: {size_mb:.1f} MB file loaded in {load_seconds:.2f}s")
+                    results.append({
+                        "suite": f"hexagons x{scale}", "scenario": "load", "seconds": round(load_seconds, 3),
+                        "file_mb": round(size_mb, 1)
+                    })
+                    await run_scenarios(client, f"hexagons x{scale}", hexagon_scenarios(bbox), args, results)
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline throughput and latency benchmarks of the API")
+    parser.add_argument("--suites", default="gee,hotspot,hexagons", help="Comma-separated: gee, hotspot, hexagons")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake Earth Engine round-trip seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Extra random round-trip seconds, up to")
+    parser.add_argument("--hexagon-scales", default="1,10,100", help="Comma-separated grid size multiples")
+    parser.add_argument("--detections", type=int, default=2000, help="FIRMS detections served by the stub")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+    args.suites = set(args.suites.split(","))
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+
+    bbox = source_bbox()
+    grid_paths = {}
+    if "hexagons" in args.suites or "hotspot" in args.suites:
+        scales = [int(value) for value in args.hexagon_scales.split(",")] if "hexagons" in args.suites else [1]
+        for scale in scales:
+            started = time.perf_counter()
+            grid_paths[scale] = ensure_grid(scale, GRID_DIRECTORY)
+            print(f"# hexagons x{scale}: {grid_paths[scale]} ({time.perf_counter() - started:.1f}s)")
+
+    upstream = UpstreamStub(detections=args.detections, bbox=bbox)
+    upstream_url = upstream.start()
+    engine = fake_ee.install(args.latency, args.jitter, tile_base=f"{upstream_url}/tiles")
+    workdir = tempfile.mkdtemp(prefix="udfire-bench-")
+    configure_environment(upstream_url, workdir, grid_paths.get(1) or next(iter(grid_paths.values()), ""))
+
+    try:
+        results = asyncio.run(run(args, upstream_url, grid_paths, bbox))
+    finally:
+        upstream.stop()
+
+    print(f"# fake Earth Engine calls: {engine.calls}, upstream requests: {upstream.requests}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": {**vars(args), "suites": sorted(args.suites)}, "results": results}, f, indent=2)
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
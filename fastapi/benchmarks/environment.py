@@ -0,0 +1,27 @@
+"""
+Environment of the app under benchmark
+
+Points the FIRMS client at the upstream stub, keeps the app's SQLite
+stores in a scratch directory instead of ``cache/`` and disables the
+parts that need PostGIS or a schedule. Must run before ``main`` is imported.
+"""
+import os
+
+GRID_DIRECTORY = os.path.join("cache", "benchmarks")
+
+
+def configure_environment(upstream_url: str, workdir: str, hexagon_path: str):
+    """Point the app at the stubs and keep its stores out of the real cache directory"""
+    os.environ.update({
+        "FIRMS_WFS_URL": f"{upstream_url}/wfs",
+        "FIRMS_API_URL": f"{upstream_url}/api",
+        "FIRMS_INGEST_ENABLED": "false",
+        "GEE_TILE_CACHE_PATH": os.path.join(workdir, "gee_tiles.mbtiles"),
+        "JOBS_PATH": os.path.join(workdir, "jobs.sqlite"),
+        "TIMESERIES_PATH": os.path.join(workdir, "timeseries.sqlite"),
+        "BACKGROUND_LOCK_PATH": os.path.join(workdir, "background.lock"),
+        "METRICS_MULTIPROC_DIR": os.path.join(workdir, "metrics"),
+        "HEXAGON_PREDICTIONS_PATH": hexagon_path
+    })
+    for name in ("DATABASE_URL", "GEE_CACHE_PATH", "WARMUP_AT"):
+        os.environ.pop(name, None)
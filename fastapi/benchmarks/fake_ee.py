@@ -0,0 +1,132 @@
+"""
+Offline stand-in for the ``ee`` package
+
+Builds the same kind of lazy graph as the Earth Engine client: any call
+chain returns a node. Only ``getInfo()`` and ``getMapId()`` cost time,
+sleeping for ``latency`` seconds (plus up to ``jitter``) like a network
+round-trip would, so the API's threading, caching and queueing behave as
+they do against the real service.
+
+``install()`` must run before anything imports ``ee``.
+"""
+import itertools
+import random
+import sys
+import threading
+import time
+import types
+from typing import Any, Dict
+
+RING = [[99.0, 18.0], [100.0, 18.0], [100.0, 19.0], [99.0, 19.0], [99.0, 18.0]]
+
+
+class FakeEngine:
+    """Latency settings and call counters shared by every fake node"""
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.1, tile_base: str = "http://fake-ee.invalid/map"):
+        self.latency = latency
+        self.jitter = jitter
+        self.tile_base = tile_base
+        self.calls = {"getInfo": 0, "getMapId": 0}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def round_trip(self, op: str):
+        with self._lock:
+            self.calls[op] += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def tile_url(self) -> str:
+        return f"{self.tile_base}/{next(self._ids)}/{{z}}/{{x}}/{{y}}"
+
+
+engine = FakeEngine()
+
+
+class TileFetcher:
+    def __init__(self, url_format: str):
+        self.url_format = url_format
+
+
+class Node:
+    """Any server-side object; every method returns a new node"""
+
+    def __init__(self, kind: str = "node", value: Any = None):
+        self.kind = kind
+        self.value = value
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: Node(name, args)
+
+    def evaluate(self) -> Any:
+        if self.kind == "Dictionary":
+            return {
+                key: value.evaluate() if isinstance(value, Node) else value
+                for key, value in self.value.items()
+            }
+        if self.kind in ("coordinates",):
+            return [RING]
+        if self.kind == "get":
+            return RING
+        if self.kind == "reduceRegion":
+            return {}
+        if self.kind in ("map", "aggregate_array"):
+            return []
+        if self.kind == "divide":
+            return 0.0
+        return None
+
+    def getInfo(self) -> Any:
+        engine.round_trip("getInfo")
+        return self.evaluate()
+
+    def getMapId(self, vis_params: Dict = None) -> Dict:
+        engine.round_trip("getMapId")
+        return {"mapid": "fake", "token": "", "tile_fetcher": TileFetcher(engine.tile_url())}
+
+
+class Factory(Node):
+    """Constructors and namespaces such as ``ee.Image`` or ``ee.Reducer``"""
+
+    def __call__(self, *args, **kwargs):
+        return Node(self.kind, args)
+
+
+class EEException(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, **kwargs):
+        self.config = kwargs
+
+    def start(self):
+        pass
+
+    def status(self) -> Dict:
+        return {"state": "COMPLETED"}
+
+
+def build_module() -> types.ModuleType:
+    module = types.ModuleType("ee")
+    module.Initialize = lambda *args, **kwargs: None
+    module.Dictionary = lambda values=None: Node("Dictionary", values or {})
+    module.EEException = EEException
+    module.batch = types.SimpleNamespace(
+        Export=types.SimpleNamespace(image=types.SimpleNamespace(toAsset=lambda **kwargs: Task(**kwargs)))
+    )
+    module.data = types.SimpleNamespace(deleteAsset=lambda asset_id: None)
+    module.__getattr__ = lambda name: Factory(name)
+    return module
+
+
+def install(latency: float = 0.3, jitter: float = 0.1, tile_base: str = None) -> FakeEngine:
+    """Register the fake as ``ee`` and return its engine for configuration and counters"""
+    engine.latency = latency
+    engine.jitter = jitter
+    if tile_base:
+        engine.tile_base = tile_base
+    sys.modules["ee"] = build_module()
+    return engine
@@ -0,0 +1,108 @@
+"""
+Synthetic hexagon prediction grids at a multiple of today's size
+
+The forest grid (``hex_forest_pro_4326.geojson``) is tiled ``scale`` times
+in a near-square block layout. Every copy is shifted by whole grid
+columns (an even number, so the odd-column offset is preserved) and rows,
+with ``left``/``top``/``right``/``bottom``, the indices and the geometry
+moved to match, and gets twelve months of seeded random predictions in
+the same ``predictions`` JSON string as the real file.
+"""
+import json
+import math
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.hex_grid import HexGrid
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hex_forest_pro_4326.geojson")
+MONTHS = [f"2025-{month:02d}" for month in range(1, 13)]
+
+
+def shift_coordinates(coordinates, dx: float, dy: float):
+    """Move lon/lat positions by metres east/north (local approximation)"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        lon, lat = coordinates[0], coordinates[1]
+        return [
+            round(lon + dx / (111_320 * math.cos(math.radians(lat))), 6),
+            round(lat + dy / 110_574, 6)
+        ]
+    return [shift_coordinates(part, dx, dy) for part in coordinates]
+
+
+def synthesize(scale: int, source_path: str = SOURCE_PATH, seed: int = 7) -> Dict:
+    """GeoJSON FeatureCollection of ``scale`` copies of the source grid"""
+    with open(source_path, encoding="utf-8") as f:
+        source: List[Dict] = json.load(f)["features"]
+
+    grid = HexGrid(source)
+    rows, cols = grid.shape
+    col_step = cols + cols % 2
+    blocks_x = math.ceil(math.sqrt(scale))
+
+    rng = np.random.default_rng(seed)
+    predictions = rng.gamma(0.8, 40.0, size=(scale * len(source), len(MONTHS))).round(3)
+
+    features = []
+    for copy in range(scale):
+        dc = (copy % blocks_x) * col_step
+        dr = (copy // blocks_x) * rows
+        dx = dc * grid.col_spacing
+        dy = -dr * grid.row_spacing
+        for feature in source:
+            properties = dict(feature["properties"])
+            properties.update({
+                "id": float(len(features)),
+                "left": properties["left"] + dx,
+                "right": properties["right"] + dx,
+                "top": properties["top"] + dy,
+                "bottom": properties["bottom"] + dy,
+                "row_index": properties["row_index"] + dr,
+                "col_index": properties["col_index"] + dc,
+                "predictions": json.dumps([
+                    {"date": month, "predicted_hotspot_count": float(value)}
+                    for month, value in zip(MONTHS, predictions[len(features)])
+                ])
+            })
+            features.append({
+                "type": "Feature",
+                "properties": properties,
+                "geometry": {
+                    "type": feature["geometry"]["type"],
+                    "coordinates": shift_coordinates(feature["geometry"]["coordinates"], dx, dy)
+                }
+            })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def ensure_grid(scale: int, directory: str, source_path: str = SOURCE_PATH) -> str:
+    """Path of the ``scale``× grid file, generating it on first use"""
+    path = os.path.join(directory, f"hexagons_x{scale}.geojson")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        geojson = synthesize(scale, source_path)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(geojson, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def source_bbox(source_path: str = SOURCE_PATH) -> List[float]:
+    """Lon/lat bounding box of the source grid, where the FIRMS stub places detections"""
+    with open(source_path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    lons, lats = [], []
+
+    def visit(coordinates):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            lons.append(coordinates[0])
+            lats.append(coordinates[1])
+        else:
+            for part in coordinates:
+                visit(part)
+
+    for feature in features:
+        visit(feature["geometry"]["coordinates"])
+    return [min(lons), min(lats), max(lons), max(lats)]
@@ -0,0 +1,82 @@
+"""
+Closed-loop load driver for an ASGI app
+
+``concurrency`` workers share one in-process httpx client and each sends
+its next request as soon as the previous one completes, until ``total``
+requests are done. No sockets are involved, so the numbers measure the
+app itself (plus whatever upstream stand-ins it calls).
+"""
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    make_url: Callable[[int], str],
+    total: int,
+    concurrency: int,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict:
+    """
+    Send ``total`` GET requests, ``concurrency`` at a time
+
+    Args:
+        client: Client bound to the app (``httpx.ASGITransport``)
+        make_url: URL of the i-th request, so scenarios can vary parameters
+        headers: Extra request headers, e.g. ``Accept-Encoding``
+
+    Returns:
+        Throughput, latency percentiles (ms), status counts and bytes read
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    received = 0
+
+    async def worker():
+        nonlocal received
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.get(make_url(i), headers=headers)
+                statuses[response.status_code] += 1
+                received += len(response.content)
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "errors": sum(count for status, count in statuses.items() if status != 200),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "bytes": received
+    }
@@ -0,0 +1,78 @@
+"""
+Request scenarios shared by the in-process and server benchmarks
+
+Each scenario is a name, a function giving the URL of the i-th request and
+optional request headers. "cold" scenarios vary their parameters so every
+request misses the layer cache and reaches (fake) Earth Engine; "warm"
+ones repeat one request.
+"""
+import itertools
+import math
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+AREAS = ["ud", "mt", "ky", "vs", "ms"]
+
+# (name, URL of the i-th request, request headers)
+Scenario = Tuple[str, Callable[[int], str], Optional[Dict[str, str]]]
+
+
+def tile_of(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    n = 1 << z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def gee_scenarios(proxy_tile_url: str) -> List[Scenario]:
+    unique = itertools.count()
+
+    def day(offset: int) -> str:
+        return (date(2024, 12, 31) - timedelta(days=offset)).isoformat()
+
+    def cold(path: str, params: Callable[[int], str]) -> Callable[[int], str]:
+        def make_url(_: int) -> str:
+            n = next(unique)
+            return f"{path}?area={AREAS[n % len(AREAS)]}&{params(n)}"
+        return make_url
+
+    def tile(_: int) -> str:
+        n = next(unique)
+        return proxy_tile_url.format(z=12, x=3200 + n % 64, y=1800 + n // 64)
+
+    return [
+        ("gee/ndvi cold", cold("/gee/ndvi", lambda n: f"end_date={day(n)}"), None),
+        ("gee/ndvi warm", lambda i: "/gee/ndvi?area=ud&end_date=2024-12-31", None),
+        ("gee/biomass cold", cold("/gee/biomass", lambda n: f"end_date={day(n)}"), None),
+        ("gee/burn-scar cold", cold("/gee/burn-scar", lambda n: f"start_date={day(n + 30)}&end_date={day(n)}"), None),
+        ("gee/flood cold", cold("/gee/flood", lambda n: f"before_date={day(n + 30)}&after_date={day(n)}"), None),
+        ("gee/study-areas", lambda i: "/gee/study-areas", None),
+        ("gee/tiles cold", tile, None),
+        ("gee/tiles warm", lambda i: proxy_tile_url.format(z=12, x=3200, y=1800), None)
+    ]
+
+
+def hotspot_scenarios(bbox: List[float]) -> List[Scenario]:
+    bbox_param = ",".join(f"{value:.3f}" for value in bbox)
+    return [
+        ("hotspot/firms-hotspots", lambda i: "/hotspot/firms-hotspots", {"Accept-Encoding": "gzip"}),
+        ("hotspot/firms-hotspots filtered", lambda i: f"/hotspot/firms-hotspots?confidence=50&bbox={bbox_param}", None),
+        ("hotspot/hex-counts", lambda i: "/hotspot/hex-counts", None)
+    ]
+
+
+def hexagon_scenarios(bbox: List[float]) -> List[Scenario]:
+    centre = tile_of((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2, 8)
+
+    def tile(i: int) -> str:
+        return f"/hotspot/hexagon-predictions/tiles/8/{centre[0] + i % 5 - 2}/{centre[1] + i // 5 % 5 - 2}.pbf"
+
+    return [
+        ("hexagon-predictions gzip", lambda i: "/hotspot/hexagon-predictions", {"Accept-Encoding": "gzip"}),
+        ("hexagon-predictions topojson", lambda i: "/hotspot/hexagon-predictions?format=topojson&precision=4",
+         {"Accept-Encoding": "gzip"}),
+        ("hexagon-predictions/values binary",
+         lambda i: "/hotspot/hexagon-predictions/values?months=2025-01,2025-02,2025-03&format=binary", None),
+        ("hexagon-predictions/tiles z8", tile, {"Accept-Encoding": "gzip"}),
+        ("hotspot/hex-counts", lambda i: "/hotspot/hex-counts", None)
+    ]
@@ -0,0 +1,18 @@
+"""
+ASGI entry point for benchmarking real server processes
+
+``main:app`` on the fake Earth Engine, configured from the ``BENCH_EE_*``
+variables set by ``benchmarks.servers``. Importing this module in the
+gunicorn master (preload) installs the fake for every worker.
+"""
+import os
+
+from benchmarks import fake_ee
+
+fake_ee.install(
+    float(os.getenv("BENCH_EE_LATENCY", "0.3")),
+    float(os.getenv("BENCH_EE_JITTER", "0.1")),
+    tile_base=os.getenv("BENCH_EE_TILE_BASE")
+)
+
+from main import app  # noqa: E402
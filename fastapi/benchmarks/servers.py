@@ -0,0 +1,217 @@
+"""
+Server setup comparison over real sockets
+
+Starts the API as separate processes, one setup at a time, each against the
+same fake Earth Engine and upstream stub with fresh scratch stores, and
+sends each the same requests:
+
+- ``uvicorn``: the development command, one process with ``--reload``
+- ``gunicorn-N``: the production profile (``gunicorn.conf.py``), N workers
+
+    cd fastapi
+    python -m benchmarks.servers
+    python -m benchmarks.servers --workers 2,4,8 --concurrency 8,64 --requests 400 --json servers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.environment import GRID_DIRECTORY, configure_environment
+from benchmarks.hexagons import ensure_grid, source_bbox
+from benchmarks.load import drive
+from benchmarks.scenarios import Scenario, gee_scenarios, hexagon_scenarios, hotspot_scenarios
+from benchmarks.upstream import UpstreamStub
+
+# Scenarios worth comparing across setups: Earth Engine bound, cached, and CPU bound
+SCENARIOS = [
+    "gee/ndvi cold", "gee/ndvi warm", "gee/tiles cold",
+    "hotspot/firms-hotspots filtered", "hotspot/hex-counts",
+    "hexagon-predictions gzip", "hexagon-predictions topojson", "hexagon-predictions/tiles z8"
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(setup: str, port: int) -> List[str]:
+    if setup == "uvicorn":
+        return [
+            sys.executable, "-m", "uvicorn", "benchmarks.serve:app",
+            "--host", "127.0.0.1", "--port", str(port), "--reload"
+        ]
+    workers = setup.split("-", 1)[1]
+    return [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "--bind", f"127.0.0.1:{port}", "--workers", workers, "benchmarks.serve:app"
+    ]
+
+
+def tree_rss_mb(root_pid: int) -> Optional[float]:
+    """Resident memory of a process and all its descendants (Linux /proc)"""
+    try:
+        parents = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                try:
+                    with open(f"/proc/{name}/stat") as f:
+                        parents[int(name)] = int(f.read().rsplit(")", 1)[1].split()[1])
+                except OSError:
+                    pass
+        tree = {root_pid}
+        changed = True
+        while changed:
+            children = {pid for pid, parent in parents.items() if parent in tree} - tree
+            changed = bool(children)
+            tree |= children
+        total_kb = 0
+        for pid in tree:
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total_kb += int(line.split()[1])
+            except OSError:
+                pass
+        return round(total_kb / 1024, 1)
+    except OSError:
+        return None
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready in time")
+
+
+async def measure(base_url: str, process: subprocess.Popen, setup: str, bbox: List[float], args) -> List[Dict]:
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        await wait_ready(client, process)
+        layer = (await client.get("/gee/ndvi?area=ud&end_date=2024-12-31")).json()["data"]
+        available = gee_scenarios(layer["proxy_tile_url"]) + hotspot_scenarios(bbox) + hexagon_scenarios(bbox)
+        scenarios: List[Scenario] = [
+            next(scenario for scenario in available if scenario[0] == name) for name in SCENARIOS
+        ]
+        for name, make_url, headers in scenarios:
+            # Prime caches and lazy builds in every worker, not just one
+            for _ in range(args.prime):
+                await client.get(make_url(0), headers=headers)
+            for concurrency in args.concurrency:
+                result = await drive(client, make_url, args.requests, concurrency, headers)
+                print(
+                    f"{setup:<12} {name:<34} {concurrency:>5} {result['throughput_rps']:>9.1f} "
+                    f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>6}",
+                    flush=True
+                )
+                results.append({"setup": setup, "scenario": name, **result})
+    rss = tree_rss_mb(process.pid)
+    print(f"# {setup}: {rss} MB resident after the run")
+    results.append({"setup": setup, "scenario": "memory", "rss_mb": rss})
+    return results
+
+
+def run_setup(setup: str, upstream_url: str, grid_path: str, bbox: List[float], args) -> List[Dict]:
+    workdir = tempfile.mkdtemp(prefix=f"udfire-{setup}-")
+    configure_environment(upstream_url, workdir, grid_path)
+    env = {
+        **os.environ,
+        "BENCH_EE_LATENCY": str(args.latency),
+        "BENCH_EE_JITTER": str(args.jitter),
+        "BENCH_EE_TILE_BASE": f"{upstream_url}/tiles",
+        "GUNICORN_ACCESS_LOG": ""
+    }
+    port = free_port()
+    with open(os.path.join(workdir, "server.log"), "w") as log:
+        process = subprocess.Popen(
+            server_command(setup, port), env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        try:
+            return asyncio.run(measure(f"http://127.0.0.1:{port}", process, setup, bbox, args))
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+
+
+def summarize(results: List[Dict], setups: List[str]):
+    """Throughput of each setup relative to the first, at the highest concurrency"""
+    rows = [r for r in results if "throughput_rps" in r]
+    top = max(r["concurrency"] for r in rows)
+    baseline = {r["scenario"]: r["throughput_rps"] for r in rows if r["setup"] == setups[0] and r["concurrency"] == top}
+    print(f"\nreq/s at concurrency {top} (× {setups[0]})")
+    print(f"{'scenario':<34} " + " ".join(f"{setup:>18}" for setup in setups))
+    for scenario in baseline:
+        cells = []
+        for setup in setups:
+            rps = next(
+                r["throughput_rps"] for r in rows
+                if r["setup"] == setup and r["scenario"] == scenario and r["concurrency"] == top
+            )
+            ratio = rps / baseline[scenario] if baseline[scenario] else 0.0
+            cells.append(f"{rps:>10.1f} ({ratio:>4.1f}×)")
+        print(f"{scenario:<34} " + " ".join(f"{cell:>18}" for cell in cells))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare the development and production server setups")
+    parser.add_argument("--workers", default="2,4", help="Comma-separated gunicorn worker counts")
+    parser.add_argument("--concurrency", default="8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--prime", type=int, default=8, help="Priming requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake Earth Engine round-trip seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Extra random round-trip seconds, up to")
+    parser.add_argument("--detections", type=int, default=2000, help="FIRMS detections served by the stub")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    setups = ["uvicorn"] + [f"gunicorn-{value}" for value in args.workers.split(",")]
+
+    bbox = source_bbox()
+    grid_path = ensure_grid(1, GRID_DIRECTORY)
+    upstream = UpstreamStub(detections=args.detections, bbox=bbox)
+    upstream_url = upstream.start()
+
+    print(f"# {os.cpu_count()} CPUs, fake Earth Engine latency {args.latency}s (+{args.jitter}s)")
+    print(
+        f"{'setup':<12} {'scenario':<34} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}"
+    )
+    results: List[Dict] = []
+    try:
+        for setup in setups:
+            results.extend(run_setup(setup, upstream_url, grid_path, bbox, args))
+    finally:
+        upstream.stop()
+
+    summarize(results, setups)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": {**vars(args), "setups": setups}, "results": results}, f, indent=2)
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Local stand-in for the upstream HTTP services
+
+Serves, from a background thread:
+
+- ``/wfs``: the FIRMS WFS GeoJSON feed, with an ETag for revalidation and
+  gzip when the client accepts it
+- ``/api``: the FIRMS country API records (the fallback source)
+- ``/tiles/<map id>/...``: Earth Engine map tiles (a fixed PNG), or
+  ``expired_status`` (403) for map IDs listed in ``expired_maps``
+
+Detections are spread over a bounding box with acquisition times in the
+last 24 hours, so the default ``since`` filters keep them, unless given
+``records`` are served instead.
+"""
+import gzip
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+
+def solid_png(size: int = 256, rgba: Sequence[int] = (0, 0, 255, 128)) -> bytes:
+    """A single-colour PNG the size of a map tile"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(rgba) * size
+    header = struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(row * size))
+        + chunk(b"IEND", b"")
+    )
+
+
+def synthetic_detections(count: int, bbox: Sequence[float], seed: int = 1) -> List[Dict]:
+    """FIRMS-like records spread over ``bbox`` (minLon, minLat, maxLon, maxLat)"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    records = []
+    for _ in range(count):
+        acquired = now - timedelta(minutes=rng.randint(0, 23 * 60))
+        records.append({
+            "latitude": round(rng.uniform(bbox[1], bbox[3]), 5),
+            "longitude": round(rng.uniform(bbox[0], bbox[2]), 5),
+            "bright_ti4": round(rng.uniform(300, 360), 2),
+            "bright_ti5": round(rng.uniform(280, 310), 2),
+            "scan": 1.0,
+            "track": 1.0,
+            "acq_date": acquired.strftime("%Y-%m-%d"),
+            "acq_time": acquired.strftime("%H%M"),
+            "satellite": rng.choice(["Terra", "Aqua"]),
+            "instrument": "MODIS",
+            "confidence": rng.randint(0, 100),
+            "version": "6.1NRT"
+        })
+    return records
+
+
+class UpstreamStub:
+    """Threaded HTTP server standing in for FIRMS and the Earth Engine tile servers"""
+
+    def __init__(
+        self,
+        detections: int = 2000,
+        bbox: Sequence[float] = (97.5, 15.5, 101.5, 20.5),
+        latency: float = 0.0,
+        records: Optional[List[Dict]] = None
+    ):
+        self.latency = latency
+        if records is None:
+            records = synthetic_detections(detections, bbox)
+        self.api_body = json.dumps(records).encode()
+        self.wfs_body = json.dumps({
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [r["longitude"], r["latitude"]]},
+                    "properties": r
+                }
+                for r in records
+            ]
+        }).encode()
+        self.wfs_gzip = gzip.compress(self.wfs_body)
+        self.etag = '"%08x"' % zlib.crc32(self.wfs_body)
+        self.tile = solid_png()
+        self.expired_maps = set()
+        self.expired_status = 403
+        self.requests = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if self.path.startswith("/wfs"):
+                    if self.headers.get("If-None-Match") == stub.etag:
+                        self.send_response(304)
+                        self.end_headers()
+                        return
+                    if "gzip" in self.headers.get("Accept-Encoding", ""):
+                        self.reply(stub.wfs_gzip, "application/json", {"ETag": stub.etag, "Content-Encoding": "gzip"})
+                    else:
+                        self.reply(stub.wfs_body, "application/json", {"ETag": stub.etag})
+                elif self.path.startswith("/api"):
+                    self.reply(stub.api_body, "application/json")
+                elif self.path.startswith("/tiles/"):
+                    if self.path.split("/")[2] in stub.expired_maps:
+                        self.send_error(stub.expired_status)
+                    else:
+                        self.reply(stub.tile, "image/png")
+                else:
+                    self.send_error(404)
+
+            def reply(self, body: bytes, content_type: str, headers: Dict[str, str] = None):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving on a free port and return the base URL"""
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,81 @@
+"""
+Gunicorn settings for the production server (APP_ENV=production, see start.sh)
+
+Uvicorn workers run the ASGI app. With preload_app the app is imported once
+in the master, and the hexagon grid is loaded there in ``when_ready``, so
+workers share the study-area registry and the grid copy-on-write instead
+of each parsing them; Earth Engine itself is initialized per worker from
+the app lifespan (its client does not survive a fork), and /gee requests
+reaching a fresh worker wait for it rather than failing. Workers are recycled after ``max_requests`` (plus jitter,
+so they do not restart together) to bound memory growth from Earth Engine
+client objects, and get ``graceful_timeout`` seconds to finish in-flight
+requests on reload or shutdown.
+"""
+import multiprocessing
+import os
+import uuid
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(multiprocessing.cpu_count(), 2))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+
+# One ID per server run, shared by every worker (analysis job ownership)
+os.environ.setdefault("APP_BOOT_ID", uuid.uuid4().hex)
+
+# Workers publish their metrics here so /metrics reports all of them
+os.environ.setdefault("METRICS_MULTIPROC_DIR", os.path.join("cache", "metrics"))
+
+
+def on_starting(server):
+    """Forget the metrics of the previous server run"""
+    from app.services.metrics import multiprocess_metrics
+
+    multiprocess_metrics.clear()
+
+
+def when_ready(server):
+    """Load the hexagon grid in the master before workers are forked"""
+    if not preload_app:
+        return
+    from app.services.hexagon_store import hexagon_store
+
+    if hexagon_store.exists():
+        hexagon_store.get()
+        server.log.info("Preloaded hexagon grid %s", hexagon_store.path)
+
+
+def child_exit(server, worker):
+    """Keep the metrics of a recycled or crashed worker in the totals"""
+    from app.services.metrics import multiprocess_metrics
+
+    multiprocess_metrics.archive(worker.pid)
+
+
+def post_fork(server, worker):
+    """
+    Tell the worker its recycling limit (see ``app.services.connection_drain``)
+    and give it its own connections to the SQLite stores opened by the master
+    """
+    from app.services.connection_drain import connection_drain
+
+    connection_drain.configure(worker.max_requests if max_requests > 0 else None)
+    if not preload_app:
+        return
+    from app.routers.gee import gee_jobs
+    from app.services.cache import layer_cache
+    from app.services.tile_cache import tile_store
+    from app.services.timeseries_store import timeseries_store
+
+    for store in (layer_cache.backend, tile_store, timeseries_store, gee_jobs.store):
+        if store is not None:
+            store.reopen()
@@ -1,11 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import gee, hotspot
+from app.services.background_lock import background_lock
+from app.services.connection_drain import ConnectionDrainMiddleware
+from app.services.executor import gee_executor
+from app.services.firms_ingest import firms_ingester, firms_store
+from app.services.http_client import close_http_client
+from app.services.metrics import MetricsMiddleware, multiprocess_metrics, render_metrics
+from app.services.tile_cache import tile_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background workers; with several worker processes, polling,
+    # scheduled warm-ups, job recovery and tile purging run in only one of them
+    leader = background_lock.acquire()
+    multiprocess_metrics.start()
+    if firms_ingester is not None:
+        firms_ingester.start(poll=leader)
+    gee.gee_init.start(on_ready=gee.gee_jobs.start if leader else None)
+    if leader:
+        gee.gee_warmup.start()
+        if tile_store is not None:
+            tile_store.start()
+
+    yield
+
+    # Stop background workers and release pooled resources
+    if firms_ingester is not None:
+        await firms_ingester.stop()
+    await gee.gee_init.stop()
+    await gee.gee_warmup.stop()
+    await gee.gee_jobs.shutdown()
+    if tile_store is not None:
+        await tile_store.stop()
+    if firms_store is not None:
+        firms_store.close()
+    await close_http_client()
+    gee_executor.shutdown()
+    await multiprocess_metrics.stop()
+    background_lock.release()
+
 
 app = FastAPI(
     title="CMU UDFire API",
     description="API for wildfire monitoring using Google Earth Engine",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,10 +62,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Request timings for /metrics and the Server-Timing header
+app.add_middleware(MetricsMiddleware)
+
+# Stop keep-alive reuse shortly before gunicorn recycles the worker
+app.add_middleware(ConnectionDrainMiddleware)
+
 # Include routers
 app.include_router(gee.router)
+app.include_router(gee.tile_router)
 app.include_router(hotspot.router, prefix="/hotspot", tags=["hotspot"])
 
 @app.get("/")
@@ -40,3 +91,18 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness: 503 until Earth Engine is initialized (/health only reports the process is up)"""
+    if not gee.gee_init.ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if gee.gee_init.ready else "starting",
+        "earth_engine": gee.gee_init.status()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request latency and Earth Engine call timings, of all worker processes"""
+    return Response(await asyncio.to_thread(render_metrics), media_type="text/plain; version=0.0.4")
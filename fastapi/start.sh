@@ -0,0 +1,10 @@
+#!/bin/sh
+# Development (default): one uvicorn process that reloads on code changes
+# Production (APP_ENV=production): gunicorn with uvicorn workers, see gunicorn.conf.py
+set -e
+
+if [ "$APP_ENV" = "production" ]; then
+    exec gunicorn -c gunicorn.conf.py main:app
+fi
+
+exec uvicorn main:app --host 0.0.0.0 --port 8000 --reload
@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+# Import the app package from the fastapi/ directory, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fake_ee  # noqa: E402
+
+# Keep the app's stores out of cache/ and never talk to the real Earth
+# Engine; must happen before any app module is imported
+SCRATCH = tempfile.mkdtemp(prefix="udfire-tests-")
+os.environ.update({
+    "FIRMS_INGEST_ENABLED": "false",
+    "GEE_TILE_CACHE_PATH": os.path.join(SCRATCH, "gee_tiles.mbtiles"),
+    "JOBS_PATH": os.path.join(SCRATCH, "jobs.sqlite"),
+    "TIMESERIES_PATH": os.path.join(SCRATCH, "timeseries.sqlite"),
+    "BACKGROUND_LOCK_PATH": os.path.join(SCRATCH, "background.lock")
+})
+for name in ("DATABASE_URL", "GEE_CACHE_PATH", "WARMUP_AT", "METRICS_MULTIPROC_DIR"):
+    os.environ.pop(name, None)
+fake_ee.install(latency=0, jitter=0)
@@ -0,0 +1,53 @@
+"""Maintenance endpoints of the /gee router require the admin token"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import gee
+from app.services.cache import LayerCache
+from app.services.gee_init import READY
+
+
+@pytest.fixture()
+def call(monkeypatch):
+    monkeypatch.setattr(gee.gee_init, "state", READY)
+    app = FastAPI()
+    app.include_router(gee.router)
+
+    def request(method, path, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token is not None else {}
+
+        async def send():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.request(method, path, headers=headers)
+        return asyncio.run(send())
+
+    return request
+
+
+def test_cache_clear_requires_the_token(call, monkeypatch):
+    cache = LayerCache()
+    cache.set("k", 1)
+    monkeypatch.setattr(gee, "layer_cache", cache)
+
+    assert call("DELETE", "/gee/cache").status_code == 403
+    monkeypatch.setattr(gee, "ADMIN_TOKEN", "secret")
+    assert call("DELETE", "/gee/cache").status_code == 401
+    assert call("DELETE", "/gee/cache", token="wrong").status_code == 401
+    assert cache.get("k") == 1
+
+    assert call("DELETE", "/gee/cache", token="secret").status_code == 200
+    assert cache.get("k") is None
+
+
+def test_warmup_requires_the_token(call, monkeypatch):
+    started = []
+    monkeypatch.setattr(gee.gee_warmup, "trigger", lambda **kwargs: started.append(kwargs))
+    monkeypatch.setattr(gee, "ADMIN_TOKEN", "secret")
+
+    assert call("POST", "/gee/warmup?areas=ud").status_code == 401
+    assert not started
+    assert call("POST", "/gee/warmup?areas=ud", token="secret").status_code == 200
+    assert started
@@ -0,0 +1,50 @@
+"""Two-level layer cache: the SQLite level stays off the hot path"""
+import asyncio
+import os
+import threading
+
+from app.services.cache import LayerCache, SQLiteCacheBackend
+
+
+def test_disk_reads_do_not_write(tmp_path):
+    backend = SQLiteCacheBackend(os.path.join(tmp_path, "layers.sqlite"), touch_interval=3600)
+    backend.set("a", {"v": 1}, expires_at=4e9)
+    writes = backend._conn.total_changes
+    for _ in range(100):
+        assert backend.get("a") == ({"v": 1}, 4e9)
+    assert backend._conn.total_changes == writes
+
+
+def test_access_times_still_drive_eviction(tmp_path):
+    backend = SQLiteCacheBackend(os.path.join(tmp_path, "layers.sqlite"), max_entries=2, touch_interval=3600)
+    backend.set("old", 1, expires_at=4e9)
+    backend.set("new", 2, expires_at=4e9)
+    # Reading "old" makes "new" the least recently used once the batch is written
+    backend.get("old")
+    backend.set("third", 3, expires_at=4e9)
+    assert backend.get("old") is not None
+    assert backend.get("new") is None
+    assert backend.get("third") is not None
+
+
+def test_async_lookups_read_the_disk_off_the_event_loop(tmp_path, monkeypatch):
+    backend = SQLiteCacheBackend(os.path.join(tmp_path, "layers.sqlite"))
+    LayerCache(backend=backend).set("k", [1, 2])
+    cache = LayerCache(backend=backend)
+    threads = []
+    read = backend.get
+    monkeypatch.setattr(backend, "get", lambda key: threads.append(threading.current_thread()) or read(key))
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        value = await cache.aget("k")
+        await cache.aset("other", 3)
+        computed = await cache.get_or_compute("missing", lambda: asyncio.sleep(0, result="fresh"))
+        return loop_thread, value, computed
+
+    loop_thread, value, computed = asyncio.run(scenario())
+    assert value == [1, 2]
+    assert computed == "fresh"
+    assert threads and loop_thread not in threads
+    assert cache.stats()["disk_hits"] == 1
+    assert LayerCache(backend=backend).get("missing") == "fresh"
@@ -0,0 +1,35 @@
+"""Accept-Encoding negotiation shared by the precompressed routes"""
+import pytest
+
+from app.services.content_encoding import accepted_codings, negotiate
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", "identity"),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("GZIP;Q=1", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0.0, gzip", "gzip"),
+    ("br;q=0.000, gzip;q=0.000", "identity"),
+    ("br; q=0.5, gzip; q=0.8", "gzip"),
+    ("br;q=0.5, gzip;q=0.5", "br"),
+    ("*", "br"),
+    ("*;q=0", "identity"),
+    ("br;q=0, *", "gzip"),
+    ("gzip;q=0.5, identity", "identity"),
+    ("gzip, identity;q=0.5", "gzip"),
+    ("br;q=abc, gzip", "gzip"),
+    ("deflate", "identity"),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, ("br", "gzip")) == expected
+
+
+def test_only_available_codings():
+    assert negotiate("br, gzip;q=0.1", ("gzip",)) == "gzip"
+    assert negotiate("br", ("gzip",)) == "identity"
+
+
+def test_weights():
+    assert accepted_codings("gzip;q=0.3, br;level=4, *;q=2") == {"gzip": 0.3, "br": 1.0, "*": 1.0}
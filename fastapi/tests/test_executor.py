@@ -0,0 +1,91 @@
+"""GEEExecutor queue accounting when callers give up"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.executor import ExecutorBusyError, GEEExecutor
+
+
+async def settle(executor: GEEExecutor, timeout: float = 5.0):
+    """Wait until no call is running or queued"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        stats = executor.stats()
+        if stats["active"] == 0 and stats["queued"] == 0:
+            return stats
+        assert asyncio.get_running_loop().time() < deadline, stats
+        await asyncio.sleep(0.01)
+
+
+def test_timed_out_calls_give_back_their_queue_slots():
+    executor = GEEExecutor(max_workers=1, max_queue=4, timeout=0.05)
+    ran = []
+
+    def slow(n):
+        threading.Event().wait(0.2)
+        ran.append(n)
+        return n
+
+    async def scenario():
+        for _ in range(3):
+            results = await asyncio.gather(*(executor.run(slow, n) for n in range(3)), return_exceptions=True)
+            assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+            stats = await settle(executor)
+            assert stats["queued"] == 0
+        # The pool is idle again and accepts a full queue
+        assert await executor.run(slow, "last", timeout=5) == "last"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["timed_out"] == 9
+    assert stats["rejected"] == 0
+    # Only the call already running at each timeout went ahead
+    assert len(ran) == 4
+
+
+def test_cancelled_callers_give_back_their_queue_slots():
+    executor = GEEExecutor(max_workers=1, max_queue=2, timeout=10)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = [asyncio.ensure_future(executor.run(lambda: "never")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queued"] == 2
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(lambda: "rejected")
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        assert executor.stats()["queued"] == 0
+
+        release.set()
+        assert await running is True
+        await settle(executor)
+        assert await executor.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+    assert executor.stats()["completed"] == 2
+
+
+def test_explicit_zero_timeout_is_not_replaced_by_the_default():
+    executor = GEEExecutor(max_workers=1, max_queue=1, timeout=10)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(threading.Event().wait, 0.2, timeout=0)
+        await settle(executor)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
@@ -0,0 +1,124 @@
+"""/hotspot/firms-hotspots served from the live FIRMS feed (local stub)"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import hotspot
+from app.services import firms_proxy as firms_proxy_module
+from app.services.firms_proxy import FirmsProxy
+from app.services.http_client import close_http_client
+from benchmarks.upstream import UpstreamStub
+
+NOW = datetime.now(timezone.utc)
+
+
+def record(latitude, longitude, hours_ago=1.0, satellite="Terra", confidence=80, **extra):
+    acquired = NOW - timedelta(hours=hours_ago)
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "acq_date": acquired.strftime("%Y-%m-%d"),
+        "acq_time": acquired.strftime("%H%M"),
+        "satellite": satellite,
+        "confidence": confidence,
+        **extra
+    }
+
+
+RECORDS = [
+    record(18.8, 98.9, hours_ago=1, tag="first"),
+    # Same detection again, and once more after rounding to 5 decimals
+    record(18.8, 98.9, hours_ago=1, tag="duplicate"),
+    record(18.800001, 98.900001, hours_ago=1, tag="rounded duplicate"),
+    # Same place and time, another satellite: a separate detection
+    record(18.8, 98.9, hours_ago=1, satellite="Aqua", tag="aqua"),
+    record(19.5, 99.5, hours_ago=3, confidence="n", tag="viirs nominal"),
+    record(14.0, 100.5, hours_ago=2, confidence=20, tag="south low"),
+    record(18.0, 98.5, hours_ago=30, tag="old")
+]
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    stub = UpstreamStub(records=RECORDS)
+    base_url = stub.start()
+    monkeypatch.setattr(firms_proxy_module, "FIRMS_WFS_URL", f"{base_url}/wfs")
+    monkeypatch.setattr(firms_proxy_module, "FIRMS_API_URL", f"{base_url}/api")
+    monkeypatch.setattr(hotspot, "firms_proxy", FirmsProxy())
+    monkeypatch.setattr(hotspot, "firms_ingester", None)
+
+    app = FastAPI()
+    app.include_router(hotspot.router, prefix="/hotspot")
+
+    def raw(params=None, headers=None):
+        async def request():
+            try:
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+                    return await c.get("/hotspot/firms-hotspots", params=params, headers=headers)
+            finally:
+                await close_http_client()
+        return asyncio.run(request())
+
+    def get(params=None):
+        response = raw(params)
+        assert response.status_code == 200, response.text
+        return [feature["properties"]["tag"] for feature in response.json()["features"]]
+
+    get.raw = raw
+
+    try:
+        yield get
+    finally:
+        stub.stop()
+
+
+def test_defaults_deduplicate_and_keep_last_24_hours(client):
+    assert client() == ["first", "aqua", "south low", "viirs nominal"]
+
+
+def test_limit_keeps_the_most_recent(client):
+    assert client({"limit": 2}) == ["first", "aqua"]
+
+
+def test_since(client):
+    since = (NOW - timedelta(hours=48)).isoformat()
+    assert client({"since": since}) == ["first", "aqua", "south low", "viirs nominal", "old"]
+    since = (NOW - timedelta(hours=1, minutes=30)).isoformat()
+    assert client({"since": since}) == ["first", "aqua"]
+
+
+def test_bbox(client):
+    assert client({"bbox": "98,18,100,20"}) == ["first", "aqua", "viirs nominal"]
+    assert client({"bbox": "100,13,101,15"}) == ["south low"]
+
+
+def test_confidence_accepts_viirs_classes(client):
+    assert client({"confidence": 50}) == ["first", "aqua", "viirs nominal"]
+    assert client({"confidence": 70}) == ["first", "aqua"]
+
+
+def test_unfiltered_view_is_cached_with_an_etag(client):
+    assert client() == ["first", "aqua", "south low", "viirs nominal"]
+    proxy = hotspot.firms_proxy
+    feed = proxy.feed
+    # The feed is parsed once per fetch and no raw body is kept
+    assert [name for name, value in vars(proxy).items() if isinstance(value, bytes)] == []
+    assert len(feed.features) == len(RECORDS)
+
+    response = client.raw(headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert client.raw(headers={"If-None-Match": etag}).status_code == 304
+    # Served from the same serialized view
+    assert feed.default_view(10000)[1] == etag
+    assert proxy.feed is feed
+
+
+def test_filters_reuse_the_parsed_feed(client):
+    client({"confidence": 50})
+    rows = hotspot.firms_proxy.feed.rows
+    client({"bbox": "98,18,100,20"})
+    assert hotspot.firms_proxy.feed.rows is rows
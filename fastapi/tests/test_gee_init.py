@@ -0,0 +1,70 @@
+"""Earth Engine readiness as seen by /gee requests"""
+import asyncio
+import threading
+import time
+
+from app.services.gee_init import FAILED, INITIALIZING, EarthEngineInitializer
+
+
+class Service:
+    """GEEService stand-in whose ``initialize`` fails ``failures`` times, then waits for ``release``"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.release = threading.Event()
+
+    def initialize(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("unreachable")
+        self.release.wait(5)
+
+
+def test_request_waits_for_first_attempt():
+    service = Service()
+    init = EarthEngineInitializer(service, wait=5)
+
+    async def scenario():
+        init.start()
+        await asyncio.sleep(0.01)
+        assert init.state == INITIALIZING
+        threading.Timer(0.1, service.release.set).start()
+        started = time.monotonic()
+        ready = await init.wait_ready()
+        return ready, time.monotonic() - started
+
+    ready, waited = asyncio.run(scenario())
+    assert ready
+    assert 0.05 < waited < 2
+
+
+def test_wait_is_bounded():
+    service = Service()
+    init = EarthEngineInitializer(service, wait=0.1)
+
+    async def scenario():
+        init.start()
+        ready = await init.wait_ready()
+        service.release.set()
+        await init.stop()
+        return ready
+
+    assert not asyncio.run(scenario())
+
+
+def test_failed_state_answers_at_once():
+    init = EarthEngineInitializer(Service(failures=1), retry_initial=60, wait=5)
+
+    async def scenario():
+        init.start()
+        while init.state != FAILED:
+            await asyncio.sleep(0.01)
+        started = time.monotonic()
+        ready = await init.wait_ready()
+        await init.stop()
+        return ready, time.monotonic() - started
+
+    ready, waited = asyncio.run(scenario())
+    assert not ready
+    assert waited < 0.5
+    assert init.retry_after() > 1
@@ -0,0 +1,153 @@
+"""/gee/tiles proxy against the fake Earth Engine and a local tile server"""
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.routers import gee
+from app.services.cache import LayerCache
+from app.services.gee_init import FAILED, READY
+from app.services.http_client import close_http_client
+from app.services.tile_cache import TileStore
+from benchmarks import fake_ee
+from benchmarks.upstream import UpstreamStub
+
+
+@pytest.fixture()
+def stub():
+    upstream = UpstreamStub(detections=0)
+    fake_ee.engine.tile_base = f"{upstream.start()}/tiles"
+    try:
+        yield upstream
+    finally:
+        upstream.stop()
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    tile_store = TileStore(os.path.join(tmp_path, "tiles.mbtiles"))
+    monkeypatch.setattr(gee, "tile_store", tile_store)
+    monkeypatch.setattr(gee, "layer_cache", LayerCache())
+    monkeypatch.setattr(gee.gee_init, "state", READY)
+    return tile_store
+
+
+def run(*paths):
+    """Status and body of each GET, in order, through the /gee router"""
+    app = FastAPI()
+    app.include_router(gee.router)
+    app.include_router(gee.tile_router)
+
+    async def requests():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                responses = []
+                for path in paths:
+                    if callable(path):
+                        path = path(responses)
+                    responses.append(await client.get(path))
+                return responses
+        finally:
+            await close_http_client()
+
+    return asyncio.run(requests())
+
+
+def tile_path(z, x, y):
+    def path(responses):
+        template = responses[0].json()["data"]["proxy_tile_url"]
+        return template.replace("{z}", str(z)).replace("{x}", str(x)).replace("{y}", str(y))
+    return path
+
+
+def test_tile_miss_then_hit(stub, store):
+    layer, first, again = run("/gee/ndvi?area=ud&end_date=2024-12-31", tile_path(8, 200, 113), tile_path(8, 200, 113))
+    assert layer.status_code == 200
+    assert first.status_code == 200 and again.status_code == 200
+    assert first.headers["content-type"] == "image/png"
+    assert first.content == again.content == stub.tile
+    # Fetched from the tile server once, then from the store
+    assert stub.requests == 1
+    assert (store.misses, store.hits) == (1, 1)
+
+
+@pytest.mark.parametrize("status", [403, 404])
+def test_expired_map_id_is_reissued(stub, store, status):
+    map_ids = []
+
+    def expire(responses):
+        url = responses[0].json()["data"]["tile_url"]
+        map_ids.append(url.split("/tiles/", 1)[1].split("/")[0])
+        stub.expired_maps.add(map_ids[0])
+        return tile_path(8, 200, 113)(responses)
+
+    stub.expired_status = status
+    calls = fake_ee.engine.calls["getMapId"]
+    layer, tile = run("/gee/ndvi?area=ud&end_date=2024-12-31", expire)
+    assert tile.status_code == 200
+    assert tile.content == stub.tile
+    # The expired tile request, then one with a fresh map ID
+    assert stub.requests == 2
+    assert fake_ee.engine.calls["getMapId"] > calls + 1
+
+
+def test_tile_server_failure_is_a_bad_gateway(stub, store):
+    def expire_every_map(responses):
+        stub.expired_status = 500
+        stub.expired_maps.update(str(i) for i in range(1000))
+        return tile_path(8, 200, 113)(responses)
+
+    _, tile = run("/gee/ndvi?area=ud&end_date=2024-12-31", expire_every_map)
+    assert tile.status_code == 502
+    assert store.stats()["tiles"] == 0
+
+
+def test_unknown_layer_and_bad_coordinates(stub, store):
+    unknown, out_of_range = run("/gee/tiles/nope/1/0/0", "/gee/tiles/nope/1/2/0")
+    assert unknown.status_code == 404
+    assert out_of_range.status_code == 400
+
+
+def test_purge_expired(tmp_path):
+    store = TileStore(os.path.join(tmp_path, "tiles.mbtiles"), max_age=60, purge_interval=0.01)
+    store.put_tile("layer", 1, 0, 0, b"old", "image/png")
+    store.put_tile("layer", 1, 1, 0, b"new", "image/png")
+    with store._lock:
+        store._conn.execute("UPDATE tiles SET fetched_at = ? WHERE tile_column = 0", (time.time() - 120,))
+        store._conn.commit()
+
+    async def purge():
+        store.start()
+        await asyncio.sleep(0.05)
+        await store.stop()
+
+    asyncio.run(purge())
+    assert store.stats()["tiles"] == 1
+    assert store.get_tile("layer", 1, 1, 0) == (b"new", "image/png")
+
+
+def test_cached_layer_result_is_not_modified(stub, store):
+    responses = run("/gee/ndvi?area=ud&end_date=2024-12-31", "/gee/ndvi?area=ud&end_date=2024-12-31")
+    first, second = (response.json()["data"]["proxy_tile_url"] for response in responses)
+    assert first == second
+    cached = [value for value, _ in gee.layer_cache._entries.values()]
+    assert cached and all(
+        "tile_url" in layer and "proxy_tile_url" not in layer
+        for value in cached for _, layer in gee.find_tile_urls(value)
+    )
+
+
+def test_stored_tiles_are_served_while_earth_engine_is_down(stub, store, monkeypatch):
+    layer, tile = run("/gee/ndvi?area=ud&end_date=2024-12-31", tile_path(8, 200, 113))
+    assert tile.status_code == 200
+    template = layer.json()["data"]["proxy_tile_url"]
+
+    monkeypatch.setattr(gee.gee_init, "state", FAILED)
+    stored, missing = run(template.format(z=8, x=200, y=113), template.format(z=8, x=201, y=113))
+    assert stored.status_code == 200
+    assert stored.content == tile.content
+    assert missing.status_code == 503
+    assert "Retry-After" in missing.headers
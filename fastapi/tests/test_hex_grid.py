@@ -0,0 +1,70 @@
+"""HexGrid binning checked against shapely point-in-polygon"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.services.hex_grid import HexGrid
+
+pytest.importorskip("shapely")
+from shapely import STRtree, points as shapely_points  # noqa: E402
+from shapely.geometry import shape  # noqa: E402
+
+GRID_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hex_forest_pro_4326.geojson")
+
+
+@pytest.fixture(scope="module")
+def features():
+    with open(GRID_PATH, encoding="utf-8") as f:
+        return json.load(f)["features"]
+
+
+def test_locate_matches_polygon_containment(features):
+    grid = HexGrid(features)
+    polygons = [shape(feature["geometry"]) for feature in features]
+    minx = min(p.bounds[0] for p in polygons)
+    miny = min(p.bounds[1] for p in polygons)
+    maxx = max(p.bounds[2] for p in polygons)
+    maxy = max(p.bounds[3] for p in polygons)
+
+    rng = np.random.default_rng(13)
+    lon = rng.uniform(minx, maxx, 20000)
+    lat = rng.uniform(miny, maxy, 20000)
+    cells = grid.locate(lon, lat)
+
+    # Cell of the hexagon shapely finds each point in (-1 outside the grid)
+    point_index, polygon_index = STRtree(polygons).query(shapely_points(lon, lat), predicate="within")
+    expected = np.full(len(lon), -1, dtype=np.int64)
+    expected[point_index] = grid.feature_cells[polygon_index]
+    containing = dict(zip(point_index, polygon_index))
+
+    inside = expected >= 0
+    assert inside.sum() > 5000
+    # The geometries are the UTM hexagons reprojected to degrees, so points
+    # within centimetres of an edge may fall on either side of it
+    for i in np.flatnonzero(cells != expected):
+        assert expected[i] >= 0, "point outside every hexagon was assigned a cell"
+        edge_distance = polygons[containing[i]].boundary.distance(shapely_points(lon[i], lat[i]))
+        assert edge_distance < 1e-5, f"point {lon[i]}, {lat[i]} is {edge_distance} degrees inside its hexagon"
+    differing = int((cells != expected).sum())
+    assert differing <= 5
+
+    # Every feature of a cell (hexagons split by a province boundary) reports the cell's count
+    counts, binned = grid.bin(lon, lat)
+    assert binned == inside.sum()
+    cell_counts = np.bincount(expected[inside], minlength=len(grid.occupied))
+    found_counts = np.bincount(cells[cells >= 0], minlength=len(grid.occupied))
+    np.testing.assert_array_equal(counts, found_counts[grid.feature_cells])
+    assert np.abs(found_counts - cell_counts).sum() <= 2 * differing
+
+
+def test_points_far_from_the_grid(features):
+    grid = HexGrid(features)
+    cells = grid.locate(np.array([0.0, 100.5, 98.9]), np.array([0.0, 13.7, 40.0]))
+    np.testing.assert_array_equal(cells, [-1, -1, -1])
+
+
+def test_features_without_grid_attributes():
+    with pytest.raises(ValueError):
+        HexGrid([{"type": "Feature", "properties": {"id": 1}, "geometry": None}])
@@ -0,0 +1,149 @@
+"""Analysis jobs shared by several worker processes through one store"""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app.services import jobs
+from app.services.cache import LayerCache
+from app.services.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, JobManager, JobStore
+
+PARAMS = {"area": "ud", "before_date": "2024-08-01", "after_date": "2024-09-01"}
+
+
+class SlowService:
+    """GEEService stand-in whose flood analysis waits for ``release``"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def get_flood_layer(self, area, before_date, after_date):
+        self.calls += 1
+        self.release.wait(5)
+        return {"area": area, "flooded_km2": 1.5}
+
+
+@pytest.fixture()
+def path(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "layer_cache", LayerCache())
+    return os.path.join(tmp_path, "jobs.sqlite")
+
+
+def manager(path, service):
+    """A JobManager as one worker process would build it, with its own connection"""
+    return JobManager(service, JobStore(path), status_poll=0.02)
+
+
+async def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_from_another_worker_is_not_overwritten(path):
+    service = SlowService()
+    owner, other = manager(path, service), manager(path, service)
+
+    async def scenario():
+        job = await owner.submit("flood", PARAMS)
+        await wait_for(lambda: owner.get(job["id"])["status"] == RUNNING)
+
+        cancelled = await other.cancel(job["id"])
+        assert cancelled["status"] == CANCELLED
+        # The owner notices and stops waiting on the call
+        await wait_for(lambda: not owner._tasks)
+
+        service.release.set()
+        await asyncio.sleep(0.05)
+        return job["id"]
+
+    job_id = asyncio.run(scenario())
+    job = owner.get(job_id, include_result=True)
+    assert job["status"] == CANCELLED
+    assert job["result"] is None
+
+
+def test_terminal_writes_are_conditional(path):
+    store = JobStore(path)
+    store.insert({"id": "a", "kind": "flood", "params": PARAMS, "key": "k", "status": RUNNING, "created_at": 1.0})
+    assert store.update("a", unfinished_only=True, status=CANCELLED, finished_at=2.0)
+    assert not store.update("a", unfinished_only=True, status=SUCCEEDED, result={"x": 1}, finished_at=3.0)
+    assert store.get("a", include_result=True)["status"] == CANCELLED
+    assert store.get("a", include_result=True)["result"] is None
+
+
+def test_concurrent_submits_from_two_workers_share_one_job(path):
+    service = SlowService()
+    first, second = manager(path, service), manager(path, service)
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            worker.submit("flood", PARAMS) for worker in (first, second) for _ in range(3)
+        ))
+        service.release.set()
+        await wait_for(lambda: not first._tasks and not second._tasks)
+        return results
+
+    results = asyncio.run(scenario())
+    assert len({job["id"] for job in results}) == 1
+    assert sum(not job["reused"] for job in results) == 1
+    assert service.calls == 1
+    assert first.get(results[0]["id"])["status"] == SUCCEEDED
+
+
+def test_duplicate_pending_key_is_refused(path):
+    store = JobStore(path)
+    job = {"kind": "flood", "params": PARAMS, "key": "k", "status": QUEUED, "created_at": 1.0}
+    assert store.insert({**job, "id": "a"})
+    assert not JobStore(path).insert({**job, "id": "b", "created_at": 2.0})
+    # Finished jobs do not block a new one
+    store.update("a", status=CANCELLED, finished_at=3.0)
+    assert store.insert({**job, "id": "c", "created_at": 4.0})
+
+
+def test_existing_duplicates_are_collapsed_on_open(path):
+    import sqlite3
+
+    store = JobStore(path)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX idx_jobs_pending_key")
+    for job_id, created_at in (("old", 1.0), ("new", 2.0)):
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, key, status, created_at) VALUES (?, 'flood', '{}', 'k', ?, ?)",
+            (job_id, QUEUED, created_at)
+        )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    assert store.get("new")["status"] == QUEUED
+    assert store.get("old")["status"] == CANCELLED
+
+
+def test_shutdown_keeps_jobs_for_the_next_process(path):
+    service = SlowService()
+    worker = manager(path, service)
+
+    async def stop_worker():
+        running = await worker.submit("flood", PARAMS)
+        queued = await worker.submit("flood", {**PARAMS, "area": "mt"})
+        await wait_for(lambda: worker.get(running["id"])["status"] == RUNNING)
+        await worker.shutdown()
+        return running["id"], queued["id"]
+
+    job_ids = asyncio.run(stop_worker())
+    assert [worker.get(job_id)["status"] for job_id in job_ids] == [QUEUED, QUEUED]
+
+    service.release.set()
+    replacement = manager(path, service)
+
+    async def restart():
+        replacement.start()
+        await wait_for(lambda: all(replacement.get(job_id)["status"] == SUCCEEDED for job_id in job_ids))
+        await replacement.shutdown()
+
+    asyncio.run(restart())
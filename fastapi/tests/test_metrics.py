@@ -0,0 +1,86 @@
+"""/metrics across worker processes and keep-alive draining before recycling"""
+import asyncio
+import json
+import os
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.services import metrics
+from app.services.connection_drain import ConnectionDrain, ConnectionDrainMiddleware
+from app.services.metrics import Counter, Histogram, MultiprocessMetrics
+
+
+def sample(text: str, line_start: str) -> str:
+    return next(line for line in text.splitlines() if line.startswith(line_start))
+
+
+def worker_snapshot(pid: int, directory: str, requests: int, errors: int):
+    """Write the snapshot a worker process would, using fresh metrics"""
+    duration = Histogram(metrics.http_request_duration.name, "", ("endpoint", "method", "status"))
+    for _ in range(requests):
+        duration.observe(("/health", "GET", "200"), 0.02)
+    failed = Counter(metrics.gee_call_errors.name, "", ("op", "endpoint", "area"))
+    failed.inc(("getInfo", "/gee/ndvi", "ud"), errors)
+    snapshot = {metric.name: metric.entries(metric.values()) for metric in (duration, failed)}
+    with open(os.path.join(directory, f"{pid}.json"), "w") as f:
+        json.dump(snapshot, f)
+
+
+def test_metrics_of_all_workers_survive_recycling(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    shared = MultiprocessMetrics(directory)
+    monkeypatch.setattr(metrics, "multiprocess_metrics", shared)
+    for metric in metrics.METRICS:
+        monkeypatch.setattr(metric, "_values", {})
+
+    metrics.http_request_duration.observe(("/health", "GET", "200"), 0.02)
+    # A stale snapshot of this process is ignored in favour of its live values
+    shared.write()
+    worker_snapshot(os.getpid(), directory, requests=100, errors=0)
+    worker_snapshot(101, directory, requests=3, errors=2)
+    worker_snapshot(102, directory, requests=5, errors=1)
+
+    before = metrics.render_metrics()
+    count = 'http_request_duration_seconds_count{endpoint="/health",method="GET",status="200"}'
+    errors = 'gee_call_errors_total{op="getInfo",endpoint="/gee/ndvi",area="ud"}'
+    assert sample(before, count) == f"{count} 9"
+    assert sample(before, errors) == f"{errors} 3"
+
+    # Worker 101 is recycled: its counts move to the archive, the totals stay
+    shared.archive(101)
+    assert not os.path.exists(os.path.join(directory, "101.json"))
+    shared.archive(101)
+    assert metrics.render_metrics() == before
+
+    shared.clear()
+    assert sample(metrics.render_metrics(), count) == f"{count} 1"
+
+
+def test_single_process_renders_own_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "multiprocess_metrics", MultiprocessMetrics(None))
+    monkeypatch.setattr(metrics.gee_call_errors, "_values", {("getMapId", "/gee/ndvi", "ud"): 4})
+    text = metrics.render_metrics()
+    assert 'gee_call_errors_total{op="getMapId",endpoint="/gee/ndvi",area="ud"} 4' in text
+
+
+def test_connection_close_before_recycling():
+    drain = ConnectionDrain(margin=2)
+    drain.configure(5)
+    app = ConnectionDrainMiddleware(Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))]), drain)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get("/")).headers.get("connection") for _ in range(5)]
+
+    assert asyncio.run(scenario()) == [None, None, "close", "close", "close"]
+
+
+def test_no_draining_without_a_limit():
+    drain = ConnectionDrain(margin=100)
+    drain.configure(None)
+    drain.served = 10 ** 6
+    assert not drain.draining
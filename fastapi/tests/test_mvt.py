@@ -0,0 +1,190 @@
+"""Round trip of the hand-written Mapbox Vector Tile encoder"""
+import gzip
+import struct
+from typing import Dict, List, Tuple
+
+from app.services.hexagon_tiles import HexagonTiler
+from app.services.mvt import encode_layer, encode_polygon_geometry, encode_tile, ring_area
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def read_fields(data: bytes) -> List[Tuple[int, object]]:
+    """(field number, value) pairs of a protobuf message"""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, pos = read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos:pos + 8], pos + 8
+        elif wire_type == 2:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        fields.append((number, value))
+    return fields
+
+
+def read_packed(data: bytes) -> List[int]:
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_value(data: bytes):
+    (number, value), = read_fields(data)
+    if number == 1:
+        return value.decode("utf-8")
+    if number == 3:
+        return struct.unpack("<d", value)[0]
+    if number == 5:
+        return value
+    if number == 6:
+        return unzigzag(value)
+    if number == 7:
+        return bool(value)
+    raise AssertionError(f"unexpected value field {number}")
+
+
+def decode_geometry(commands: List[int]) -> List[List[Tuple[int, int]]]:
+    """Rings of a polygon command stream"""
+    rings, ring = [], []
+    x = y = 0
+    i = 0
+    while i < len(commands):
+        command, count = commands[i] & 7, commands[i] >> 3
+        i += 1
+        if command == 7:
+            assert count == 1
+            rings.append(ring)
+            ring = []
+            continue
+        assert command in (1, 2)
+        for _ in range(count):
+            x += unzigzag(commands[i])
+            y += unzigzag(commands[i + 1])
+            i += 2
+            ring.append((x, y))
+    assert not ring
+    return rings
+
+
+def decode_tile(data: bytes) -> Dict[str, Dict]:
+    layers = {}
+    for number, layer_bytes in read_fields(data):
+        assert number == 3
+        fields = read_fields(layer_bytes)
+        layer = {"features": [], "keys": [], "values": []}
+        for field, value in fields:
+            if field == 15:
+                layer["version"] = value
+            elif field == 1:
+                layer["name"] = value.decode("utf-8")
+            elif field == 3:
+                layer["keys"].append(value.decode("utf-8"))
+            elif field == 4:
+                layer["values"].append(decode_value(value))
+            elif field == 5:
+                layer["extent"] = value
+        for field, value in fields:
+            if field != 2:
+                continue
+            feature = {"id": None, "properties": {}}
+            for number, part in read_fields(value):
+                if number == 1:
+                    feature["id"] = part
+                elif number == 2:
+                    tags = read_packed(part)
+                    for k, v in zip(tags[::2], tags[1::2]):
+                        feature["properties"][layer["keys"][k]] = layer["values"][v]
+                elif number == 3:
+                    feature["type"] = part
+                elif number == 4:
+                    feature["rings"] = decode_geometry(read_packed(part))
+            layer["features"].append(feature)
+        layers[layer["name"]] = layer
+    return layers
+
+
+SQUARE_CCW = [(10, 10), (10, 90), (90, 90), (90, 10)]
+HOLE_CW = [(30, 30), (60, 30), (60, 60), (30, 60)]
+TRIANGLE = [(200, 200), (300, 200), (250, 300)]
+
+
+def test_layer_round_trip():
+    features = [
+        (7, encode_polygon_geometry([[SQUARE_CCW, HOLE_CW]]), {
+            "name": "ชื่อ", "count": 3, "negative": -5, "ratio": 0.25, "flag": True, "missing": None
+        }),
+        (None, encode_polygon_geometry([[SQUARE_CCW], [TRIANGLE]]), {"count": 3, "name": "b"})
+    ]
+    layers = decode_tile(encode_tile([encode_layer("hexagons", features, extent=512)]))
+
+    layer = layers["hexagons"]
+    assert layer["version"] == 2
+    assert layer["extent"] == 512
+    # Equal values share one entry
+    assert layer["keys"].count("count") == 1
+    assert layer["values"].count(3) == 1
+
+    first, second = layer["features"]
+    assert first["id"] == 7
+    assert first["type"] == 3
+    assert first["properties"] == {"name": "ชื่อ", "count": 3, "negative": -5, "ratio": 0.25, "flag": True}
+    assert second["id"] is None
+    assert second["properties"] == {"count": 3, "name": "b"}
+
+    exterior, hole = first["rings"]
+    assert set(exterior) == set(SQUARE_CCW)
+    assert set(hole) == set(HOLE_CW)
+    # Exteriors clockwise, holes counter-clockwise on screen, whatever the input
+    assert ring_area(exterior) > 0
+    assert ring_area(hole) < 0
+
+    square, triangle = second["rings"]
+    assert set(square) == set(SQUARE_CCW) and ring_area(square) > 0
+    assert set(triangle) == set(TRIANGLE) and ring_area(triangle) > 0
+
+
+def test_hexagon_tile_decodes():
+    # One hexagon around Chiang Mai, ~2 km across
+    lon, lat, r = 98.95, 18.8, 0.01
+    ring = [[lon + dx * r, lat + dy * r] for dx, dy in [(1, 0), (0.5, 0.87), (-0.5, 0.87), (-1, 0), (-0.5, -0.87), (0.5, -0.87)]]
+    ring.append(ring[0])
+    tiler = HexagonTiler([{
+        "type": "Feature",
+        "geometry": {"type": "Polygon", "coordinates": [ring]},
+        "properties": {"id": 42, "pred_2024_03": 2.0, "predictions": {"2024-03": 2}}
+    }])
+
+    for z, x, y in [(6, 49, 28), (9, 396, 228), (12, 3173, 1830)]:
+        data = tiler.tile(z, x, y)
+        assert data
+        layer = decode_tile(gzip.decompress(data))["hexagons"]
+        feature, = layer["features"]
+        assert feature["id"] == 42
+        assert feature["properties"] == {"id": 42, "pred_2024_03": 2}
+        exterior, = feature["rings"]
+        assert ring_area(exterior) > 0
+        assert all(-tiler.buffer <= c <= tiler.extent + tiler.buffer for point in exterior for c in point)
+
+    assert tiler.tile(6, 0, 0) == b""
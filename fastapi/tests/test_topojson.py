@@ -0,0 +1,112 @@
+"""Round trip of the TopoJSON encoder"""
+from typing import Dict, List
+
+from app.services.topojson import encode_topology
+
+
+def decode_arcs(topology: Dict) -> List[List[List[float]]]:
+    """Absolute coordinates of every arc"""
+    (sx, sy), (tx, ty) = topology["transform"]["scale"], topology["transform"]["translate"]
+    arcs = []
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x += dx
+            y += dy
+            points.append([round(x * sx + tx, 9), round(y * sy + ty, 9)])
+        arcs.append(points)
+    return arcs
+
+
+def ring_of(arc_indexes: List[int], arcs: List[List[List[float]]]) -> List[List[float]]:
+    """Closed ring from arc references (~i = arc i reversed)"""
+    ring: List[List[float]] = []
+    for index in arc_indexes:
+        points = arcs[index] if index >= 0 else arcs[~index][::-1]
+        ring.extend(points if not ring else points[1:])
+    assert ring[0] == ring[-1]
+    return ring
+
+
+def same_ring(a: List[List[float]], b: List[List[float]]) -> bool:
+    """Equal closed rings, whatever the start point"""
+    a, b = a[:-1], b[:-1]
+    if len(a) != len(b):
+        return False
+    for shift in range(len(a)):
+        if a[shift:] + a[:shift] == b:
+            return True
+    return False
+
+
+def square(x: float, y: float, size: float = 1.0) -> List[List[float]]:
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+FEATURES = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "id": "a", "properties": {"n": 1},
+         "geometry": {"type": "Polygon", "coordinates": [square(98.0, 18.0), square(98.25, 18.25, 0.5)]}},
+        {"type": "Feature", "properties": {"n": 2},
+         "geometry": {"type": "Polygon", "coordinates": [square(99.0, 18.0)]}},
+        {"type": "Feature", "properties": {"n": 3},
+         "geometry": {"type": "MultiPolygon", "coordinates": [[square(98.0, 19.0)], [square(100.0, 18.0)]]}},
+        {"type": "Feature", "properties": {"n": 4},
+         "geometry": {"type": "Point", "coordinates": [98.0, 18.0]}}
+    ]
+}
+
+
+def test_round_trip_restores_every_ring():
+    topology = encode_topology(FEATURES, precision=6, object_name="hexagons")
+    assert topology["type"] == "Topology"
+    assert topology["bbox"] == [98.0, 18.0, 101.0, 20.0]
+    arcs = decode_arcs(topology)
+    geometries = topology["objects"]["hexagons"]["geometries"]
+    assert [g["properties"] for g in geometries] == [f["properties"] for f in FEATURES["features"]]
+    assert geometries[0]["id"] == "a"
+
+    for feature, geometry in zip(FEATURES["features"], geometries):
+        source = feature["geometry"]
+        if source["type"] == "Point":
+            assert geometry["type"] is None
+            continue
+        assert geometry["type"] == source["type"]
+        polygons = [source["coordinates"]] if source["type"] == "Polygon" else source["coordinates"]
+        encoded = [geometry["arcs"]] if geometry["type"] == "Polygon" else geometry["arcs"]
+        assert len(encoded) == len(polygons)
+        for rings, arc_rings in zip(polygons, encoded):
+            assert len(rings) == len(arc_rings)
+            for ring, arc_indexes in zip(rings, arc_rings):
+                assert same_ring(ring_of(arc_indexes, arcs), ring)
+
+
+def test_shared_edges_are_stored_once():
+    topology = encode_topology(FEATURES)
+    geometries = topology["objects"]["collection"]["geometries"]
+    left = {i if i >= 0 else ~i for i in geometries[0]["arcs"][0]}
+    right = {i if i >= 0 else ~i for i in geometries[1]["arcs"][0]}
+    above = {i if i >= 0 else ~i for i in geometries[2]["arcs"][0][0]}
+    # Each neighbour pair references one common arc, in opposite directions
+    assert len(left & right) == 1
+    assert len(left & above) == 1
+    shared, = left & right
+    assert (shared in geometries[0]["arcs"][0]) != (shared in geometries[1]["arcs"][0])
+
+
+def test_precision_quantizes_coordinates():
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {},
+         "geometry": {"type": "Polygon", "coordinates": [[[98.123456, 18.0], [98.2, 18.0], [98.2, 18.1], [98.123456, 18.0]]]}}
+    ]}
+    topology = encode_topology(collection, precision=2)
+    assert topology["transform"]["scale"] == [0.01, 0.01]
+    ring = ring_of(topology["objects"]["collection"]["geometries"][0]["arcs"][0], decode_arcs(topology))
+    source = collection["features"][0]["geometry"]["coordinates"][0]
+    assert len(ring) == len(source)
+    # Within half a quantization step of the source, on the grid anchored at the bbox corner
+    for x, y in ring:
+        assert any(abs(x - sx) <= 0.005 + 1e-9 and abs(y - sy) <= 0.005 + 1e-9 for sx, sy in source)
+        assert abs(round((x - 98.123456) / 0.01) * 0.01 - (x - 98.123456)) < 1e-9
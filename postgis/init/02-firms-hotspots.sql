@@ -0,0 +1,23 @@
+-- FIRMS thermal anomalies ingested by the FastAPI background poller
+CREATE TABLE IF NOT EXISTS firms_hotspots (
+    id BIGSERIAL PRIMARY KEY,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    acq_date DATE NOT NULL,
+    acq_time VARCHAR(4) NOT NULL,
+    satellite VARCHAR(32) NOT NULL,
+    acquired_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    confidence VARCHAR(16),
+    confidence_pct SMALLINT,
+    properties JSONB NOT NULL DEFAULT '{}'::jsonb,
+    geom GEOMETRY(Point, 4326) NOT NULL,
+    ingested_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_firms_hotspots_detection UNIQUE (latitude, longitude, acq_date, acq_time, satellite)
+);
+
+-- Spatial index for bbox filters and a time index for "since" filters
+CREATE INDEX IF NOT EXISTS idx_firms_hotspots_geom ON firms_hotspots USING GIST (geom);
+CREATE INDEX IF NOT EXISTS idx_firms_hotspots_acquired_at ON firms_hotspots (acquired_at);
+
+GRANT ALL PRIVILEGES ON TABLE firms_hotspots TO postgres;
+GRANT USAGE, SELECT ON SEQUENCE firms_hotspots_id_seq TO postgres;
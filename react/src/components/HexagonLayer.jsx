@@ -1,5 +1,39 @@
 import { useEffect, useRef } from 'react'
 
+/**
+ * Copy a hexagon FeatureCollection with one pred_YYYY_MM property per
+ * predicted month, leaving the original features untouched
+ */
+function flattenPredictions(geojsonData) {
+  const features = geojsonData.features.map((feature) => {
+    if (!feature.properties.predictions) {
+      return feature
+    }
+
+    let predictions
+    try {
+      predictions = typeof feature.properties.predictions === 'string'
+        ? JSON.parse(feature.properties.predictions)
+        : feature.properties.predictions
+    } catch (e) {
+      predictions = feature.properties.predictions
+    }
+
+    if (!Array.isArray(predictions)) {
+      return feature
+    }
+
+    const properties = { ...feature.properties }
+    predictions.forEach(pred => {
+      const monthKey = `pred_${pred.date.replace(/-/g, '_')}`
+      properties[monthKey] = pred.predicted_hotspot_count
+    })
+    return { ...feature, properties }
+  })
+
+  return { ...geojsonData, features }
+}
+
 /**
  * Hexagon Layer Component for Hotspot Predictions
  * Displays hexagon polygons with predicted hotspot counts
@@ -247,7 +281,7 @@ export default function HexagonLayer({ map, visible = true, selectedMonth, onHex
         }
 
         const response = await fetch('http://localhost:8000/hotspot/hexagon-predictions')
-        const geojsonData = await response.json()
+        let geojsonData = await response.json()
         console.log('📥 Received hexagon data:', geojsonData.features?.length, 'features')
 
         // Check again if component is still mounted and map is still valid after the request
@@ -255,27 +289,11 @@ export default function HexagonLayer({ map, visible = true, selectedMonth, onHex
           return
         }
 
-        // Process features to add simplified prediction properties
-        geojsonData.features.forEach((feature) => {
-          if (feature.properties.predictions) {
-            let predictions
-            try {
-              predictions = typeof feature.properties.predictions === 'string'
-                ? JSON.parse(feature.properties.predictions)
-                : feature.properties.predictions
-            } catch (e) {
-              predictions = feature.properties.predictions
-            }
-
-            // Add simplified properties for each month
-            if (Array.isArray(predictions)) {
-              predictions.forEach(pred => {
-                const monthKey = `pred_${pred.date.replace(/-/g, '_')}`
-                feature.properties[monthKey] = pred.predicted_hotspot_count
-              })
-            }
-          }
-        })
+        // Add simplified prediction properties
+        // (the API already adds pred_YYYY_MM properties when `flattened` is set)
+        if (!geojsonData.flattened) {
+          geojsonData = flattenPredictions(geojsonData)
+        }
 
         // Store the processed data for re-adding layers after basemap changes
         geojsonDataRef.current = geojsonData
@@ -1,5 +1,21 @@
 const API_BASE_URL = 'http://localhost:8000';
 
+/**
+ * Point every tile_url at the API's caching tile proxy when one is offered
+ * @param {object} value - Layer response (walked recursively)
+ */
+const withProxyTiles = (value) => {
+  if (Array.isArray(value)) {
+    value.forEach(withProxyTiles);
+  } else if (value && typeof value === 'object') {
+    if (value.proxy_tile_url) {
+      value.tile_url = `${API_BASE_URL}${value.proxy_tile_url}`;
+    }
+    Object.values(value).forEach(withProxyTiles);
+  }
+  return value;
+};
+
 export const geeService = {
   /**
    * Get NDMI drought layer
@@ -18,7 +34,7 @@ export const geeService = {
     if (!response.ok) {
       throw new Error('Failed to fetch NDMI layer');
     }
-    return response.json();
+    return withProxyTiles(await response.json());
   },
 
   /**
@@ -38,7 +54,7 @@ export const geeService = {
     if (!response.ok) {
       throw new Error('Failed to fetch NDVI layer');
     }
-    return response.json();
+    return withProxyTiles(await response.json());
   },
 
   /**
@@ -58,9 +74,94 @@ export const geeService = {
     if (!response.ok) {
       throw new Error('Failed to fetch NDWI layer');
     }
+    return withProxyTiles(await response.json());
+  },
+
+  /**
+   * Get several index layers (NDVI/NDMI/NDWI) from one shared composite
+   * @param {string} area - Study area code
+   * @param {string} endDate - End date YYYY-MM-DD
+   * @param {number} days - Days for composite
+   * @param {string[]} indices - Any subset of ndvi, ndmi, ndwi
+   */
+  async getIndicesLayer(area, endDate, days = 30, indices = ['ndvi', 'ndmi', 'ndwi']) {
+    const params = new URLSearchParams({
+      area,
+      ...(endDate && { end_date: endDate }),
+      days,
+      indices: indices.join(',')
+    });
+
+    const response = await fetch(`${API_BASE_URL}/gee/indices?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch index layers');
+    }
+    return withProxyTiles(await response.json());
+  },
+
+  /**
+   * Get daily mean NDVI/NDMI/NDWI for an area over a date range
+   * @param {string} area - Study area code
+   * @param {string} startDate - Start date YYYY-MM-DD
+   * @param {string} endDate - End date YYYY-MM-DD
+   * @param {string[]} indices - Any subset of ndvi, ndmi, ndwi
+   */
+  async getTimeseries(area, startDate, endDate, indices = ['ndvi', 'ndmi', 'ndwi']) {
+    const params = new URLSearchParams({
+      area,
+      ...(startDate && { start_date: startDate }),
+      ...(endDate && { end_date: endDate }),
+      indices: indices.join(',')
+    });
+
+    const response = await fetch(`${API_BASE_URL}/gee/timeseries?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch index time series');
+    }
+    return response.json();
+  },
+
+  /**
+   * Submit a background flood or burn scar analysis
+   * @param {string} kind - 'flood' or 'burn_scar'
+   * @param {Object} params - Same parameters as the synchronous endpoint
+   */
+  async submitJob(kind, params) {
+    const response = await fetch(`${API_BASE_URL}/gee/jobs`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ kind, params })
+    });
+    if (!response.ok) {
+      throw new Error('Failed to submit analysis job');
+    }
+    return response.json();
+  },
+
+  /**
+   * Get the status of a background job
+   * @param {string} jobId - Job ID returned by submitJob
+   */
+  async getJob(jobId) {
+    const response = await fetch(`${API_BASE_URL}/gee/jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch job status');
+    }
     return response.json();
   },
 
+  /**
+   * Get the result of a succeeded background job
+   * @param {string} jobId - Job ID returned by submitJob
+   */
+  async getJobResult(jobId) {
+    const response = await fetch(`${API_BASE_URL}/gee/jobs/${jobId}/result`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch job result');
+    }
+    return withProxyTiles(await response.json());
+  },
+
   /**
    * Get burn scar layer
    * @param {string} area - Study area code
@@ -80,7 +181,7 @@ export const geeService = {
     if (!response.ok) {
       throw new Error('Failed to fetch burn scar layer');
     }
-    return response.json();
+    return withProxyTiles(await response.json());
   },
 
   /**
@@ -88,19 +189,23 @@ export const geeService = {
    * @param {string} area - Study area code
    * @param {string} endDate - End date YYYY-MM-DD
    * @param {number} days - Days for composite
+   * @param {string} dsrStartDate - Solar radiation window start YYYY-MM-DD (with dsrEndDate; defaults to the 2023-11 to 2024-03 dry season)
+   * @param {string} dsrEndDate - Solar radiation window end YYYY-MM-DD
    */
-  async getBiomassLayer(area, endDate, days = 30) {
+  async getBiomassLayer(area, endDate, days = 30, dsrStartDate, dsrEndDate) {
     const params = new URLSearchParams({
       area,
       ...(endDate && { end_date: endDate }),
-      days
+      days,
+      ...(dsrStartDate && { dsr_start_date: dsrStartDate }),
+      ...(dsrEndDate && { dsr_end_date: dsrEndDate })
     });
 
     const response = await fetch(`${API_BASE_URL}/gee/biomass?${params}`);
     if (!response.ok) {
       throw new Error('Failed to fetch biomass layer');
     }
-    return response.json();
+    return withProxyTiles(await response.json());
   },
 
   /**
@@ -120,7 +225,7 @@ export const geeService = {
     if (!response.ok) {
       throw new Error('Failed to fetch flood layer');
     }
-    return response.json();
+    return withProxyTiles(await response.json());
   },
 
   /**